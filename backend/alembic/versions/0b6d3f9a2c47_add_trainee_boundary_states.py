@@ -0,0 +1,38 @@
+"""add_trainee_boundary_states
+
+Revision ID: 0b6d3f9a2c47
+Revises: f4b8e1a6c932
+Create Date: 2026-10-18 14:11:52.304617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6d3f9a2c47'
+down_revision: Union[str, None] = 'f4b8e1a6c932'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('trainee_boundary_states',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('monthly_schedule_id', sa.Integer(), nullable=False),
+    sa.Column('trainee_name', sa.String(length=255), nullable=False),
+    sa.Column('consecutive_work_days', sa.Integer(), nullable=False),
+    sa.Column('consecutive_days_off', sa.Integer(), nullable=False),
+    sa.Column('worked_night_last_day', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['monthly_schedule_id'], ['monthly_schedules.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('monthly_schedule_id', 'trainee_name', name='uix_boundary_state_per_month')
+    )
+    op.create_index(op.f('ix_trainee_boundary_states_id'), 'trainee_boundary_states', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_trainee_boundary_states_id'), table_name='trainee_boundary_states')
+    op.drop_table('trainee_boundary_states')
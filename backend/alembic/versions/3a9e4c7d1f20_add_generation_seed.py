@@ -0,0 +1,28 @@
+"""add_generation_seed
+
+Revision ID: 3a9e4c7d1f20
+Revises: 5dd1bca0bfca
+Create Date: 2026-10-18 09:12:05.114302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9e4c7d1f20'
+down_revision: Union[str, None] = '5dd1bca0bfca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('monthly_schedules', sa.Column('generation_mode', sa.String(length=20), nullable=True))
+    op.add_column('monthly_schedules', sa.Column('generation_seed', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('monthly_schedules', 'generation_seed')
+    op.drop_column('monthly_schedules', 'generation_mode')
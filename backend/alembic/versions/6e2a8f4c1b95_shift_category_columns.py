@@ -0,0 +1,38 @@
+"""shift_category_columns
+
+Revision ID: 6e2a8f4c1b95
+Revises: 0b6d3f9a2c47
+Create Date: 2026-10-18 16:02:37.918244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2a8f4c1b95'
+down_revision: Union[str, None] = '0b6d3f9a2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SHIFT_TABLES = ('trainee_availability', 'instructor_capacity', 'trainee_assignments')
+
+
+def upgrade() -> None:
+    for table in SHIFT_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('shift',
+                   existing_type=sa.Enum('manha', 'tarde', 'pernoite', name='shift'),
+                   type_=sa.String(length=20),
+                   existing_nullable=False)
+
+
+def downgrade() -> None:
+    for table in SHIFT_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('shift',
+                   existing_type=sa.String(length=20),
+                   type_=sa.Enum('manha', 'tarde', 'pernoite', name='shift'),
+                   existing_nullable=False)
@@ -0,0 +1,44 @@
+"""add_schedule_jobs
+
+Revision ID: 8c41d2e5b7a3
+Revises: 3a9e4c7d1f20
+Create Date: 2026-10-18 10:05:41.527918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2e5b7a3'
+down_revision: Union[str, None] = '3a9e4c7d1f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('schedule_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.Enum('queued', 'running', 'succeeded', 'failed', name='jobstatus'), nullable=False),
+    sa.Column('options', sa.JSON(), nullable=True),
+    sa.Column('progress_done', sa.Integer(), nullable=False),
+    sa.Column('progress_total', sa.Integer(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schedule_jobs_id'), 'schedule_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_schedule_jobs_month'), 'schedule_jobs', ['month'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_schedule_jobs_month'), table_name='schedule_jobs')
+    op.drop_index(op.f('ix_schedule_jobs_id'), table_name='schedule_jobs')
+    op.drop_table('schedule_jobs')
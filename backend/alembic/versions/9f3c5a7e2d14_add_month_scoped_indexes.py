@@ -0,0 +1,28 @@
+"""add_month_scoped_indexes
+
+Revision ID: 9f3c5a7e2d14
+Revises: 6e2a8f4c1b95
+Create Date: 2026-10-18 17:24:05.331870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3c5a7e2d14'
+down_revision: Union[str, None] = '6e2a8f4c1b95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trainee_availability_schedule_date_shift', 'trainee_availability', ['monthly_schedule_id', 'date', 'shift'], unique=False)
+    op.create_index('ix_trainee_assignments_schedule_date_shift', 'trainee_assignments', ['monthly_schedule_id', 'date', 'shift'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trainee_assignments_schedule_date_shift', table_name='trainee_assignments')
+    op.drop_index('ix_trainee_availability_schedule_date_shift', table_name='trainee_availability')
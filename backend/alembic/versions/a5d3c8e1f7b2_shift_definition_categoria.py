@@ -0,0 +1,51 @@
+"""shift_definition_categoria
+
+Revision ID: a5d3c8e1f7b2
+Revises: 9f3c5a7e2d14
+Create Date: 2026-10-18 18:41:09.512377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d3c8e1f7b2'
+down_revision: Union[str, None] = '9f3c5a7e2d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The main definitions the capacity imports always aggregated into, as in data/shifts.json
+MAIN_DEFINITIONS = {1: 'manha', 2: 'tarde', 3: 'pernoite'}
+STANDBY_SYMBOLS = ('SBM', 'SBT', 'SBP')
+
+
+def upgrade() -> None:
+    op.add_column('shift_definitions', sa.Column('categoria', sa.String(length=20), nullable=True))
+    op.add_column('shift_definitions', sa.Column('sobreaviso', sa.Integer(), server_default='0', nullable=True))
+
+    shift_definitions = sa.table(
+        'shift_definitions',
+        sa.column('id', sa.Integer),
+        sa.column('simbolo', sa.String),
+        sa.column('categoria', sa.String),
+        sa.column('sobreaviso', sa.Integer),
+    )
+    for definition_id, categoria in MAIN_DEFINITIONS.items():
+        op.execute(
+            shift_definitions.update()
+            .where(shift_definitions.c.id == definition_id)
+            .values(categoria=categoria)
+        )
+    op.execute(
+        shift_definitions.update()
+        .where(shift_definitions.c.simbolo.in_(STANDBY_SYMBOLS))
+        .values(categoria='pernoite', sobreaviso=1)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('shift_definitions', 'sobreaviso')
+    op.drop_column('shift_definitions', 'categoria')
@@ -0,0 +1,26 @@
+"""add_generation_inputs_hash
+
+Revision ID: d2f7a9c3e815
+Revises: 8c41d2e5b7a3
+Create Date: 2026-10-18 11:20:13.640271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7a9c3e815'
+down_revision: Union[str, None] = '8c41d2e5b7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('monthly_schedules', sa.Column('generation_inputs_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('monthly_schedules', 'generation_inputs_hash')
@@ -0,0 +1,26 @@
+"""add_assignment_pinned
+
+Revision ID: f4b8e1a6c932
+Revises: d2f7a9c3e815
+Create Date: 2026-10-18 13:02:37.885104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8e1a6c932'
+down_revision: Union[str, None] = 'd2f7a9c3e815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('trainee_assignments', sa.Column('pinned', sa.Boolean(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('trainee_assignments', 'pinned')
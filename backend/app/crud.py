@@ -1,9 +1,61 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, extract
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, insert, literal, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from . import models, schemas
+from .scheduling.availability import AvailabilityIndex
+from .scheduling.categories import ShiftCategories
 from datetime import date
+import calendar
+
+# Rows per multi-row upsert statement, well under every dialect's bind-parameter limit
+UPSERT_BATCH_SIZE = 500
+
+def upsert(db: Session, model, rows: list[dict], key: tuple, update: tuple) -> int:
+    """
+    Insert or update many rows with one multi-row statement per batch:
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL, INSERT ... ON CONFLICT DO UPDATE
+    on SQLite and PostgreSQL. `key` is the unique key the rows collide on
+    (a later row wins over an earlier one with the same key), `update` the
+    columns overwritten on a collision; with no `update` columns existing rows
+    are kept as they are. Does not commit: the caller owns the transaction.
+    """
+    dialect = db.get_bind().dialect.name
+    rows = list({tuple(row[column] for column in key): row for row in rows}.values())
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        if dialect == "mysql":
+            statement = mysql.insert(model.__table__).values(batch)
+            # Assigning a key column to itself is MySQL's no-op update
+            statement = statement.on_duplicate_key_update(
+                {column: statement.inserted[column] for column in update} or {key[0]: model.__table__.c[key[0]]}
+            )
+        elif dialect in ("sqlite", "postgresql"):
+            dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            statement = dialect_insert(model.__table__).values(batch)
+            if update:
+                statement = statement.on_conflict_do_update(
+                    index_elements=list(key), set_={column: statement.excluded[column] for column in update}
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=list(key))
+        else:
+            raise ValueError(f"Bulk upsert is not supported on {dialect}")
+        db.execute(statement)
+    return len(rows)
 
 # Monthly Schedules
+def month_bounds(month: str) -> tuple[date, date]:
+    """Half-open [first day, first day of the next month) date range of a YYYY-MM month"""
+    year, month_num = map(int, month.split('-'))
+    start = date(year, month_num, 1)
+    end = date(year + 1, 1, 1) if month_num == 12 else date(year, month_num + 1, 1)
+    return start, end
+
+def in_month(column, month: str):
+    """Month filter on a date column as a plain range, so an index on the column can serve it"""
+    start, end = month_bounds(month)
+    return and_(column >= start, column < end)
+
 def get_monthly_schedule(db: Session, month: str):
     """Get a monthly schedule context (returns None if not found)"""
     return db.query(models.MonthlySchedule).filter(models.MonthlySchedule.month == month).first()
@@ -61,6 +113,38 @@ def create_trainee(db: Session, month: str, trainee: schemas.TraineeCreate):
     db.refresh(db_trainee)
     return db_trainee
 
+def get_trainee_ids_by_name(db: Session, schedule_id: int) -> dict:
+    """{name: trainee_id} of every trainee of a month, in one query"""
+    return dict(db.query(models.Trainee.name, models.Trainee.id).filter(
+        models.Trainee.monthly_schedule_id == schedule_id
+    ).all())
+
+def bulk_insert_trainees(db: Session, schedule_id: int, names) -> int:
+    """
+    Insert active trainees with the given names in one set-based statement.
+    Does not commit: the caller owns the transaction.
+    """
+    rows = [{'monthly_schedule_id': schedule_id, 'name': name, 'active': True} for name in dict.fromkeys(names)]
+    if rows:
+        db.execute(insert(models.Trainee), rows)
+    return len(rows)
+
+def copy_trainees(db: Session, from_schedule_id: int, to_schedule_id: int) -> int:
+    """
+    Copy a month's trainees (name and active flag) into another month with one
+    INSERT ... SELECT, skipping names the target month already has.
+    Does not commit: the caller owns the transaction.
+    """
+    existing = select(models.Trainee.name).where(models.Trainee.monthly_schedule_id == to_schedule_id)
+    source = select(literal(to_schedule_id), models.Trainee.name, models.Trainee.active).where(
+        models.Trainee.monthly_schedule_id == from_schedule_id,
+        models.Trainee.name.not_in(existing)
+    )
+    result = db.execute(
+        insert(models.Trainee).from_select(['monthly_schedule_id', 'name', 'active'], source)
+    )
+    return result.rowcount
+
 def update_trainee(db: Session, trainee_id: int, trainee: schemas.TraineeCreate):
     db_trainee = get_trainee(db, trainee_id)
     if db_trainee:
@@ -82,12 +166,10 @@ def get_availability(db: Session, trainee_id: int, month: str):
     schedule = get_monthly_schedule(db, month)
     if not schedule:
         return []
-    year, month_num = map(int, month.split('-'))
     return db.query(models.TraineeAvailability).filter(
         models.TraineeAvailability.trainee_id == trainee_id,
         models.TraineeAvailability.monthly_schedule_id == schedule.id,
-        extract('year', models.TraineeAvailability.date) == year,
-        extract('month', models.TraineeAvailability.date) == month_num
+        in_month(models.TraineeAvailability.date, month)
     ).all()
 
 def get_all_availability_for_month(db: Session, month: str):
@@ -95,13 +177,30 @@ def get_all_availability_for_month(db: Session, month: str):
     schedule = get_monthly_schedule(db, month)
     if not schedule:
         return []
-    year, month_num = map(int, month.split('-'))
     return db.query(models.TraineeAvailability).filter(
         models.TraineeAvailability.monthly_schedule_id == schedule.id,
-        extract('year', models.TraineeAvailability.date) == year,
-        extract('month', models.TraineeAvailability.date) == month_num
+        in_month(models.TraineeAvailability.date, month)
     ).all()
 
+def get_availability_index(db: Session, month: str, categories: ShiftCategories = None) -> AvailabilityIndex:
+    """Load the month's unavailability into a per-trainee bitmask index over the shift categories"""
+    if categories is None:
+        categories = get_shift_categories(db)
+    year, month_num = map(int, month.split('-'))
+    _, last_day = calendar.monthrange(year, month_num)
+    schedule = get_monthly_schedule(db, month)
+    rows = db.query(
+        models.TraineeAvailability.trainee_id,
+        models.TraineeAvailability.date,
+        models.TraineeAvailability.shift
+    ).filter(
+        models.TraineeAvailability.monthly_schedule_id == schedule.id,
+        models.TraineeAvailability.available == False,
+        in_month(models.TraineeAvailability.date, month)
+    ).all() if schedule else []
+    days = [date(year, month_num, day) for day in range(1, last_day + 1)]
+    return AvailabilityIndex.from_rows(days, rows, categories.keys)
+
 def is_trainee_available(db: Session, trainee_id: int, date_obj: date, shift: str) -> bool:
     """
     Check if a trainee is available for a specific date and shift.
@@ -152,15 +251,27 @@ def create_or_update_availability(db: Session, month: str, availability: schemas
     db.refresh(db_availability)
     return db_availability
 
+def bulk_upsert_availability(db: Session, month: str, availabilities: list[schemas.TraineeAvailabilityCreate]) -> int:
+    """Create or update many availability records (any trainees of the month) in a few set-based statements"""
+    schedule = get_or_create_monthly_schedule(db, month)
+    count = upsert(db, models.TraineeAvailability, [
+        {
+            'monthly_schedule_id': schedule.id,
+            'trainee_id': av.trainee_id,
+            'date': av.date,
+            'shift': av.shift,
+            'available': av.available,
+            'reason': av.reason
+        }
+        for av in availabilities
+    ], key=('trainee_id', 'date', 'shift'), update=('available', 'reason'))
+    db.commit()
+    return count
+
 def bulk_create_availability(db: Session, month: str, trainee_id: int, availabilities: list[schemas.TraineeAvailabilityBase]):
-    for av in availabilities:
-        create_or_update_availability(db, month, schemas.TraineeAvailabilityCreate(
-            trainee_id=trainee_id,
-            date=av.date,
-            shift=av.shift,
-            available=av.available,
-            reason=av.reason
-        ))
+    bulk_upsert_availability(db, month, [
+        schemas.TraineeAvailabilityCreate(trainee_id=trainee_id, **av.model_dump()) for av in availabilities
+    ])
     return True
 
 # Capacity
@@ -189,42 +300,65 @@ def create_instructor_capacity(db: Session, month: str, capacity: schemas.Instru
     db.refresh(db_cap)
     return db_cap
 
+def bulk_upsert_capacities(db: Session, month: str, capacities: list[schemas.InstructorCapacityCreate]) -> int:
+    """Create or update many capacity records of a month in a few set-based statements"""
+    schedule = get_or_create_monthly_schedule(db, month)
+    count = upsert(db, models.InstructorCapacity, [
+        {
+            'monthly_schedule_id': schedule.id,
+            'date': capacity.date,
+            'shift': capacity.shift,
+            'total_instructors': capacity.total_instructors
+        }
+        for capacity in capacities
+    ], key=('monthly_schedule_id', 'date', 'shift'), update=('total_instructors',))
+    db.commit()
+    return count
+
 def get_capacities(db: Session, month: str):
     schedule = get_monthly_schedule(db, month)
     if not schedule:
         return []
-    year, month_num = map(int, month.split('-'))
     return db.query(models.InstructorCapacity).filter(
         models.InstructorCapacity.monthly_schedule_id == schedule.id,
-        extract('year', models.InstructorCapacity.date) == year,
-        extract('month', models.InstructorCapacity.date) == month_num
+        in_month(models.InstructorCapacity.date, month)
     ).all()
 
 # Assignments
-def delete_assignments_for_month(db: Session, month: str):
+def delete_assignments_for_month(db: Session, month: str, commit: bool = True, window: tuple = None,
+                                 keep_pinned: bool = False):
+    """
+    Delete every assignment of a month. Pass commit=False to keep it inside a larger transaction.
+    window=(first, last) limits it to those dates; keep_pinned leaves pinned assignments alone.
+    """
     schedule = get_monthly_schedule(db, month)
     if not schedule:
         return
-    year, month_num = map(int, month.split('-'))
-    db.query(models.TraineeAssignment).filter(
+    query = db.query(models.TraineeAssignment).filter(
         models.TraineeAssignment.monthly_schedule_id == schedule.id,
-        extract('year', models.TraineeAssignment.date) == year,
-        extract('month', models.TraineeAssignment.date) == month_num
-    ).delete(synchronize_session=False)
-    db.commit()
+        in_month(models.TraineeAssignment.date, month)
+    )
+    if window:
+        query = query.filter(models.TraineeAssignment.date.between(*window))
+    if keep_pinned:
+        query = query.filter(models.TraineeAssignment.pinned == False)
+    query.delete(synchronize_session=False)
+    if commit:
+        # Cleared outside of a generation: the stored plan no longer matches its inputs
+        schedule.generation_inputs_hash = None
+        db.commit()
 
 def delete_assignments_for_trainee(db: Session, month: str, trainee_id: int):
     """Delete all assignments for a specific trainee in a given month"""
     schedule = get_monthly_schedule(db, month)
     if not schedule:
         return
-    year, month_num = map(int, month.split('-'))
     db.query(models.TraineeAssignment).filter(
         models.TraineeAssignment.monthly_schedule_id == schedule.id,
         models.TraineeAssignment.trainee_id == trainee_id,
-        extract('year', models.TraineeAssignment.date) == year,
-        extract('month', models.TraineeAssignment.date) == month_num
+        in_month(models.TraineeAssignment.date, month)
     ).delete(synchronize_session=False)
+    schedule.generation_inputs_hash = None
     db.commit()
 
 def create_assignment(db: Session, month: str, assignment: schemas.TraineeAssignmentCreate):
@@ -240,17 +374,86 @@ def create_assignment(db: Session, month: str, assignment: schemas.TraineeAssign
     db.refresh(db_assign)
     return db_assign
 
-def get_assignments(db: Session, month: str):
+def bulk_create_assignments(db: Session, schedule_id: int, assignments: list[tuple]):
+    """
+    Insert many (trainee_id, date, shift) assignments with a single set-based statement.
+    Does not commit: the caller owns the transaction.
+    """
+    if not assignments:
+        return 0
+    db.bulk_insert_mappings(models.TraineeAssignment, [
+        {
+            'monthly_schedule_id': schedule_id,
+            'trainee_id': trainee_id,
+            'date': date_obj,
+            'shift': shift
+        }
+        for trainee_id, date_obj, shift in assignments
+    ])
+    return len(assignments)
+
+def get_assignments(db: Session, month: str, eager: bool = False):
+    """The month's assignments; eager=True loads their trainees in one extra query (not one per trainee)"""
     schedule = get_monthly_schedule(db, month)
     if not schedule:
         return []
-    year, month_num = map(int, month.split('-'))
-    return db.query(models.TraineeAssignment).filter(
+    query = db.query(models.TraineeAssignment)
+    if eager:
+        query = query.options(selectinload(models.TraineeAssignment.trainee))
+    return query.filter(
         models.TraineeAssignment.monthly_schedule_id == schedule.id,
-        extract('year', models.TraineeAssignment.date) == year,
-        extract('month', models.TraineeAssignment.date) == month_num
+        in_month(models.TraineeAssignment.date, month)
     ).all()
 
+def delete_assignments_by_id(db: Session, assignment_ids: list[int]):
+    """Delete specific assignment rows. Does not commit: the caller owns the transaction"""
+    if assignment_ids:
+        db.query(models.TraineeAssignment).filter(
+            models.TraineeAssignment.id.in_(assignment_ids)
+        ).delete(synchronize_session=False)
+
+# Month boundary state
+def get_boundary_states(db: Session, month: str) -> dict:
+    """{trainee_name: TraineeBoundaryState} stored when the month was generated"""
+    schedule = get_monthly_schedule(db, month)
+    if not schedule:
+        return {}
+    return {
+        state.trainee_name: state
+        for state in db.query(models.TraineeBoundaryState).filter(
+            models.TraineeBoundaryState.monthly_schedule_id == schedule.id
+        )
+    }
+
+def replace_boundary_states(db: Session, schedule_id: int, states: dict):
+    """
+    Replace a month's boundary states with {trainee_name: BoundaryState}.
+    Does not commit: the caller owns the transaction.
+    """
+    db.query(models.TraineeBoundaryState).filter(
+        models.TraineeBoundaryState.monthly_schedule_id == schedule_id
+    ).delete(synchronize_session=False)
+    if states:
+        db.bulk_insert_mappings(models.TraineeBoundaryState, [
+            {
+                'monthly_schedule_id': schedule_id,
+                'trainee_name': name,
+                'consecutive_work_days': state.consecutive_work_days,
+                'consecutive_days_off': state.consecutive_days_off,
+                'worked_night_last_day': state.worked_night_last_day
+            }
+            for name, state in states.items()
+        ])
+
+def count_assignments(db: Session, month: str) -> int:
+    schedule = get_monthly_schedule(db, month)
+    if not schedule:
+        return 0
+    return db.query(models.TraineeAssignment).filter(
+        models.TraineeAssignment.monthly_schedule_id == schedule.id,
+        in_month(models.TraineeAssignment.date, month)
+    ).count()
+
 # Shift Definitions
 def create_shift_definition(db: Session, shift: schemas.ShiftDefinitionCreate):
     db_shift = models.ShiftDefinition(
@@ -263,7 +466,9 @@ def create_shift_definition(db: Session, shift: schemas.ShiftDefinitionCreate):
         complementar=shift.complementar,
         turno_pricipal_id=shift.turno_pricipal_id,
         turno_noturno=shift.turno_noturno,
-        duracao=shift.duracao
+        duracao=shift.duracao,
+        categoria=shift.categoria,
+        sobreaviso=shift.sobreaviso
     )
     # Check if exists to update or create
     existing = db.query(models.ShiftDefinition).filter(models.ShiftDefinition.id == shift.id).first()
@@ -277,6 +482,9 @@ def create_shift_definition(db: Session, shift: schemas.ShiftDefinitionCreate):
         existing.turno_pricipal_id = shift.turno_pricipal_id
         existing.turno_noturno = shift.turno_noturno
         existing.duracao = shift.duracao
+        for field in SHIFT_CATEGORY_FIELDS:
+            if field in shift.model_fields_set:
+                setattr(existing, field, getattr(shift, field))
         db_shift = existing
     else:
         db.add(db_shift)
@@ -285,5 +493,34 @@ def create_shift_definition(db: Session, shift: schemas.ShiftDefinitionCreate):
     db.refresh(db_shift)
     return db_shift
 
+SHIFT_DEFINITION_FIELDS = (
+    'simbolo', 'nome', 'inicio', 'fim', 'etapa', 'complementar', 'turno_pricipal_id', 'turno_noturno', 'duracao'
+)
+# Scheduling columns of a definition (scheduling.categories); definitions exported by the
+# rostering system do not carry them, so an import that leaves them out keeps the stored values
+SHIFT_CATEGORY_FIELDS = ('categoria', 'sobreaviso')
+
+def bulk_upsert_shift_definitions(db: Session, shifts: list[schemas.ShiftDefinitionCreate]):
+    """Import or update many shift definitions (keyed by id) at once; returns them"""
+    ids = [shift.id for shift in shifts]
+    stored = {s.id: s for s in db.query(models.ShiftDefinition).filter(models.ShiftDefinition.id.in_(ids))}
+    rows = []
+    for shift in shifts:
+        row = shift.model_dump()
+        if shift.id in stored:
+            row.update({
+                field: getattr(stored[shift.id], field)
+                for field in SHIFT_CATEGORY_FIELDS if field not in shift.model_fields_set
+            })
+        rows.append(row)
+    upsert(db, models.ShiftDefinition, rows, key=('id',), update=SHIFT_DEFINITION_FIELDS + SHIFT_CATEGORY_FIELDS)
+    db.commit()
+    by_id = {s.id: s for s in db.query(models.ShiftDefinition).filter(models.ShiftDefinition.id.in_(ids))}
+    return [by_id[shift_id] for shift_id in dict.fromkeys(ids)]
+
 def get_all_shift_definitions(db: Session):
     return db.query(models.ShiftDefinition).all()
+
+def get_shift_categories(db: Session) -> ShiftCategories:
+    """Scheduler shift categories from the shift definitions (built-in ones if there are none)"""
+    return ShiftCategories.from_definitions(get_all_shift_definitions(db))
@@ -0,0 +1,172 @@
+"""
+Background schedule generation jobs.
+
+Jobs are rows in `schedule_jobs`, so their status, progress and result
+survive a restart; a single in-process worker thread runs them one at a
+time. Submitting a generation for a month (or a range of months) that
+already has a queued or running job with the same options returns that
+job instead of starting a duplicate; one with other options is refused
+with JobConflictError, since the pending job would not do what was asked.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from . import models, scheduler
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PENDING = (models.JobStatus.queued, models.JobStatus.running)
+
+# Minimum seconds between two progress writes of the same job
+PROGRESS_INTERVAL = 0.5
+
+
+class JobConflictError(ValueError):
+    """Raised when a month (or range) already has a pending job of the same kind with other options"""
+
+    def __init__(self, job: models.ScheduleJob):
+        self.job = job
+        super().__init__(
+            f"Job {job.id} is already {job.status.value} for {job.month} with different options"
+        )
+
+
+class JobWorker:
+    """
+    Runs schedule jobs on a daemon thread, each with its own session.
+    Jobs are only picked up once `start` has been called (on app startup).
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._loop, name="schedule-jobs", daemon=True)
+                self.thread.start()
+
+    def submit(self, db: Session, kind: str, month_str: str, options: dict) -> models.ScheduleJob:
+        """
+        Queue a job of `kind` ("generate" or "generate-range") starting at a month,
+        or return the pending job of the same kind for the same month (and range end)
+        and options. Raises JobConflictError if that pending job has other options.
+        """
+        options = jsonable_encoder(options)
+        with self.lock:
+            pending = db.query(models.ScheduleJob).filter(
+                models.ScheduleJob.month == month_str,
+                models.ScheduleJob.kind == kind,
+                models.ScheduleJob.status.in_(PENDING)
+            ).order_by(models.ScheduleJob.id).all()
+            same_target = [
+                job for job in pending if (job.options or {}).get("to_month") == options.get("to_month")
+            ]
+            for job in same_target:
+                if job.options == options:
+                    return job
+            if same_target:
+                raise JobConflictError(same_target[0])
+
+            job = models.ScheduleJob(month=month_str, kind=kind, options=options,
+                                     status=models.JobStatus.queued)
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+
+        self.queue.put(job.id)
+        return job
+
+    def requeue_pending(self) -> int:
+        """Queue again every job a previous process left queued or running"""
+        db = self.session_factory()
+        try:
+            jobs = db.query(models.ScheduleJob).filter(
+                models.ScheduleJob.status.in_(PENDING)
+            ).order_by(models.ScheduleJob.id).all()
+            for job in jobs:
+                job.status = models.JobStatus.queued
+                job.progress_done = 0
+            db.commit()
+            job_ids = [job.id for job in jobs]
+        finally:
+            db.close()
+
+        if job_ids:
+            logger.info(f"Requeued {len(job_ids)} unfinished schedule jobs")
+            for job_id in job_ids:
+                self.queue.put(job_id)
+        return len(job_ids)
+
+    def run_job(self, job_id: int):
+        """Run one job to completion in the calling thread"""
+        db = self.session_factory()
+        try:
+            job = db.get(models.ScheduleJob, job_id)
+            if job is None or job.status not in PENDING:
+                return
+
+            # 1. Mark as running
+            job.status = models.JobStatus.running
+            job.started_at = datetime.utcnow()
+            job.progress_done = 0
+            db.commit()
+
+            # 2. Solve and persist, recording progress in days
+            last_write = [0.0]
+
+            def progress(done, total):
+                now = time.monotonic()
+                if done < total and now - last_write[0] < PROGRESS_INTERVAL:
+                    return
+                last_write[0] = now
+                job.progress_done = done
+                job.progress_total = total
+                db.commit()
+
+            options = job.options or {}
+            try:
+                if job.kind == "generate-range":
+                    result = scheduler.generate_months(
+                        db, self.session_factory, job.month, progress=progress, **options
+                    )
+                else:
+                    result = scheduler.generate_schedule(db, job.month, progress=progress, **options)
+            except Exception as e:
+                logger.exception(f"Schedule job {job_id} failed")
+                db.rollback()
+                job.status = models.JobStatus.failed
+                job.error = str(e)
+            else:
+                job.status = models.JobStatus.succeeded
+                job.result = jsonable_encoder(result)
+                job.progress_done = job.progress_total
+
+            # 3. Record the outcome
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        finally:
+            db.close()
+
+    def _loop(self):
+        while True:
+            job_id = self.queue.get()
+            try:
+                self.run_job(job_id)
+            except Exception:
+                logger.exception(f"Schedule job {job_id} could not be recorded")
+            finally:
+                self.queue.task_done()
+
+
+worker = JobWorker()
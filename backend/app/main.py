@@ -1,7 +1,9 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from .database import engine, Base
+from .jobs import worker
 from .routers import trainees, schedule
 from .routers.trainees import availability_router
 from .services import shift_service
@@ -13,7 +15,14 @@ Base.metadata.create_all(bind=engine)
 with Session(engine) as db:
     shift_service.load_shifts_from_json(db)
 
-app = FastAPI(title="Intern Schedule System", redirect_slashes=False)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resume jobs interrupted by a restart, then start the job worker
+    worker.requeue_pending()
+    worker.start()
+    yield
+
+app = FastAPI(title="Intern Schedule System", redirect_slashes=False, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
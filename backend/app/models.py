@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, Enum, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Enum, ForeignKey, Index, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from .database import Base
 import enum
 from datetime import datetime
@@ -9,6 +10,17 @@ class Shift(str, enum.Enum):
     tarde = "tarde"
     pernoite = "pernoite"
 
+class ShiftType(TypeDecorator):
+    """Shift category key (scheduling.categories): built-in keys load as Shift members, others as plain strings"""
+    impl = String(20)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return getattr(value, "value", value)
+
+    def process_result_value(self, value, dialect):
+        return Shift._value2member_map_.get(value, value)
+
 class MonthlySchedule(Base):
     __tablename__ = "monthly_schedules"
 
@@ -24,10 +36,17 @@ class MonthlySchedule(Base):
     params_unavailability_weight = Column(Integer, default=1, nullable=False)
     params_post_night_shift_off = Column(Boolean, default=True, nullable=False)
 
+    # How the current assignments were generated (mode + seed reproduce randomized runs)
+    generation_mode = Column(String(20), nullable=True)
+    generation_seed = Column(Integer, nullable=True)
+    # Hash of the solver inputs and options behind the current assignments (None after manual edits)
+    generation_inputs_hash = Column(String(64), nullable=True)
+
     trainees = relationship("Trainee", back_populates="monthly_schedule", cascade="all, delete-orphan")
     availabilities = relationship("TraineeAvailability", back_populates="monthly_schedule", cascade="all, delete-orphan")
     capacities = relationship("InstructorCapacity", back_populates="monthly_schedule", cascade="all, delete-orphan")
     assignments = relationship("TraineeAssignment", back_populates="monthly_schedule", cascade="all, delete-orphan")
+    boundary_states = relationship("TraineeBoundaryState", back_populates="monthly_schedule", cascade="all, delete-orphan")
 
 class Trainee(Base):
     __tablename__ = "trainees"
@@ -53,7 +72,7 @@ class TraineeAvailability(Base):
     monthly_schedule_id = Column(Integer, ForeignKey("monthly_schedules.id"), nullable=False)
     trainee_id = Column(Integer, ForeignKey("trainees.id"), nullable=False)
     date = Column(Date, nullable=False)
-    shift = Column(Enum(Shift), nullable=False)
+    shift = Column(ShiftType(), nullable=False)
     available = Column(Boolean, default=False)
     reason = Column(String(255), nullable=True)
 
@@ -62,6 +81,8 @@ class TraineeAvailability(Base):
 
     __table_args__ = (
         UniqueConstraint('trainee_id', 'date', 'shift', name='uix_trainee_availability'),
+        # Month-scoped reads filter by schedule and a date range; (trainee_id, date) is served by the unique index
+        Index('ix_trainee_availability_schedule_date_shift', 'monthly_schedule_id', 'date', 'shift'),
     )
 
 class InstructorCapacity(Base):
@@ -70,7 +91,7 @@ class InstructorCapacity(Base):
     id = Column(Integer, primary_key=True, index=True)
     monthly_schedule_id = Column(Integer, ForeignKey("monthly_schedules.id"), nullable=False)
     date = Column(Date, nullable=False)
-    shift = Column(Enum(Shift), nullable=False)
+    shift = Column(ShiftType(), nullable=False)
     total_instructors = Column(Integer, default=0)
 
     monthly_schedule = relationship("MonthlySchedule", back_populates="capacities")
@@ -86,15 +107,61 @@ class TraineeAssignment(Base):
     monthly_schedule_id = Column(Integer, ForeignKey("monthly_schedules.id"), nullable=False)
     trainee_id = Column(Integer, ForeignKey("trainees.id"), nullable=False)
     date = Column(Date, nullable=False)
-    shift = Column(Enum(Shift), nullable=False)
+    shift = Column(ShiftType(), nullable=False)
+    # Pinned assignments (manual edits) are kept by generate and repair
+    pinned = Column(Boolean, default=False, nullable=False)
 
     monthly_schedule = relationship("MonthlySchedule", back_populates="assignments")
     trainee = relationship("Trainee", back_populates="assignments")
 
     __table_args__ = (
         UniqueConstraint('trainee_id', 'date', name='uix_trainee_assignment_day'), # One shift per day per trainee
+        Index('ix_trainee_assignments_schedule_date_shift', 'monthly_schedule_id', 'date', 'shift'),
     )
 
+class TraineeBoundaryState(Base):
+    """Streaks at the end of a generated month, read by the next month's generation"""
+    __tablename__ = "trainee_boundary_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    monthly_schedule_id = Column(Integer, ForeignKey("monthly_schedules.id"), nullable=False)
+    trainee_name = Column(String(255), nullable=False)  # Trainees are per month; names match them across months
+    consecutive_work_days = Column(Integer, default=0, nullable=False)
+    consecutive_days_off = Column(Integer, default=0, nullable=False)
+    worked_night_last_day = Column(Boolean, default=False, nullable=False)
+
+    monthly_schedule = relationship("MonthlySchedule", back_populates="boundary_states")
+
+    __table_args__ = (
+        UniqueConstraint('monthly_schedule_id', 'trainee_name', name='uix_boundary_state_per_month'),
+    )
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+class ScheduleJob(Base):
+    __tablename__ = "schedule_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(String(7), nullable=False, index=True)  # YYYY-MM format
+    kind = Column(String(20), default="generate", nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False)
+    options = Column(JSON, nullable=True)  # Solver arguments (mode, budget_ms, seed, starts)
+
+    # Progress in days processed
+    progress_done = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, default=0, nullable=False)
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
 class ShiftDefinition(Base):
     __tablename__ = "shift_definitions"
 
@@ -111,3 +178,7 @@ class ShiftDefinition(Base):
     turno_pricipal_id = Column(Integer, nullable=True)
     turno_noturno = Column(Integer, default=0)
     duracao = Column(Integer, default=0)
+    # Scheduler shift category the definition counts towards (scheduling.categories); complements inherit it
+    categoria = Column(String(20), nullable=True)
+    # Standby block: counted in the capacity tables but not in per-definition capacity totals
+    sobreaviso = Column(Integer, default=0)
@@ -1,5 +1,5 @@
 from bs4 import BeautifulSoup
-from .models import Shift
+from .scheduling.categories import DEFAULT_CATEGORIES
 from datetime import date
 import calendar
 import re
@@ -7,7 +7,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def parse_text_table(text_content: str, month_str: str):
+def parse_text_table(text_content: str, month_str: str, categories=DEFAULT_CATEGORIES):
     """
     Parses plain text table (vertical or horizontal format).
 
@@ -17,6 +17,8 @@ def parse_text_table(text_content: str, month_str: str):
     t        2        2    2    3
     p        1        1    1    1
 
+    Every shift subtype (m2, sbp, ...) is summed into its shift category.
+
     Horizontal format (rows - from Excel transpose):
     Turno
     m
@@ -42,20 +44,7 @@ def parse_text_table(text_content: str, month_str: str):
 
     # Map all shift subtypes to their main category
     # We need to SUM all subtypes of each category
-    shift_map_manha = ['m', 'm2', 'm3', 'mr', 'mexp', 'msexp']
-    shift_map_tarde = ['t', 't2', 't3', 't4', 'tr', 'ic', 'texp']
-    shift_map_pernoite = ['p', 'sbm', 'sbt', 'sbp']
-
-    def get_shift_category(label):
-        """Returns shift category for all subtypes"""
-        label_lower = label.lower().strip()
-        if label_lower in shift_map_manha:
-            return Shift.manha
-        elif label_lower in shift_map_tarde:
-            return Shift.tarde
-        elif label_lower in shift_map_pernoite:
-            return Shift.pernoite
-        return None
+    get_shift_category = categories.of_symbol
 
     # Detect format: vertical (has multiple columns per line) or horizontal (one column)
     # Check first few lines
@@ -123,11 +112,8 @@ def parse_text_table(text_content: str, month_str: str):
             i += 1
 
         # Verify we have at least one turno from each category
-        has_manha = any(label in shift_map_manha for label in turno_labels)
-        has_tarde = any(label in shift_map_tarde for label in turno_labels)
-        has_pernoite = any(label in shift_map_pernoite for label in turno_labels)
-
-        if not (has_manha and has_tarde and has_pernoite):
+        found = {get_shift_category(label) for label in turno_labels}
+        if not all(shift in found for shift in categories):
             return []
 
         # Number of turnos (each with 2 values from HTML divs)
@@ -172,9 +158,7 @@ def parse_text_table(text_content: str, month_str: str):
                 break
 
             # Sum all subtypes for each category
-            manha_total = 0
-            tarde_total = 0
-            pernoite_total = 0
+            totals = {shift: 0 for shift in categories}
 
             for turno_idx, turno_label in enumerate(turno_labels):
                 # Get the second value for this turno (the one we want)
@@ -188,32 +172,19 @@ def parse_text_table(text_content: str, month_str: str):
 
                     # Add to the appropriate category
                     shift = get_shift_category(turno_label)
-                    if shift == Shift.manha:
-                        manha_total += value
-                    elif shift == Shift.tarde:
-                        tarde_total += value
-                    elif shift == Shift.pernoite:
-                        pernoite_total += value
+                    if shift is not None:
+                        totals[shift] += value
 
-            capacity_data.append({
-                "date": date(year, month, day_num),
-                "shift": Shift.manha,
-                "total_instructors": manha_total
-            })
-            capacity_data.append({
-                "date": date(year, month, day_num),
-                "shift": Shift.tarde,
-                "total_instructors": tarde_total
-            })
-            capacity_data.append({
-                "date": date(year, month, day_num),
-                "shift": Shift.pernoite,
-                "total_instructors": pernoite_total
-            })
+            for shift, total in totals.items():
+                capacity_data.append({
+                    "date": date(year, month, day_num),
+                    "shift": shift,
+                    "total_instructors": total
+                })
 
     return capacity_data
 
-def parse_html_table(html_content: str, month_str: str):
+def parse_html_table(html_content: str, month_str: str, categories=DEFAULT_CATEGORIES):
     """
     Parses the HTML table and returns a list of dictionaries for InstructorCapacity.
     Tries HTML parsing first, falls back to text parsing if HTML tags not found.
@@ -229,11 +200,10 @@ def parse_html_table(html_content: str, month_str: str):
 
         capacity_data = []
 
-        # Map row labels to Shift enum
+        # Map row labels (the main symbol of each category, upper case) to shift categories
         shift_map = {
-            'M': Shift.manha,
-            'T': Shift.tarde,
-            'P': Shift.pernoite
+            category.symbols[0].upper(): shift
+            for category, shift in zip(categories.categories, categories.keys) if category.symbols
         }
 
         for row in rows:
@@ -270,4 +240,4 @@ def parse_html_table(html_content: str, month_str: str):
         return capacity_data
     else:
         # Plain text parsing
-        return parse_text_table(html_content, month_str)
+        return parse_text_table(html_content, month_str, categories)
@@ -1,18 +1,18 @@
+import io
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Dict, Any, Iterable, Iterator, Union
 
-def parse_unavailability_text(text: str) -> List[Dict[str, Any]]:
+def parse_unavailability_text(text: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
     """
     Parses the unavailability text format.
-    Returns a list of dictionaries with:
+    Accepts the whole text or any iterable of lines (e.g. an open file) and
+    yields one dictionary per entry as soon as it is complete:
     - name: str
-    - start_date: datetime
-    - end_date: datetime
+    - start: datetime
+    - end: datetime
     - reason: str
     """
-    entries = []
-    
     # Split by double newlines or just scan through
     # The format seems to be blocks of text.
     # We can try to split by "Nome:" but we need to capture the header before it.
@@ -22,7 +22,9 @@ def parse_unavailability_text(text: str) -> List[Dict[str, Any]]:
     #    However, "Fériasfe" has numbered entries.
     # 2. Alternatively, just iterate line by line and maintain state.
     
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if isinstance(text, str):
+        text = io.StringIO(text)
+    lines = (line.strip() for line in text)
     
     current_reason_header = None
     current_entry = {}
@@ -30,9 +32,9 @@ def parse_unavailability_text(text: str) -> List[Dict[str, Any]]:
     # Regex for date: DD/MM/YYYY HH:MM or DD/MM/YYYY
     date_pattern = r"(\d{2}/\d{2}/\d{4})(?:\s+(\d{2}:\d{2}))?"
     
-    i = 0
-    while i < len(lines):
-        line = lines[i]
+    for line in lines:
+        if not line:
+            continue
         
         # Check if it's a header (heuristic: doesn't start with known keys and next line is Nome or a number)
         is_key_value = any(line.startswith(k) for k in ["Nome:", "Função:", "Início:", "Fim:", "Descrição:", "Quantidade de dias"])
@@ -46,18 +48,16 @@ def parse_unavailability_text(text: str) -> List[Dict[str, Any]]:
                 current_reason_header = cleaned_header[-3:].upper()
             else:
                 current_reason_header = cleaned_header.upper()
-            i += 1
             continue
             
         if is_number:
             # Just a counter, skip
-            i += 1
             continue
             
         if line.startswith("Nome:"):
             # Start of a new entry
             if current_entry:
-                entries.append(current_entry)
+                yield current_entry
             current_entry = {"reason": current_reason_header if current_reason_header else "IND"}
             current_entry["name"] = line.split("Nome:", 1)[1].strip()
         
@@ -82,10 +82,6 @@ def parse_unavailability_text(text: str) -> List[Dict[str, Any]]:
             desc = line.split("Descrição:", 1)[1].strip()
             if desc:
                 current_entry["reason"] = desc
-                
-        i += 1
         
     if current_entry and "name" in current_entry:
-        entries.append(current_entry)
-        
-    return entries
+        yield current_entry
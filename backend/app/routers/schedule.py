@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas, database, parser, scheduler, models
+from typing import List, Optional
+from datetime import date
+from .. import crud, schemas, database, parser, scheduler, models, jobs
 
 router = APIRouter(
     tags=["schedule"]
@@ -58,9 +60,13 @@ def update_monthly_schedule_parameters(
     return schedule
 
 @router.post("/months/{month}/trainees/copy-from-previous")
-def copy_trainees_from_previous_month(month: str, db: Session = Depends(database.get_db)):
-    """Copy all trainees from the previous month to the current month"""
+def copy_trainees_from_previous_month(month: str, carry_availability: bool = False, db: Session = Depends(database.get_db)):
+    """
+    Copy all trainees from the previous month to the current month.
+    With carry_availability=true their recurring (weekly) unavailability is carried over too.
+    """
     from datetime import datetime
+    from ..services.trainee_copy import copy_from_previous_month
     
     # Parse the target month
     try:
@@ -69,57 +75,20 @@ def copy_trainees_from_previous_month(month: str, db: Session = Depends(database
         raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM")
     
     # Calculate previous month
-    year = target_date.year
-    month_num = target_date.month
-    
-    if month_num == 1:
-        previous_year = year - 1
-        previous_month_num = 12
-    else:
-        previous_year = year
-        previous_month_num = month_num - 1
-    
-    previous_month = f"{previous_year:04d}-{previous_month_num:02d}"
-    
-    # Get or create target monthly schedule
-    target_schedule = crud.get_or_create_monthly_schedule(db, month)
+    previous_month = scheduler.previous_month(target_date.strftime("%Y-%m"))
     
-    # Get previous month's schedule
-    previous_schedule = crud.get_monthly_schedule(db, previous_month)
-    if not previous_schedule:
-        raise HTTPException(status_code=404, detail=f"No schedule found for previous month {previous_month}")
-    
-    # Get all trainees from previous month
-    previous_trainees = crud.get_trainees_for_month(db, previous_month)
-    
-    if not previous_trainees:
-        raise HTTPException(status_code=404, detail=f"No trainees found in previous month {previous_month}")
-    
-    # Copy trainees to target month
-    copied_count = 0
-    for prev_trainee in previous_trainees:
-        # Check if trainee already exists in target month
-        existing = db.query(models.Trainee).filter(
-            models.Trainee.monthly_schedule_id == target_schedule.id,
-            models.Trainee.name == prev_trainee.name
-        ).first()
-        
-        if not existing:
-            # Create new trainee with same name and active status
-            new_trainee = models.Trainee(
-                monthly_schedule_id=target_schedule.id,
-                name=prev_trainee.name,
-                active=prev_trainee.active
-            )
-            db.add(new_trainee)
-            copied_count += 1
-    
-    db.commit()
+    # Copy trainees (and optionally their recurring unavailability) to target month
+    try:
+        result = copy_from_previous_month(db, month, previous_month, carry_availability)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    copied_count = result["copied_count"]
     
     return {
         "status": "ok",
         "message": f"Copied {copied_count} trainees from {previous_month} to {month}",
         "copied_count": copied_count,
+        "carried_availability": result["carried_availability"],
         "previous_month": previous_month
     }
 
@@ -141,20 +110,21 @@ def import_capacity_with_month(month: str, body: str = Body(..., media_type="tex
         f.write(body)
     logger.info("Saved raw input to /tmp/capacity_import_debug.txt")
 
-    parsed_data = parser.parse_html_table(body, month)
-    created_count = 0
-    for item in parsed_data:
-        crud.create_instructor_capacity(db, month, schemas.InstructorCapacityCreate(**item))
-        created_count += 1
+    parsed_data = parser.parse_html_table(body, month, crud.get_shift_categories(db))
+    created_count = crud.bulk_upsert_capacities(
+        db, month, [schemas.InstructorCapacityCreate(**item) for item in parsed_data]
+    )
     return {"message": f"Imported {created_count} capacity records for {month}"}
 
+@router.get("/shifts/categories", response_model=List[schemas.ShiftCategory])
+def get_shift_categories(db: Session = Depends(database.get_db)):
+    """Shift categories the scheduler fills, in availability-index order"""
+    return crud.get_shift_categories(db).describe()
+
 @router.post("/shifts/import", response_model=List[schemas.ShiftDefinition])
 def import_shift_definitions(shifts: List[schemas.ShiftDefinitionCreate], db: Session = Depends(database.get_db)):
     """Import or update shift definitions"""
-    created_shifts = []
-    for shift in shifts:
-        created_shifts.append(crud.create_shift_definition(db, shift))
-    return created_shifts
+    return crud.bulk_upsert_shift_definitions(db, shifts)
 
 import logging
 logger = logging.getLogger(__name__)
@@ -177,20 +147,11 @@ def import_capacity_json(month: str, data: List[schemas.DailyAvailability], db:
     schedule = crud.get_or_create_monthly_schedule(db, month)
 
     # 2. Fetch shift definitions from DB
-    db_shifts = crud.get_all_shift_definitions(db)
-    shift_map = {s.id: s for s in db_shifts}
-
-    if not shift_map:
+    if not crud.get_all_shift_definitions(db):
         raise HTTPException(status_code=400, detail="No shift definitions found. Please import shifts first.")
 
-    # 3. Helper to check if a shift is complementary to a main shift
-    def is_complementary_to(shift_id: int, main_shift_id: int) -> bool:
-        if shift_id == main_shift_id:
-            return True
-        shift_def = shift_map.get(shift_id)
-        if shift_def and shift_def.turno_pricipal_id == main_shift_id:
-            return True
-        return False
+    # 3. Shift categories: each definition counts towards its category (standby blocks towards none)
+    categories = crud.get_shift_categories(db)
 
     # 4. Collect all capacity records to insert/update
     capacity_records = []
@@ -200,60 +161,30 @@ def import_capacity_json(month: str, data: List[schemas.DailyAvailability], db:
         date_obj = parser.date.fromisoformat(daily_data.data)
 
         # Initialize totals
-        manha_total = 0
-        tarde_total = 0
-        pernoite_total = 0
+        totals = {shift: 0 for shift in categories}
 
         for shift_total in daily_data.soma_total:
-            shift_id = shift_total.turno
-            total = shift_total.total
-
-            if is_complementary_to(shift_id, 1): # Manhã
-                manha_total += total
-            elif is_complementary_to(shift_id, 2): # Tarde
-                tarde_total += total
-            elif is_complementary_to(shift_id, 3): # Pernoite
-                pernoite_total += total
+            shift = categories.of_definition(shift_total.turno)
+            if shift is not None:
+                totals[shift] += shift_total.total
 
         # Add to records list
-        capacity_records.append((date_obj, schemas.Shift.manha, manha_total))
-        capacity_records.append((date_obj, schemas.Shift.tarde, tarde_total))
-        capacity_records.append((date_obj, schemas.Shift.pernoite, pernoite_total))
+        for shift, total in totals.items():
+            capacity_records.append(schemas.InstructorCapacityCreate(date=date_obj, shift=shift, total_instructors=total))
 
-    # 5. Delete all existing capacity records for this month (simpler than upsert)
-    year, month_num = map(int, month.split('-'))
+    # 5. Delete all existing capacity records for this month, so days and shifts missing from the import are cleared
     deleted = db.query(models.InstructorCapacity).filter(
         models.InstructorCapacity.monthly_schedule_id == schedule.id,
-        models.InstructorCapacity.date >= parser.date(year, month_num, 1),
-        models.InstructorCapacity.date < parser.date(year if month_num < 12 else year + 1, month_num + 1 if month_num < 12 else 1, 1)
+        crud.in_month(models.InstructorCapacity.date, month)
     ).delete(synchronize_session=False)
 
     print(f"DEBUG: Deleted {deleted} existing records")
 
-    # 6. Use bulk_insert_mappings for maximum performance
-    capacity_dicts = []
-    for date_obj, shift, total in capacity_records:
-        capacity_dicts.append({
-            'monthly_schedule_id': schedule.id,
-            'date': date_obj,
-            'shift': shift,
-            'total_instructors': total
-        })
-
-    print(f"DEBUG: Prepared {len(capacity_dicts)} records for bulk insert")
-
-    if capacity_dicts:
-        db.bulk_insert_mappings(models.InstructorCapacity, capacity_dicts)
-
-    print(f"DEBUG: Bulk insert completed, committing...")
-
-    # 7. Single commit at the end
-    db.commit()
+    # 6. Set-based upsert, committed together with the delete
+    created_count = crud.bulk_upsert_capacities(db, month, capacity_records)
 
     print(f"DEBUG: Commit completed!")
 
-    created_count = len(capacity_dicts)
-
     return {"message": f"Imported {created_count} capacity records for {month}"}
 
 @router.get("/months/{month}/instructor-capacity", response_model=List[schemas.InstructorCapacity])
@@ -265,19 +196,243 @@ def get_instructor_capacity(month: str, db: Session = Depends(database.get_db)):
 def update_instructor_capacity(
     month: str,
     capacity: schemas.InstructorCapacityCreate,
+    repair: bool = False,
     db: Session = Depends(database.get_db)
 ):
-    """Manually create or update the instructor capacity for a single date/shift"""
+    """
+    Manually create or update the instructor capacity for a single date/shift.
+    With repair=true the existing schedule is incrementally repaired afterwards.
+    """
     if capacity.total_instructors < 0:
         raise HTTPException(status_code=400, detail="total_instructors must be >= 0")
-    return crud.create_instructor_capacity(db, month, capacity)
+    if capacity.shift not in crud.get_shift_categories(db).index:
+        raise HTTPException(status_code=400, detail=f"Unknown shift '{capacity.shift}'")
+    db_capacity = crud.create_instructor_capacity(db, month, capacity)
+    if repair:
+        # Adjust only the affected slots of the existing schedule
+        scheduler.repair_schedule(db, month)
+        db.refresh(db_capacity)
+    return db_capacity
 
 # Schedule Generation
-@router.post("/months/{month}/schedule/generate")
-def generate_schedule(month: str, db: Session = Depends(database.get_db)):
-    """Generate schedule for a specific month"""
-    count = scheduler.generate_schedule(db, month)
-    return {"message": f"Generated {count} assignments for {month}"}
+def _submit_job(db: Session, kind: str, month: str, options: dict):
+    """Queue (or join) a job; a pending job for the month with other options is a 409"""
+    try:
+        return jobs.worker.submit(db, kind, month, options)
+    except jobs.JobConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job_id": e.job.id})
+
+@router.post("/months/{month}/schedule/generate", response_model=schemas.ScheduleJob, status_code=202)
+def generate_schedule(
+    month: str,
+    mode: str = "greedy",
+    budget_ms: int = 0,
+    seed: Optional[int] = None,
+    starts: int = scheduler.DEFAULT_STARTS,
+    force: bool = False,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    feasibility: str = "warn",
+    db: Session = Depends(database.get_db)
+):
+    """
+    Queue schedule generation for a specific month (mode: greedy, flow or multistart).
+    budget_ms > 0 adds a local-search improvement pass limited to that many milliseconds.
+    seed makes greedy/flow a reproducible randomized variant; for multistart it is the base seed.
+
+    Returns the job; poll GET /jobs/{id} for progress and the result. If the month
+    already has a queued or running generation with the same options, that job is
+    returned instead; one with other options is a 409 with that job's id.
+    When nothing changed since the last generation the stored schedule is kept
+    (result.cached is true); force=true regenerates anyway.
+
+    Pinned assignments are always kept; start_date/end_date re-solve only that
+    range of the month.
+
+    feasibility: "warn" (default) reports a supply shortfall in the job result,
+    "strict" refuses an infeasible month with a 422 and the report, "off" skips the check.
+    """
+    try:
+        scheduler.validate_mode(mode, budget_ms, starts, feasibility)
+        window = scheduler.validate_window(month, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not crud.get_monthly_schedule(db, month):
+        raise HTTPException(status_code=404, detail="Monthly schedule not found")
+    if feasibility == "strict":
+        # Refuse right away instead of queuing a job that can only fail
+        report = scheduler.feasibility_report(db, month, window)
+        if not report["feasible"]:
+            raise HTTPException(status_code=422, detail=jsonable_encoder(report))
+    options = {
+        "mode": mode, "budget_ms": budget_ms, "seed": seed, "starts": starts, "force": force,
+        "feasibility": feasibility,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None
+    }
+    return _submit_job(db, "generate", month, options)
+
+@router.post("/schedule/generate-range", response_model=schemas.ScheduleJob, status_code=202)
+def generate_schedule_range(
+    from_month: str = Query(..., alias="from"),
+    to_month: str = Query(..., alias="to"),
+    mode: str = "greedy",
+    budget_ms: int = 0,
+    seed: Optional[int] = None,
+    starts: int = scheduler.DEFAULT_STARTS,
+    feasibility: str = "warn",
+    db: Session = Depends(database.get_db)
+):
+    """
+    Queue generation of consecutive months (from=YYYY-MM, to=YYYY-MM) as one job.
+    Streaks are passed from each month to the next; the job result has per-month
+    timings and coverage. Poll GET /jobs/{id}.
+    With feasibility=strict an infeasible month fails the job and nothing is written.
+    """
+    try:
+        scheduler.validate_mode(mode, budget_ms, starts, feasibility)
+        months = scheduler.month_range(from_month, to_month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    missing = [m for m in months if not crud.get_monthly_schedule(db, m)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Monthly schedule not found: {', '.join(missing)}")
+    options = {
+        "to_month": to_month, "mode": mode, "budget_ms": budget_ms, "seed": seed, "starts": starts,
+        "feasibility": feasibility
+    }
+    return _submit_job(db, "generate-range", from_month, options)
+
+@router.get("/jobs/{job_id}", response_model=schemas.ScheduleJob)
+def get_job(job_id: int, db: Session = Depends(database.get_db)):
+    """Status, progress (days processed out of total) and result of a schedule job"""
+    job = db.get(models.ScheduleJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/months/{month}/schedule/feasibility", response_model=schemas.FeasibilityReport)
+def get_schedule_feasibility(month: str, db: Session = Depends(database.get_db)):
+    """Supply vs demand pre-check of a month, with its bottleneck days and shifts"""
+    try:
+        return scheduler.feasibility_report(db, month)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/months/{month}/schedule/parameter-search", response_model=schemas.ParameterSearchResult)
+def search_schedule_parameters(
+    month: str,
+    request: schemas.ParameterSearchRequest = Body(default_factory=schemas.ParameterSearchRequest),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Find the tightest total/pernoite/consecutive-work limits that still reach target_coverage.
+    The ranges are searched in parallel; the result lists the Pareto set of coverage vs
+    fairness. Nothing is written.
+    """
+    if not crud.get_monthly_schedule(db, month):
+        raise HTTPException(status_code=404, detail="Monthly schedule not found")
+    try:
+        return scheduler.search_parameters(
+            db, month,
+            total_shifts=request.params_total_shifts,
+            night_shifts=request.params_night_shifts,
+            max_consecutive_work_days=request.params_max_consecutive_work_days,
+            target_coverage=request.target_coverage
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/months/{month}/schedule/scenarios", response_model=schemas.ScenarioComparison)
+def compare_schedule_scenarios(
+    month: str,
+    request: schemas.ScenarioRequest,
+    mode: str = "greedy",
+    budget_ms: int = 0,
+    seed: Optional[int] = None,
+    starts: int = scheduler.DEFAULT_STARTS,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Solve the month with its stored parameters and with each list of overrides, concurrently,
+    and compare filled slots and per-trainee spreads. include_diffs adds the rows each
+    scenario adds/removes relative to the stored parameters. Nothing is written.
+    """
+    if not crud.get_monthly_schedule(db, month):
+        raise HTTPException(status_code=404, detail="Monthly schedule not found")
+    try:
+        scheduler.validate_mode(mode, budget_ms, starts)
+        return scheduler.scenario_comparison(
+            db, month, [overrides.as_solver_overrides() for overrides in request.scenarios],
+            mode, budget_ms, seed, starts, request.include_diffs
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/months/{month}/schedule/preview", response_model=schemas.SchedulePreview)
+def preview_schedule(
+    month: str,
+    overrides: Optional[schemas.ScheduleParameterOverrides] = None,
+    mode: str = "greedy",
+    budget_ms: int = 0,
+    seed: Optional[int] = None,
+    starts: int = scheduler.DEFAULT_STARTS,
+    db: Session = Depends(database.get_db)
+):
+    """Solve the month, optionally with parameter overrides, without writing anything"""
+    import time
+
+    try:
+        scheduler.validate_mode(mode, budget_ms, starts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start = time.perf_counter()
+    try:
+        plan = scheduler.preview_schedule(
+            db, month, overrides.as_solver_overrides() if overrides else None, mode, budget_ms, seed, starts
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    solve_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "month": plan.month,
+        "mode": plan.mode,
+        "seed": scheduler.plan_seed(plan, seed),
+        "params": plan.params.as_dict(),
+        "required_slots": plan.required_slots,
+        "filled_slots": plan.filled_slots,
+        "solve_ms": round(solve_ms, 2),
+        "stats": dict(plan.stats),
+        "assignments": [
+            {"trainee_id": trainee_id, "date": date_obj, "shift": shift}
+            for trainee_id, date_obj, shift in plan.assignments
+        ]
+    }
+
+@router.get("/months/{month}/schedule/score", response_model=schemas.ScheduleScore)
+def get_schedule_score(month: str, db: Session = Depends(database.get_db)):
+    """Score the stored schedule with the objective every solver mode reports"""
+    try:
+        return scheduler.score_schedule(db, month)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/months/{month}/schedule/repair")
+def repair_schedule(month: str, db: Session = Depends(database.get_db)):
+    """
+    Repair the existing schedule after availability/capacity changes: drop only the
+    assignments that became infeasible and refill only the open slots.
+    """
+    try:
+        result = scheduler.repair_schedule(db, month)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "message": f"Repaired schedule for {month}: {result['removed']} removed, {result['added']} added",
+        **result
+    }
 
 @router.delete("/months/{month}/schedule")
 def clear_schedule(month: str, db: Session = Depends(database.get_db)):
@@ -301,6 +456,7 @@ def create_or_update_assignment(
     """
     Create or update a single assignment for a trainee.
     If assignment exists for same trainee/date, update the shift.
+    Manual assignments are pinned by default, so generation keeps them.
     """
     # Check if trainee exists for this month
     trainee = db.query(models.Trainee).join(models.MonthlySchedule).filter(
@@ -311,6 +467,9 @@ def create_or_update_assignment(
     if not trainee:
         raise HTTPException(status_code=404, detail="Trainee not found")
 
+    if assignment.shift not in crud.get_shift_categories(db).index:
+        raise HTTPException(status_code=400, detail=f"Unknown shift '{assignment.shift}'")
+
     # Check if trainee is available on this date
     # Allow manual assignment even on unavailable dates
     # unavailable = db.query(models.TraineeAvailability).filter(
@@ -340,9 +499,13 @@ def create_or_update_assignment(
         models.TraineeAssignment.date == assignment.date
     ).first()
 
+    # A manual edit means the stored plan no longer comes from its generation inputs
+    schedule.generation_inputs_hash = None
+
     if existing:
         # Update shift
         existing.shift = assignment.shift
+        existing.pinned = assignment.pinned
         db.commit()
         db.refresh(existing)
         return existing
@@ -352,7 +515,8 @@ def create_or_update_assignment(
             monthly_schedule_id=schedule.id,
             trainee_id=trainee_id,
             date=assignment.date,
-            shift=assignment.shift
+            shift=assignment.shift,
+            pinned=assignment.pinned
         )
         db.add(new_assignment)
         db.commit()
@@ -389,10 +553,11 @@ def delete_assignment(
         raise HTTPException(status_code=404, detail="Assignment not found")
 
     db.delete(assignment)
+    schedule.generation_inputs_hash = None
     db.commit()
     return {"status": "deleted"}
 
 @router.get("/months/{month}/schedule", response_model=List[schemas.TraineeAssignment])
 def get_schedule(month: str, db: Session = Depends(database.get_db)):
     """Get generated schedule for a specific month"""
-    return crud.get_assignments(db, month)
+    return crud.get_assignments(db, month, eager=True)
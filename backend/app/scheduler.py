@@ -1,252 +1,498 @@
+from datetime import date, datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
-from . import crud, models, schemas
-from datetime import date, timedelta
+from . import crud
+from .scheduling.core import ScheduleParams, ScheduleSnapshot, SchedulePlan, MODES, solve
+from .scheduling.multistart import DEFAULT_STARTS, MAX_STARTS
+from .scheduling.repair import repair
+from .scheduling.boundary import BoundaryState, compute_boundary
+from .scheduling.feasibility import check_feasibility
+from .scheduling.param_search import search_parameters as run_parameter_search
+from .scheduling.scenarios import compare_scenarios
+from .scheduling.scoring import score_plan
 import calendar
-import math
-from collections import defaultdict
+import hashlib
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
-def generate_schedule(db: Session, month_str: str):
-    year, month = map(int, month_str.split('-'))
-    _, last_day = calendar.monthrange(year, month)
+logger = logging.getLogger(__name__)
 
+# Upper bound for the local-search time budget of a single request
+MAX_BUDGET_MS = 60000
+
+# Upper bound for the number of months generated by one range request
+MAX_RANGE_MONTHS = 12
+
+# What generation does with the feasibility pre-check: skip it, log and report, or refuse to run
+FEASIBILITY_MODES = ("off", "warn", "strict")
+
+class InfeasibleScheduleError(ValueError):
+    """Raised by strict generation when the pre-check proves the month cannot be filled"""
+
+    def __init__(self, month_str: str, report: dict):
+        self.report = report
+        super().__init__(
+            f"Schedule for {month_str} is infeasible: {report['month_totals']['shortfall']} slots short over the month, "
+            f"{report['bottleneck_count']} bottleneck days/shifts"
+        )
+
+def validate_mode(mode: str, budget_ms: float = 0, starts: int = DEFAULT_STARTS, feasibility: str = "warn"):
+    if mode not in MODES:
+        raise ValueError(f"Unknown solver mode '{mode}'. Use one of: {', '.join(MODES)}")
+    if feasibility not in FEASIBILITY_MODES:
+        raise ValueError(f"Unknown feasibility option '{feasibility}'. Use one of: {', '.join(FEASIBILITY_MODES)}")
+    if not 0 <= budget_ms <= MAX_BUDGET_MS:
+        raise ValueError(f"budget_ms must be between 0 and {MAX_BUDGET_MS}")
+    if not 1 <= starts <= MAX_STARTS:
+        raise ValueError(f"starts must be between 1 and {MAX_STARTS}")
+
+def validate_window(month_str: str, start_date=None, end_date=None):
+    """
+    (first, last) dates of a partial regeneration, or None for the whole month.
+    Accepts dates or ISO strings; a missing bound defaults to the month's first/last day.
+    """
+    if start_date is None and end_date is None:
+        return None
+    year, month_num = map(int, month_str.split('-'))
+    first_day = date(year, month_num, 1)
+    last_day = date(year, month_num, calendar.monthrange(year, month_num)[1])
+    start = date.fromisoformat(start_date) if isinstance(start_date, str) else (start_date or first_day)
+    end = date.fromisoformat(end_date) if isinstance(end_date, str) else (end_date or last_day)
+    if not first_day <= start <= end <= last_day:
+        raise ValueError(f"Date range must satisfy {first_day} <= start_date <= end_date <= {last_day}")
+    return start, end
+
+def previous_month(month_str: str) -> str:
+    year, month_num = map(int, month_str.split('-'))
+    if month_num == 1:
+        return f"{year - 1:04d}-12"
+    return f"{year:04d}-{month_num - 1:02d}"
+
+def next_month(month_str: str) -> str:
+    year, month_num = map(int, month_str.split('-'))
+    if month_num == 12:
+        return f"{year + 1:04d}-01"
+    return f"{year:04d}-{month_num + 1:02d}"
+
+def load_snapshot(db: Session, month_str: str, window: tuple = None) -> ScheduleSnapshot:
+    """
+    Load everything the solver needs for a month into an immutable snapshot.
+    Pinned assignments, and with a window every assignment outside it, are fixed.
+    Streaks at the end of the previous month are carried in, matching trainees by name.
+    """
     # 1. Get Monthly Schedule Parameters
     schedule_context = crud.get_monthly_schedule(db, month_str)
     if not schedule_context:
         raise ValueError(f"Monthly schedule for {month_str} not found")
 
-    params = {
-        'total_shifts': schedule_context.params_total_shifts,
-        'night_shifts': schedule_context.params_night_shifts,
-        'max_consecutive_days_off': schedule_context.params_max_consecutive_days_off,
-        'max_consecutive_work_days': schedule_context.params_max_consecutive_work_days,
-        'unavailability_weight': schedule_context.params_unavailability_weight,
-        'post_night_shift_off': schedule_context.params_post_night_shift_off
-    }
-
-    # 2. Clear existing assignments
-    crud.delete_assignments_for_month(db, month_str)
-
-    # 3. Get all capacities for the month
-    capacities = crud.get_capacities(db, month_str)
+    # 2. Get all capacities for the month
     capacity_map = {}
-    for cap in capacities:
+    for cap in crud.get_capacities(db, month_str):
         capacity_map[(cap.date, cap.shift)] = cap.total_instructors
 
-    # 4. Get all active trainees
+    # 3. Get all active trainees
     trainees = crud.get_trainees_for_month(db, month_str)
-    active_trainees = [t for t in trainees if t.active]
-    
-    # 5. Get all unavailabilities
-    all_availabilities = db.query(models.TraineeAvailability).filter(
-        extract('year', models.TraineeAvailability.date) == year,
-        extract('month', models.TraineeAvailability.date) == month
-    ).all()
-
-    unavailability_lookup = set()
-    trainee_unavailability_counts = defaultdict(int)
-    
-    # Group unavailabilities by trainee and date to identify full-day leaves
-    trainee_date_unavailability = defaultdict(lambda: defaultdict(set))
-
-    for av in all_availabilities:
-        if not av.available:
-            unavailability_lookup.add((av.trainee_id, av.date, av.shift))
-            trainee_unavailability_counts[av.trainee_id] += params['unavailability_weight']
-            trainee_date_unavailability[av.trainee_id][av.date].add(av.shift)
-
-    # 6. Initialize Trackers
-    # Count unavailability days and convert to work credits
-    # Logic: every 2 days with any unavailability counts as 1 worked day
-    trainee_unavailability_days = defaultdict(int)
-    for trainee_id, dates in trainee_date_unavailability.items():
-        # Count unique days with at least one unavailability
-        trainee_unavailability_days[trainee_id] = len(dates)
-
-    # Calculate work credits from unavailabilities: 2 unavailable days = 1 work day
-    trainee_unavailability_credits = {
-        t.id: trainee_unavailability_days[t.id] // 2
-        for t in active_trainees
+    active_trainee_ids = [t.id for t in trainees if t.active]
+
+    # 4. Get all unavailabilities as a bitmask index over the shift categories
+    categories = crud.get_shift_categories(db)
+    availability = crud.get_availability_index(db, month_str, categories)
+
+    # 5. Carry in the previous month's boundary state
+    previous_states = crud.get_boundary_states(db, previous_month(month_str))
+    carry_in = {}
+    for t in trainees:
+        state = previous_states.get(t.name)
+        if t.active and state:
+            carry_in[t.id] = BoundaryState(
+                state.consecutive_work_days, state.consecutive_days_off, state.worked_night_last_day
+            )
+
+    # 6. Keep pinned assignments, and everything outside the window
+    fixed = [
+        (a.trainee_id, a.date, a.shift)
+        for a in crud.get_assignments(db, month_str)
+        if a.pinned or (window is not None and not window[0] <= a.date <= window[1])
+    ]
+
+    return ScheduleSnapshot.build(
+        month=month_str,
+        days=availability.days,
+        trainee_ids=active_trainee_ids,
+        availability=availability,
+        capacities=capacity_map,
+        params=ScheduleParams.from_schedule(schedule_context),
+        fixed=fixed,
+        window=window,
+        carry_in=carry_in,
+        categories=categories
+    )
+
+def preview_schedule(db: Session, month_str: str, param_overrides: dict = None, mode: str = "greedy",
+                     budget_ms: float = 0, seed: int = None, starts: int = DEFAULT_STARTS) -> SchedulePlan:
+    """Solve the month (optionally with overridden parameters) without writing anything"""
+    snapshot = load_snapshot(db, month_str)
+    if param_overrides:
+        snapshot = snapshot.with_params(snapshot.params.with_overrides(**param_overrides))
+    return solve(snapshot, mode, budget_ms, seed, starts)
+
+def search_parameters(db: Session, month_str: str, total_shifts: tuple = None, night_shifts: tuple = None,
+                      max_consecutive_work_days: tuple = None, target_coverage: float = 1.0,
+                      workers: int = None) -> dict:
+    """
+    Search (lo, hi) ranges of the three limits for the tightest configuration that reaches
+    target_coverage; a missing range keeps the stored value. No trial schedule is written.
+    """
+    if not 0 < target_coverage <= 1:
+        raise ValueError("target_coverage must be in (0, 1]")
+    snapshot = load_snapshot(db, month_str)
+    params = snapshot.params
+    ranges = {}
+    for name, value in (("total_shifts", total_shifts), ("night_shifts", night_shifts),
+                        ("max_consecutive_work_days", max_consecutive_work_days)):
+        current = getattr(params, name)
+        lo, hi = value if value is not None else (current, current)
+        if lo < 0 or lo > hi:
+            raise ValueError(f"Invalid {name} range: {lo}..{hi}")
+        ranges[name] = (lo, hi)
+
+    start = time.perf_counter()
+    result = run_parameter_search(
+        snapshot, ranges["total_shifts"], ranges["night_shifts"], ranges["max_consecutive_work_days"],
+        target_coverage, workers
+    )
+    return {
+        "month": month_str,
+        "required_slots": snapshot.required_slots,
+        "current": {name: getattr(params, name) for name in ranges},
+        "search_ms": round((time.perf_counter() - start) * 1000, 2),
+        **result
     }
 
-    # We separate "Weighted Count" (for fairness logic if needed) from "Actual Work Count" (for hard limits)
-    trainee_weighted_counts = {t.id: trainee_unavailability_counts[t.id] for t in active_trainees}
-    # Start actual work counts with credits from unavailabilities (every 2 days unavailable = 1 work day)
-    trainee_actual_work_counts = {
-        t.id: trainee_unavailability_credits[t.id]
-        for t in active_trainees
+def scenario_comparison(db: Session, month_str: str, scenarios: list[dict], mode: str = "greedy",
+                        budget_ms: float = 0, seed: int = None, starts: int = DEFAULT_STARTS,
+                        include_diffs: bool = False) -> dict:
+    """Load the month once and compare the baseline with each parameter scenario, writing nothing"""
+    snapshot = load_snapshot(db, month_str)
+    start = time.perf_counter()
+    seed, summaries = compare_scenarios(snapshot, scenarios, mode, budget_ms, seed, starts, include_diffs)
+    return {
+        "month": month_str,
+        "mode": mode,
+        "seed": seed,
+        "required_slots": snapshot.required_slots,
+        "solve_ms": round((time.perf_counter() - start) * 1000, 2),
+        "scenarios": summaries,
+    }
+
+def save_boundary(db: Session, month_str: str, schedule_id: int, snapshot: ScheduleSnapshot, assignments):
+    """Store the streaks at the end of the month for the next month's generation (no commit)"""
+    names = {t.id: t.name for t in crud.get_trainees_for_month(db, month_str)}
+    states = compute_boundary(snapshot, assignments)
+    crud.replace_boundary_states(db, schedule_id, {names[tid]: state for tid, state in states.items()})
+
+def feasibility_report(db: Session, month_str: str, window: tuple = None) -> dict:
+    """Supply/demand pre-check of a month, or of the window of it being re-solved (see scheduling.feasibility)"""
+    return {"month": month_str, **check_feasibility(load_snapshot(db, month_str, window))}
+
+def run_feasibility_check(snapshot: ScheduleSnapshot, feasibility: str):
+    """Pre-check a snapshot for generation; returns the report (None when off), raises when strict"""
+    if feasibility == "off":
+        return None
+    report = check_feasibility(snapshot)
+    if not report["feasible"]:
+        if feasibility == "strict":
+            raise InfeasibleScheduleError(snapshot.month, report)
+        logger.warning(
+            f"Generating {snapshot.month} although it is infeasible: {report['month_totals']}, "
+            f"{report['bottleneck_count']} bottlenecks"
+        )
+    return report
+
+def plan_seed(plan: SchedulePlan, seed: int = None):
+    """The seed that reproduces a plan with its mode (multistart reports the winning variant)"""
+    if plan.mode == "multistart":
+        return plan.stats["multistart"]["winning_seed"]
+    return seed
+
+def is_deterministic(mode: str, budget_ms: float, seed: int) -> bool:
+    """
+    Whether the options fully determine the plan: a time-bounded local search
+    and an unseeded multistart can come out different on every run
+    """
+    return budget_ms <= 0 and not (mode == "multistart" and seed is None)
+
+def inputs_hash(snapshot: ScheduleSnapshot, mode: str, budget_ms: float, seed: int, starts: int) -> str:
+    """
+    Hash of the snapshot plus the solver options; identical hashes would regenerate
+    the same plan. None for non-deterministic options, which are never cached.
+    """
+    if not is_deterministic(mode, budget_ms, seed):
+        return None
+    options = f"{mode}|{budget_ms}|{seed}|{starts}"
+    return hashlib.sha256(f"{snapshot.fingerprint()}|{options}".encode()).hexdigest()
+
+def generate_schedule(db: Session, month_str: str, mode: str = "greedy", budget_ms: float = 0, seed: int = None,
+                      starts: int = DEFAULT_STARTS, progress=None, force: bool = False, start_date=None,
+                      end_date=None, feasibility: str = "warn"):
+    """
+    Generate the schedule for a month.
+
+    The whole plan is built in memory and then written in a single transaction
+    (clear + one bulk insert). Returns the number of assignments and the
+    per-phase timings in milliseconds. progress(days_done, total_days) is
+    forwarded to the solver.
+
+    Pinned assignments are always kept. With start_date/end_date only the
+    unpinned assignments in that range are re-solved; the counters and streaks
+    start from the kept assignments.
+
+    If the inputs (parameters, active trainees, unavailabilities, capacities,
+    kept assignments and solver options) hash to the same value as the stored
+    schedule, the existing assignments are kept and returned with cached=True,
+    unless force is set. Runs that are not reproducible (budget_ms > 0, or
+    multistart without a seed) always re-solve.
+
+    Before solving, a feasibility pre-check compares supply with demand:
+    feasibility="warn" logs and reports a shortfall, "strict" raises
+    InfeasibleScheduleError instead of generating, "off" skips the check.
+    """
+    timings = {}
+    phase_start = time.perf_counter()
+
+    window = validate_window(month_str, start_date, end_date)
+    snapshot = load_snapshot(db, month_str, window)
+    schedule_context = crud.get_monthly_schedule(db, month_str)
+    current_hash = inputs_hash(snapshot, mode, budget_ms, seed, starts)
+
+    timings['load_ms'] = (time.perf_counter() - phase_start) * 1000
+
+    # Nothing changed since the last generation: keep the stored schedule
+    if not force and current_hash is not None and schedule_context.generation_inputs_hash == current_hash:
+        timings = {phase: round(ms, 2) for phase, ms in timings.items()}
+        assignment_count = crud.count_assignments(db, month_str)
+        logger.info(f"Inputs unchanged for {month_str}, keeping {assignment_count} assignments")
+        if progress:
+            progress(len(snapshot.days), len(snapshot.days))
+        return {
+            "assignments": assignment_count,
+            "required_slots": snapshot.required_slots,
+            "mode": mode,
+            "seed": schedule_context.generation_seed,
+            "fixed": len(snapshot.fixed),
+            "cached": True,
+            "timings": timings,
+            "stats": {}
+        }
+
+    phase_start = time.perf_counter()
+
+    report = run_feasibility_check(snapshot, feasibility)
+
+    timings['check_ms'] = (time.perf_counter() - phase_start) * 1000
+    phase_start = time.perf_counter()
+
+    plan = solve(snapshot, mode, budget_ms, seed, starts, progress)
+
+    timings['solve_ms'] = (time.perf_counter() - phase_start) * 1000
+    phase_start = time.perf_counter()
+
+    # Persist: clear the month and insert the new plan in one transaction
+    try:
+        fixed = set(snapshot.fixed)
+        crud.delete_assignments_for_month(db, month_str, commit=False, window=window, keep_pinned=True)
+        crud.bulk_create_assignments(db, schedule_context.id, [a for a in plan.assignments if a not in fixed])
+        save_boundary(db, month_str, schedule_context.id, snapshot, plan.assignments)
+        # Record how to reproduce this plan: the multistart winner is a plain seeded greedy
+        winning_seed = plan_seed(plan, seed)
+        schedule_context.generation_mode = "greedy" if plan.mode == "multistart" else plan.mode
+        schedule_context.generation_seed = winning_seed
+        schedule_context.generation_inputs_hash = current_hash
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    timings['persist_ms'] = (time.perf_counter() - phase_start) * 1000
+    timings = {phase: round(ms, 2) for phase, ms in timings.items()}
+    logger.info(f"Generated {plan.filled_slots} assignments for {month_str} ({mode}) - timings: {timings}")
+
+    return {
+        "assignments": plan.filled_slots,
+        "required_slots": plan.required_slots,
+        "mode": mode,
+        "seed": winning_seed,
+        "fixed": len(snapshot.fixed),
+        "cached": False,
+        "feasibility": report,
+        "timings": timings,
+        "stats": dict(plan.stats)
+    }
+
+def score_schedule(db: Session, month_str: str) -> dict:
+    """Objective of the stored schedule (manual edits included), on the same scale the solvers report"""
+    snapshot = load_snapshot(db, month_str)
+    # Pinned rows are already in the snapshot as fixed
+    movable = [(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, month_str) if not a.pinned]
+    return {"month": month_str, "required_slots": snapshot.required_slots, **score_plan(snapshot, movable)}
+
+def repair_schedule(db: Session, month_str: str):
+    """
+    Incrementally repair the stored schedule after an input change.
+
+    Only the assignments that became infeasible are deleted and only the
+    open slots are refilled; every other row is left untouched. Returns the
+    number of removed/added rows, the slots still open and the timings.
+    """
+    timings = {}
+    phase_start = time.perf_counter()
+
+    snapshot = load_snapshot(db, month_str)
+    schedule_context = crud.get_monthly_schedule(db, month_str)
+    # Pinned rows are fixed in the snapshot; only the others may move
+    rows = crud.get_assignments(db, month_str)
+    row_ids = {(a.trainee_id, a.date, a.shift): a.id for a in rows if not a.pinned}
+
+    timings['load_ms'] = (time.perf_counter() - phase_start) * 1000
+    phase_start = time.perf_counter()
+
+    removed, added, stats = repair(snapshot, list(row_ids))
+
+    timings['solve_ms'] = (time.perf_counter() - phase_start) * 1000
+    phase_start = time.perf_counter()
+
+    try:
+        crud.delete_assignments_by_id(db, [row_ids[a] for a in removed])
+        crud.bulk_create_assignments(db, schedule_context.id, added)
+        if removed or added:
+            repaired = ((set(snapshot.fixed) | set(row_ids)) - set(removed)) | set(added)
+            save_boundary(db, month_str, schedule_context.id, snapshot, repaired)
+            # The month is no longer the plain output of a generation
+            schedule_context.generation_inputs_hash = None
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    timings['persist_ms'] = (time.perf_counter() - phase_start) * 1000
+    timings = {phase: round(ms, 2) for phase, ms in timings.items()}
+    logger.info(f"Repaired {month_str}: {stats} - timings: {timings}")
+
+    return {**stats, "timings": timings}
+
+def month_range(from_month: str, to_month: str) -> list[str]:
+    """Consecutive months from..to (inclusive); raises ValueError on bad input"""
+    try:
+        datetime.strptime(from_month, "%Y-%m")
+        datetime.strptime(to_month, "%Y-%m")
+    except ValueError:
+        raise ValueError("Invalid month format. Use YYYY-MM")
+    if from_month > to_month:
+        raise ValueError("from must not be after to")
+    months = [from_month]
+    while months[-1] != to_month:
+        if len(months) == MAX_RANGE_MONTHS:
+            raise ValueError(f"At most {MAX_RANGE_MONTHS} months can be generated at once")
+        months.append(next_month(months[-1]))
+    return months
+
+def _load_month(session_factory, month_str: str):
+    """Load a month's snapshot and trainee names in a session of its own (runs on the prefetch thread)"""
+    start = time.perf_counter()
+    db = session_factory()
+    try:
+        snapshot = load_snapshot(db, month_str)
+        names = {t.id: t.name for t in crud.get_trainees_for_month(db, month_str)}
+    finally:
+        db.close()
+    return snapshot, names, (time.perf_counter() - start) * 1000
+
+def generate_months(db: Session, session_factory, from_month: str, to_month: str, mode: str = "greedy",
+                    budget_ms: float = 0, seed: int = None, starts: int = DEFAULT_STARTS, progress=None,
+                    feasibility: str = "warn"):
+    """
+    Generate consecutive months in order as one batch.
+
+    The next month's inputs are loaded on a background thread (with its own
+    session from session_factory) while the current month is being solved.
+    Each month starts from the boundary streaks of the month just solved,
+    passed on in memory. All months are written in a single transaction at
+    the end, so a strict feasibility failure in any month writes nothing.
+    Returns per-month timing, coverage and feasibility stats.
+    """
+    months = month_range(from_month, to_month)
+    for month_str in months:
+        if not crud.get_monthly_schedule(db, month_str):
+            raise ValueError(f"Monthly schedule for {month_str} not found")
+
+    results = []
+    plans = []
+    previous_boundary = None  # {trainee_name: BoundaryState} of the month just solved
+    days_done = 0
+
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        pending = prefetch.submit(_load_month, session_factory, months[0])
+        for i, month_str in enumerate(months):
+            snapshot, names, load_ms = pending.result()
+            if i + 1 < len(months):
+                pending = prefetch.submit(_load_month, session_factory, months[i + 1])
+
+            # 1. Streaks from the month solved just before, not from the database
+            if previous_boundary is not None:
+                snapshot = snapshot.with_carry_in({
+                    tid: previous_boundary[name] for tid, name in names.items()
+                    if name in previous_boundary and tid in snapshot.trainee_ids
+                })
+
+            # 2. Solve
+            def month_progress(done, total, offset=days_done):
+                if progress:
+                    progress(offset + done, offset + total)
+
+            report = run_feasibility_check(snapshot, feasibility)
+            phase_start = time.perf_counter()
+            plan = solve(snapshot, mode, budget_ms, seed, starts, month_progress)
+            solve_ms = (time.perf_counter() - phase_start) * 1000
+            days_done += len(snapshot.days)
+
+            boundary = compute_boundary(snapshot, plan.assignments)
+            previous_boundary = {names[tid]: state for tid, state in boundary.items()}
+            plans.append((month_str, snapshot, plan, previous_boundary))
+            results.append({
+                "month": month_str,
+                "assignments": plan.filled_slots,
+                "required_slots": plan.required_slots,
+                "coverage": round(100 * plan.filled_slots / plan.required_slots, 2) if plan.required_slots else 100.0,
+                "seed": plan_seed(plan, seed),
+                "feasible": report["feasible"] if report else None,
+                "timings": {"load_ms": round(load_ms, 2), "solve_ms": round(solve_ms, 2)}
+            })
+
+    # 3. Persist every month in one transaction
+    phase_start = time.perf_counter()
+    try:
+        for month_str, snapshot, plan, boundary_by_name in plans:
+            schedule_context = crud.get_monthly_schedule(db, month_str)
+            fixed = set(snapshot.fixed)
+            crud.delete_assignments_for_month(db, month_str, commit=False, keep_pinned=True)
+            crud.bulk_create_assignments(db, schedule_context.id, [a for a in plan.assignments if a not in fixed])
+            crud.replace_boundary_states(db, schedule_context.id, boundary_by_name)
+            schedule_context.generation_mode = "greedy" if plan.mode == "multistart" else plan.mode
+            schedule_context.generation_seed = plan_seed(plan, seed)
+            schedule_context.generation_inputs_hash = inputs_hash(snapshot, mode, budget_ms, seed, starts)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    persist_ms = (time.perf_counter() - phase_start) * 1000
+
+    logger.info(f"Generated {len(months)} months {from_month}..{to_month} ({mode}) - persist {persist_ms:.2f} ms")
+    return {
+        "months": results,
+        "mode": mode,
+        "timings": {
+            "load_ms": round(sum(r["timings"]["load_ms"] for r in results), 2),
+            "solve_ms": round(sum(r["timings"]["solve_ms"] for r in results), 2),
+            "persist_ms": round(persist_ms, 2)
+        }
     }
-    
-    trainee_night_shift_counts = {t.id: 0 for t in active_trainees}
-    
-    # Consecutive work days tracker: trainee_id -> current streak
-    consecutive_work_days = {t.id: 0 for t in active_trainees}
-    
-    # Consecutive days off tracker: trainee_id -> current streak
-    consecutive_days_off = {t.id: 0 for t in active_trainees}
-    
-    # Last worked date: trainee_id -> date
-    last_worked_date = {t.id: None for t in active_trainees}
-
-    # Assignments: list of (trainee_id, date, shift)
-    assignments = []
-    
-    # Daily assignments: date -> set(trainee_id)
-    daily_assignments = defaultdict(set)
-
-    # 7. Iterate through days and shifts
-    # Order: Pernoite first (harder to fill), then Manhã, then Tarde? 
-    # Or strict chronological? 
-    # Let's stick to chronological day by day, but prioritize Pernoite within the day if needed.
-    # Actually, filling Pernoite first for the whole month might be better for the "2 night shifts" rule.
-    # But let's try day-by-day for now to handle consecutive rules easier.
-    
-    shifts_order = [models.Shift.pernoite, models.Shift.manha, models.Shift.tarde]
-    
-    for day in range(1, last_day + 1):
-        current_date = date(year, month, day)
-        
-        # Update consecutive counters at start of day (pre-assignment)
-        # Actually, we update them at the end of the day based on if they worked.
-        
-        for shift in shifts_order:
-            # Capacity is half of total instructors (rounded up)
-            required_capacity = math.ceil(capacity_map.get((current_date, shift), 0) / 2)
-            if required_capacity <= 0:
-                continue;
-            
-            # Filter candidates
-            candidates = []
-            for trainee in active_trainees:
-                tid = trainee.id
-                
-                # --- HARD CONSTRAINTS ---
-
-                # 1. Must be available
-                if (tid, current_date, shift) in unavailability_lookup:
-                    continue
-
-                # 2. Must not have worked today already
-                if tid in daily_assignments[current_date]:
-                    continue
-
-                # 3. Post-Night Shift Rule (No work day after Pernoite)
-                if params['post_night_shift_off']:
-                    yesterday = current_date - timedelta(days=1)
-                    # Check if worked Pernoite yesterday
-                    # We need to check assignments list or a tracker
-                    # Optimization: check assignments for yesterday + Pernoite
-                    # Since we fill day by day, yesterday is already processed.
-                    worked_yesterday_night = False
-                    for a_tid, a_date, a_shift in assignments:
-                        if a_tid == tid and a_date == yesterday and a_shift == models.Shift.pernoite:
-                            worked_yesterday_night = True
-                            break
-                    if worked_yesterday_night:
-                        continue
-
-                # 4. Max Consecutive Work Days
-                if consecutive_work_days[tid] >= params['max_consecutive_work_days']:
-                    continue
-
-                # --- SOFT CONSTRAINTS / BALANCING (handled by sort) ---
-                
-                # Check Night Shift Limit (Hard Constraint)
-                if shift == models.Shift.pernoite and trainee_night_shift_counts[tid] >= params['night_shifts']:
-                     continue
-
-                # Check Total Shift Limit (Hard Constraint)
-                # Fix: Use ACTUAL work counts, not weighted counts. 
-                # Unavailability shouldn't prevent you from working your target shifts.
-                if trainee_actual_work_counts[tid] >= params['total_shifts']:
-                    continue
-
-                candidates.append(trainee)
-            
-            # Sort candidates
-            # 1. Night Shift Priority (if current is night shift): 
-            #    Those with fewer night shifts go first.
-            # 2. Consecutive Days Off Priority:
-            #    Those approaching max consecutive days off should be prioritized to avoid breaking rule.
-            # 3. Total Shifts: Least shifts worked go first.
-            
-            def sort_key(t):
-                tid = t.id
-                
-                # Night shift balancing
-                night_score = 0
-                if shift == models.Shift.pernoite:
-                    night_score = trainee_night_shift_counts[tid]
-                
-                # Total shift balancing
-                # Fix: Use ACTUAL work counts for sorting to ensure everyone works evenly.
-                # If we use weighted counts, people with unavailability (classes) will be deprioritized and never work.
-                total_score = trainee_actual_work_counts[tid]
-                
-                # Urgency to work (avoid max consecutive days off)
-                # Higher consecutive_days_off -> Lower score (to be first)
-                urgency_score = -consecutive_days_off[tid] 
-                
-                return (
-                    night_score,      # Prioritize filling night shifts for those who have few
-                    urgency_score,    # Prioritize those who have been off for too long
-                    total_score,      # Prioritize those with fewest total shifts
-                    t.id              # Deterministic tie-breaker
-                )
-
-            candidates.sort(key=sort_key)
-            
-            # Select top N
-            selected = candidates[:required_capacity]
-            
-            for trainee in selected:
-                # Create assignment
-                crud.create_assignment(db, month_str, schemas.TraineeAssignmentCreate(
-                    trainee_id=trainee.id,
-                    date=current_date,
-                    shift=shift
-                ))
-
-                # Update trackers
-                trainee_actual_work_counts[trainee.id] += 1
-                if shift == models.Shift.pernoite:
-                    trainee_night_shift_counts[trainee.id] += 1
-                
-                daily_assignments[current_date].add(trainee.id)
-                assignments.append((trainee.id, current_date, shift))
-
-        # End of Day Processing: Update Consecutive Counters
-        for trainee in active_trainees:
-            tid = trainee.id
-            worked_today = tid in daily_assignments[current_date]
-            
-            # Check for "Post-P counts as work" rule
-            # "o dia seguinte ao P conta como se fosse um dia trabalhado"
-            is_post_night_rest = False
-            if params['post_night_shift_off']:
-                yesterday = current_date - timedelta(days=1)
-                for a_tid, a_date, a_shift in assignments:
-                    if a_tid == tid and a_date == yesterday and a_shift == models.Shift.pernoite:
-                        is_post_night_rest = True
-                        break
-            
-            # "os afastamentos contam como dia trabalhado na sequencia"
-            # Fix: Only count as "work" if unavailable for ALL shifts (Afastamento/Leave).
-            # Partial unavailability (e.g. just Morning) should NOT prevent a reset if they didn't work.
-            
-            is_fully_unavailable = True
-            for s in [models.Shift.manha, models.Shift.tarde, models.Shift.pernoite]:
-                if (tid, current_date, s) not in unavailability_lookup:
-                    is_fully_unavailable = False
-                    break
-
-            if worked_today or is_post_night_rest or is_fully_unavailable:
-                consecutive_work_days[tid] += 1
-                consecutive_days_off[tid] = 0
-                if worked_today:
-                    last_worked_date[tid] = current_date
-            else:
-                consecutive_days_off[tid] += 1
-                consecutive_work_days[tid] = 0
-
-    return len(assignments)
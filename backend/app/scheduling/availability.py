@@ -0,0 +1,123 @@
+"""
+Compact availability index: one integer bitmask per trainee per month.
+
+Bit ``day_index * len(shifts) + shift_index`` is set when the trainee is
+unavailable for that day and shift category. Eligibility is a single AND,
+full-day leave for every day of the month is a couple of shifts and ANDs,
+and memory is a few dozen bytes per trainee no matter how many rows were
+imported.
+"""
+from datetime import date
+from types import MappingProxyType
+
+import numpy as np
+
+from .categories import DEFAULT_CATEGORIES
+
+# Bit order of the built-in shift categories inside a day
+SHIFTS = DEFAULT_CATEGORIES.keys
+SHIFT_INDEX = DEFAULT_CATEGORIES.index
+
+
+class AvailabilityIndex:
+
+    def __init__(self, days, masks: dict = None, shifts: tuple = SHIFTS):
+        self.days = tuple(days)
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.shifts = tuple(shifts)
+        self.shift_index = {shift: i for i, shift in enumerate(self.shifts)}
+        self.stride = len(self.shifts)
+        self.width = len(self.days) * self.stride
+        self.masks = MappingProxyType({tid: m for tid, m in (masks or {}).items() if m})
+        # One bit per day at the position of the day's first shift
+        self._day_stride = sum(1 << (d * self.stride) for d in range(len(self.days)))
+
+    def __reduce__(self):
+        # MappingProxyType is not picklable; rebuild from a plain dict (process pools)
+        return (AvailabilityIndex, (self.days, dict(self.masks), self.shifts))
+
+    @classmethod
+    def from_rows(cls, days, rows, shifts: tuple = SHIFTS) -> "AvailabilityIndex":
+        """
+        Build from (trainee_id, date, shift) unavailability rows; rows outside `days`
+        or for a shift category not in `shifts` are ignored
+        """
+        days = tuple(days)
+        day_index = {d: i for i, d in enumerate(days)}
+        shift_index = {shift: i for i, shift in enumerate(shifts)}
+        stride = len(shift_index)
+        masks = {}
+        for trainee_id, date_obj, shift in rows:
+            d, s = day_index.get(date_obj), shift_index.get(shift)
+            if d is not None and s is not None:
+                masks[trainee_id] = masks.get(trainee_id, 0) | (1 << (d * stride + s))
+        return cls(days, masks, shifts)
+
+    def bit(self, date_obj: date, shift):
+        d = self.day_index.get(date_obj)
+        if d is None:
+            return None
+        return d * self.stride + self.shift_index[shift]
+
+    def mask(self, trainee_id: int) -> int:
+        return self.masks.get(trainee_id, 0)
+
+    def is_unavailable(self, trainee_id: int, date_obj: date, shift) -> bool:
+        bit = self.bit(date_obj, shift)
+        return bit is not None and bool(self.mask(trainee_id) >> bit & 1)
+
+    def full_leave_mask(self, trainee_id: int) -> int:
+        """Day-stride mask of the days on which every shift is unavailable (afastamento)"""
+        mask = self.mask(trainee_id)
+        full = mask
+        for s in range(1, self.stride):
+            full &= mask >> s
+        return full & self._day_stride
+
+    def any_unavailable_mask(self, trainee_id: int) -> int:
+        """Day-stride mask of the days with at least one unavailable shift"""
+        mask = self.mask(trainee_id)
+        partial = mask
+        for s in range(1, self.stride):
+            partial |= mask >> s
+        return partial & self._day_stride
+
+    def is_full_leave(self, trainee_id: int, date_obj: date) -> bool:
+        d = self.day_index.get(date_obj)
+        return d is not None and bool(self.full_leave_mask(trainee_id) >> (d * self.stride) & 1)
+
+    def full_leave_dates(self, trainee_id: int) -> list[date]:
+        full = self.full_leave_mask(trainee_id)
+        return [d for i, d in enumerate(self.days) if full >> (i * self.stride) & 1]
+
+    def unavailable_day_count(self, trainee_id: int) -> int:
+        return self.any_unavailable_mask(trainee_id).bit_count()
+
+    def rows(self):
+        """Iterate the (trainee_id, date, shift) rows encoded in the index"""
+        for trainee_id, mask in self.masks.items():
+            while mask:
+                low = mask & -mask
+                bit = low.bit_length() - 1
+                yield trainee_id, self.days[bit // self.stride], self.shifts[bit % self.stride]
+                mask ^= low
+
+    def _unpack(self, masks: list[int]) -> np.ndarray:
+        """Expand one int per trainee into a (trainees, width) bool matrix"""
+        byte_count = (self.width + 7) // 8 or 1
+        raw = b"".join(m.to_bytes(byte_count, "little") for m in masks)
+        bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder="little")
+        return bits.reshape(len(masks), byte_count * 8)[:, :self.width].astype(bool)
+
+    def to_array(self, trainee_ids) -> np.ndarray:
+        """(trainees, days, shifts) bool matrix of unavailability, in `trainee_ids` order"""
+        matrix = self._unpack([self.mask(tid) for tid in trainee_ids])
+        return matrix.reshape(len(trainee_ids), len(self.days), self.stride)
+
+    def full_leave_array(self, trainee_ids) -> np.ndarray:
+        """(trainees, days) bool matrix of full-day leave, in `trainee_ids` order"""
+        matrix = self._unpack([self.full_leave_mask(tid) for tid in trainee_ids])
+        return matrix[:, ::self.stride]
+
+    def unavailable_day_counts(self, trainee_ids) -> np.ndarray:
+        return np.array([self.unavailable_day_count(tid) for tid in trainee_ids], dtype=np.int64)
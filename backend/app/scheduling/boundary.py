@@ -0,0 +1,71 @@
+"""
+Month boundary state.
+
+The streak rules look back across the month boundary: a trainee who worked
+the last days of a month (or its last pernoite) is not fresh on day 1 of
+the next one. `compute_boundary` condenses a finished plan into the
+trailing streaks per trainee, which the next month's snapshot carries in
+as `carry_in` instead of re-reading the previous month's assignments.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class BoundaryState(NamedTuple):
+    consecutive_work_days: int = 0
+    consecutive_days_off: int = 0
+    worked_night_last_day: bool = False
+
+
+def _trailing_run(values: np.ndarray) -> np.ndarray:
+    """(trainees,) length of the run of True at the end of each row"""
+    # Distance from the end of each row to its last False (the whole row if there is none)
+    reversed_false = ~values[:, ::-1]
+    has_false = reversed_false.any(axis=1)
+    first_false = np.argmax(reversed_false, axis=1)
+    return np.where(has_false, first_false, values.shape[1])
+
+
+def compute_boundary(snapshot, assignments) -> dict:
+    """
+    {trainee_id: BoundaryState} at the end of the snapshot's month for a full plan,
+    following the engine's streak rules (leave and post-night rest extend the work streak).
+    """
+    trainee_ids = list(snapshot.trainee_ids)
+    days = list(snapshot.days)
+    if not trainee_ids or not days:
+        return {}
+    trainee_index = {tid: i for i, tid in enumerate(trainee_ids)}
+    day_index = {d: i for i, d in enumerate(days)}
+    categories = snapshot.categories
+
+    worked = np.zeros((len(trainee_ids), len(days)), dtype=bool)
+    night = np.zeros_like(worked)
+    for tid, date_obj, shift in assignments:
+        t, d = trainee_index.get(tid), day_index.get(date_obj)
+        if t is not None and d is not None:
+            worked[t, d] = True
+            night[t, d] = categories.is_night(shift)
+
+    carried = [snapshot.carry_in.get(tid, BoundaryState()) for tid in trainee_ids]
+    counts_as_work = worked | snapshot.availability.full_leave_array(trainee_ids)
+    if snapshot.params.post_night_shift_off:
+        counts_as_work[:, 1:] |= night[:, :-1]
+        # The rest day after the previous month's last pernoite
+        counts_as_work[:, 0] |= np.array([state.worked_night_last_day for state in carried], dtype=bool)
+
+    # Runs that span the whole month continue the carried-in streak
+    work_run = _trailing_run(counts_as_work)
+    off_run = _trailing_run(~counts_as_work)
+    full_work = work_run == len(days)
+    full_off = off_run == len(days)
+
+    return {
+        tid: BoundaryState(
+            consecutive_work_days=int(work_run[t] + (carried[t].consecutive_work_days if full_work[t] else 0)),
+            consecutive_days_off=int(off_run[t] + (carried[t].consecutive_days_off if full_off[t] else 0)),
+            worked_night_last_day=bool(night[t, -1])
+        )
+        for t, tid in enumerate(trainee_ids)
+    }
@@ -0,0 +1,151 @@
+"""
+Shift categories.
+
+The scheduler works on shift categories, not on the individual shift
+definitions instructors are rostered on. Categories come from the
+`ShiftDefinition` table: `categoria` names the category a definition counts
+towards (a complement without one inherits its principal's, via
+`turno_pricipal_id`), the category's first definition that is not standby
+is its main definition and gives it its name, and that definition's
+`turno_noturno` marks night (pernoite) categories. Adding an intermediate
+shift is therefore a new definition row, and the solver state is sized by
+the number of categories.
+
+Standby definitions (`sobreaviso`, the SBM / SBT / SBP blocks) keep the
+import behaviour they always had: the capacity tables, which sum rows by
+symbol, count them towards their category, but they are not among the
+category's definitions, so per-definition totals (the JSON capacity
+import) leave them out.
+
+Without any categorised definitions the categories of the bundled
+data/shifts.json are used; their keys are the `models.Shift` values.
+"""
+import json
+import os
+from types import SimpleNamespace
+from typing import NamedTuple
+
+import numpy as np
+
+from ..models import Shift
+
+BUNDLED_SHIFTS = os.path.join(os.path.dirname(__file__), "..", "data", "shifts.json")
+
+
+class ShiftCategory(NamedTuple):
+    key: str
+    name: str
+    night: bool
+    definition_ids: tuple = ()
+    symbols: tuple = ()  # lower-case symbols of the main definition, its complements and standby blocks
+
+
+def shift_key(shift) -> str:
+    """Plain string key of a category (Shift members and plain keys alike)"""
+    return getattr(shift, "value", shift)
+
+
+def as_shift(key: str):
+    """The built-in Shift member for a key, or the key itself for other categories"""
+    return Shift._value2member_map_.get(key, key)
+
+
+class ShiftCategories:
+    """Ordered categories with the index and night lookups the solvers use"""
+
+    def __init__(self, categories):
+        self.categories = tuple(categories)
+        self.keys = tuple(as_shift(c.key) for c in self.categories)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.night = np.array([c.night for c in self.categories], dtype=bool)
+        self.night_indices = tuple(int(i) for i in np.flatnonzero(self.night))
+        # Night categories are harder to fill and go first, then the others in order
+        self.fill_order = tuple(
+            [self.keys[i] for i in self.night_indices]
+            + [key for i, key in enumerate(self.keys) if not self.night[i]]
+        )
+        self.by_definition = {
+            definition_id: key for c, key in zip(self.categories, self.keys) for definition_id in c.definition_ids
+        }
+        self.by_symbol = {symbol: key for c, key in zip(self.categories, self.keys) for symbol in c.symbols}
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __eq__(self, other):
+        return isinstance(other, ShiftCategories) and self.categories == other.categories
+
+    def __hash__(self):
+        return hash(self.categories)
+
+    def __reduce__(self):
+        return (ShiftCategories, (self.categories,))
+
+    def is_night(self, shift) -> bool:
+        return bool(self.night[self.index[shift]])
+
+    def of_definition(self, definition_id: int):
+        """Category key of a shift definition id, or None if it belongs to none"""
+        return self.by_definition.get(definition_id)
+
+    def of_symbol(self, symbol: str):
+        """Category key of a shift symbol (case-insensitive), or None"""
+        return self.by_symbol.get(symbol.strip().lower())
+
+    def describe(self) -> list[dict]:
+        return [{"key": shift_key(key), "name": c.name, "night": c.night} for c, key in zip(self.categories, self.keys)]
+
+    @classmethod
+    def from_definitions(cls, definitions) -> "ShiftCategories":
+        """
+        Categories from ShiftDefinition rows (or anything with the same attributes),
+        in the order of their main definitions. Definitions without a category,
+        and complements of one without a category, belong to none.
+        """
+        definitions = sorted(definitions, key=lambda d: d.id)
+        by_id = {d.id: d for d in definitions}
+
+        def category_of(d):
+            if d.categoria:
+                return d.categoria
+            principal = by_id.get(d.turno_pricipal_id)
+            if d.complementar and principal is not None and not principal.sobreaviso:
+                return principal.categoria
+            return None
+
+        members = {}
+        for d in definitions:
+            key = category_of(d)
+            if key:
+                members.setdefault(key, []).append(d)
+        mains = []
+        for key, group in members.items():
+            main = next((d for d in group if not d.sobreaviso), None)
+            if main is not None:
+                mains.append((main, key))
+        mains.sort(key=lambda item: item[0].id)
+        if not mains:
+            return DEFAULT_CATEGORIES
+        return cls(
+            ShiftCategory(
+                key=key,
+                name=main.nome,
+                night=bool(main.turno_noturno),
+                definition_ids=tuple(d.id for d in members[key] if not d.sobreaviso),
+                symbols=tuple(d.simbolo.strip().lower() for d in [main] + [d for d in members[key] if d is not main])
+            )
+            for main, key in mains
+        )
+
+
+def bundled_definitions() -> list:
+    """The shift definitions of data/shifts.json, with the ShiftDefinition defaults filled in"""
+    with open(BUNDLED_SHIFTS, encoding="utf-8") as f:
+        return [SimpleNamespace(**{"categoria": None, "sobreaviso": 0, **d}) for d in json.load(f)]
+
+
+# The categories of the bundled data/shifts.json
+DEFAULT_CATEGORIES = ShiftCategories.from_definitions(bundled_definitions())
@@ -0,0 +1,197 @@
+"""
+Pure, DB-free scheduling core.
+
+`solve` takes an immutable `ScheduleSnapshot` of everything the generator
+needs and returns a `SchedulePlan`. Nothing here touches a Session, so a
+plan can be previewed (or compared, or benchmarked) without writing.
+"""
+import hashlib
+import json
+import math
+from dataclasses import dataclass, asdict, field, replace
+from datetime import date
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from .availability import AvailabilityIndex
+from .boundary import BoundaryState
+from .categories import DEFAULT_CATEGORIES, ShiftCategories, shift_key
+from .engine import ArrayScheduleEngine
+from .flow import FlowScheduleEngine
+from .local_search import improve
+from .scoring import score_plan
+from .multistart import multistart, DEFAULT_STARTS
+
+# Single-run engines
+SOLVERS = {
+    "greedy": ArrayScheduleEngine,
+    "flow": FlowScheduleEngine,
+}
+
+# Solver modes selectable through the API
+MODES = tuple(SOLVERS) + ("multistart",)
+
+
+@dataclass(frozen=True)
+class ScheduleParams:
+    total_shifts: int = 18
+    night_shifts: int = 2
+    max_consecutive_days_off: int = 3
+    max_consecutive_work_days: int = 6
+    unavailability_weight: int = 1
+    post_night_shift_off: bool = True
+
+    @classmethod
+    def from_schedule(cls, schedule) -> "ScheduleParams":
+        """Build from a models.MonthlySchedule row"""
+        return cls(
+            total_shifts=schedule.params_total_shifts,
+            night_shifts=schedule.params_night_shifts,
+            max_consecutive_days_off=schedule.params_max_consecutive_days_off,
+            max_consecutive_work_days=schedule.params_max_consecutive_work_days,
+            unavailability_weight=schedule.params_unavailability_weight,
+            post_night_shift_off=schedule.params_post_night_shift_off
+        )
+
+    def with_overrides(self, **overrides) -> "ScheduleParams":
+        """Copy with the given fields replaced; None values are ignored"""
+        return replace(self, **{k: v for k, v in overrides.items() if v is not None})
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    month: str
+    days: tuple[date, ...]
+    trainee_ids: tuple[int, ...]
+    availability: AvailabilityIndex
+    capacities: Mapping  # {(date, shift): total_instructors}, read-only
+    params: ScheduleParams
+    fixed: tuple = ()  # ((trainee_id, date, shift), ...) kept as they are: pinned or outside the window
+    window: Optional[tuple] = None  # (first, last) date re-solved; None is the whole month
+    carry_in: Mapping = field(default_factory=lambda: MappingProxyType({}))  # {trainee_id: BoundaryState}
+    categories: ShiftCategories = DEFAULT_CATEGORIES  # availability is indexed by these shift categories
+
+    @classmethod
+    def build(cls, month: str, days, trainee_ids, availability: AvailabilityIndex, capacities: dict, params: ScheduleParams,
+              fixed=(), window: tuple = None, carry_in: dict = None, categories: ShiftCategories = DEFAULT_CATEGORIES):
+        if availability.shifts != categories.keys:
+            raise ValueError("The availability index and the snapshot use different shift categories")
+        # Capacity and fixed rows of categories that no longer exist are left out
+        return cls(
+            month=month,
+            days=tuple(days),
+            trainee_ids=tuple(sorted(trainee_ids)),
+            availability=availability,
+            capacities=MappingProxyType({key: total for key, total in capacities.items() if key[1] in categories.index}),
+            params=params,
+            fixed=tuple(sorted(row for row in fixed if row[2] in categories.index)),
+            window=window,
+            carry_in=MappingProxyType({tid: BoundaryState(*state) for tid, state in (carry_in or {}).items()}),
+            categories=categories
+        )
+
+    def __reduce__(self):
+        # MappingProxyType is not picklable; rebuild from plain dicts (process pools)
+        return (ScheduleSnapshot.build, (
+            self.month, self.days, self.trainee_ids, self.availability, dict(self.capacities), self.params,
+            self.fixed, self.window, dict(self.carry_in), self.categories
+        ))
+
+    def fingerprint(self) -> str:
+        """Stable hash of every input the solver reads; equal snapshots give equal plans"""
+        payload = {
+            "month": self.month,
+            "days": [d.isoformat() for d in self.days],
+            "trainee_ids": list(self.trainee_ids),
+            "unavailable": sorted(
+                (tid, d.isoformat(), shift_key(shift)) for tid, d, shift in self.availability.rows()
+            ),
+            "capacities": sorted(
+                (d.isoformat(), shift_key(shift), total) for (d, shift), total in self.capacities.items()
+            ),
+            "categories": [(shift_key(key), bool(night)) for key, night in zip(self.categories, self.categories.night)],
+            "params": self.params.as_dict(),
+            "fixed": [(tid, d.isoformat(), shift_key(shift)) for tid, d, shift in self.fixed],
+            "window": [d.isoformat() for d in self.window] if self.window else None,
+            "carry_in": sorted((tid, *state) for tid, state in self.carry_in.items()),
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def with_params(self, params: ScheduleParams) -> "ScheduleSnapshot":
+        return replace(self, params=params)
+
+    def with_fixed(self, fixed, window: tuple = None) -> "ScheduleSnapshot":
+        """Copy that keeps `fixed` assignments and only re-solves the days in `window`"""
+        return replace(self, fixed=tuple(sorted(fixed)), window=window)
+
+    def with_carry_in(self, carry_in: dict) -> "ScheduleSnapshot":
+        """Copy that starts from other carried-in streaks ({trainee_id: BoundaryState})"""
+        return replace(self, carry_in=MappingProxyType({tid: BoundaryState(*state) for tid, state in carry_in.items()}))
+
+    def in_window(self, date_obj: date) -> bool:
+        return self.window is None or self.window[0] <= date_obj <= self.window[1]
+
+    @property
+    def required_slots(self) -> int:
+        """Total trainee positions to fill: half of the instructors of each slot, rounded up"""
+        days = set(self.days)
+        return sum(
+            math.ceil(total / 2)
+            for (date_obj, _shift), total in self.capacities.items()
+            if date_obj in days and total > 0
+        )
+
+
+@dataclass(frozen=True)
+class SchedulePlan:
+    month: str
+    mode: str
+    params: ScheduleParams
+    assignments: tuple  # ((trainee_id, date, shift), ...)
+    required_slots: int
+    stats: Mapping = field(default_factory=dict)
+
+    @property
+    def filled_slots(self) -> int:
+        return len(self.assignments)
+
+
+def solve(snapshot: ScheduleSnapshot, mode: str = "greedy", budget_ms: float = 0, seed: int = None,
+          starts: int = DEFAULT_STARTS, progress=None, workers: int = None) -> SchedulePlan:
+    """
+    Run the scheduler on a snapshot, then optionally spend up to budget_ms
+    improving it with local search.
+
+    For greedy/flow a seed selects a randomized variant (None = deterministic).
+    For multistart it is the base seed of the `starts` variants (None = random,
+    reported in the stats). Pure: with budget_ms=0 the same snapshot, mode and
+    seed always give the same plan.
+
+    The plan's assignments include the snapshot's fixed ones; only the rest
+    is solved.
+
+    progress, if given, is called as progress(days_done, total_days) while solving.
+    workers caps the multistart process pool (None = one per CPU); the plan does not depend on it.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown solver mode '{mode}'")
+    stats = {}
+    if mode == "multistart":
+        assignments, stats["multistart"] = multistart(snapshot, starts, seed, workers, progress)
+    else:
+        assignments = SOLVERS[mode].from_snapshot(snapshot, seed).solve(progress)
+    if budget_ms > 0:
+        assignments, stats["local_search"] = improve(snapshot, assignments, budget_ms, seed or 0)
+    stats["score"] = score_plan(snapshot, assignments)
+    return SchedulePlan(
+        month=snapshot.month,
+        mode=mode,
+        params=snapshot.params,
+        assignments=tuple(snapshot.fixed) + tuple(assignments),
+        required_slots=snapshot.required_slots,
+        stats=stats
+    )
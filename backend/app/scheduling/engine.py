@@ -0,0 +1,332 @@
+"""
+Array-backed greedy scheduling engine.
+
+Trainee state lives in dense NumPy arrays indexed by trainee (and by
+trainee x day x shift for unavailability, unpacked once from the
+AvailabilityIndex bitmasks), so each slot finds its eligible candidates
+with a handful of vectorized masks instead of scanning every trainee and
+every previous assignment in Python.
+
+Days-off lookahead: for a trainee whose off streak would pass
+max_consecutive_days_off within the next few days, the last day in that
+window on which they could still take an open slot is their last chance.
+Candidates are ranked by the days left until their last chance before
+anything else (earliest first, like earliest-deadline-first scheduling):
+today's seats go to the trainees who cannot wait, and the seats of the
+coming days stay open for those whose last chance comes later. A trainee
+whose last chance is today is critical. Leave or a fixed shift in the
+window ends the streak by itself, so it takes the trainee out of the
+lookahead. The window is at most max_consecutive_days_off + 1 days and is
+answered from per-trainee arrays computed once (last workable day up to
+each day, prefix counts of leave and fixed days), so each day costs
+O(trainees).
+"""
+import math
+from datetime import date
+
+import numpy as np
+
+from .availability import AvailabilityIndex
+from .categories import DEFAULT_CATEGORIES, ShiftCategories
+from .selection import pack_priority, take_top, FIELD_MAX
+
+
+# Last chance of a trainee the lookahead does not cover (no streak to break in time this month)
+NO_DEADLINE = FIELD_MAX
+
+
+def priority_keys(tie_break, last_chance, night_score, days_off, total, trainee_count: int):
+    """
+    The greedy's packed ranking keys, lowest first: days left until the
+    trainee's last chance to break their off streak (0 = critical, NO_DEADLINE
+    when not urgent), then night_score, days off (most first), total and the
+    tie-break. Shared with the repair refill so both rank candidates the same way.
+    """
+    return pack_priority(tie_break, night_score, days_off, total, trainee_count, last_chance)
+
+
+class EngineState:
+    """Per-trainee counters carried from one day to the next"""
+
+    def __init__(self, work_counts: np.ndarray):
+        trainee_count = len(work_counts)
+        self.work_counts = work_counts.astype(np.int64)
+        self.night_counts = np.zeros(trainee_count, dtype=np.int64)
+        self.consecutive_work_days = np.zeros(trainee_count, dtype=np.int64)
+        self.consecutive_days_off = np.zeros(trainee_count, dtype=np.int64)
+        self.worked_night_yesterday = np.zeros(trainee_count, dtype=bool)
+        # Days until the trainee's last chance to break their days-off streak in time
+        self.last_chance = np.full(trainee_count, NO_DEADLINE, dtype=np.int64)
+        # Today is that last chance
+        self.critical = np.zeros(trainee_count, dtype=bool)
+
+
+class ArrayScheduleEngine:
+    """
+    Greedy day-by-day scheduler over dense arrays.
+
+    Candidates are ranked by (last chance, night_score, urgency, total,
+    trainee id); the last chance comes from the days-off lookahead (see the
+    module docstring). With lookahead=False every trainee has the same last
+    chance and the engine produces exactly the same assignments as the
+    original per-slot loop (reference.py).
+    Eligibility is a vectorized mask per slot; ranking is kept in two packed
+    priority-key arrays (one for pernoite, one for day shifts, where
+    night_score is always 0) that are updated in place, and each slot takes
+    its top N with a partial selection instead of sorting.
+
+    With a `seed`, the final tie-break uses a seeded random permutation
+    instead of the trainee id and the shift order of some days is slightly
+    perturbed, giving a reproducible randomized variant of the same heuristic.
+
+    `fixed` assignments (pinned, or outside the `window` of days being
+    re-solved) are kept as they are: they take their slot's capacity, count
+    towards the trainee's totals from the start and drive the streaks on
+    their day. Only the open capacity of days inside the window is filled.
+
+    Subclasses change how a day is filled by overriding `start` and `fill_day`;
+    the hard constraints and the end-of-day streak rules are shared.
+    """
+
+    # Probability that a day's shift order gets two shifts swapped (randomized variants only)
+    PERTURB_PROBABILITY = 0.2
+
+    def __init__(self, trainee_ids, days: list[date], availability: AvailabilityIndex, capacity_map: dict, params: dict,
+                 seed: int = None, fixed=(), window: tuple = None, carry_in: dict = None, lookahead: bool = True,
+                 categories: ShiftCategories = DEFAULT_CATEGORIES):
+        # Trainees are indexed in id order, so the array index doubles as the id tie-breaker
+        self.trainee_ids = np.array(sorted(trainee_ids), dtype=np.int64)
+        self.days = list(days)
+        self.params = params
+
+        # Shift categories: array column per category, night categories share the pernoite rules
+        self.shift_index = categories.index
+        self.night_shift = {shift: categories.is_night(shift) for shift in categories}
+        self.shift_count = len(categories)
+
+        self.tie_break = np.arange(len(self.trainee_ids), dtype=np.int64)
+        self.fill_orders = [categories.fill_order] * len(self.days)
+        if seed is not None:
+            rng = np.random.default_rng(seed)
+            self.tie_break = rng.permutation(len(self.trainee_ids)).astype(np.int64)
+            for d in range(len(self.days)):
+                if rng.random() < self.PERTURB_PROBABILITY and self.shift_count > 1:
+                    order = list(categories.fill_order)
+                    i, j = rng.choice(len(order), size=2, replace=False)
+                    order[i], order[j] = order[j], order[i]
+                    self.fill_orders[d] = tuple(order)
+
+        day_index = {d: i for i, d in enumerate(self.days)}
+
+        ids = self.trainee_ids.tolist()
+        self.unavailable = availability.to_array(ids)
+        # Afastamento/leave: unavailable for ALL shifts of the day
+        self.fully_unavailable = availability.full_leave_array(ids)
+        self.unavailable_days = availability.unavailable_day_counts(ids)
+
+        # Capacity is half of total instructors (rounded up)
+        self.required = np.zeros((len(self.days), self.shift_count), dtype=np.int64)
+        for (date_obj, shift), total in capacity_map.items():
+            d = day_index.get(date_obj)
+            if d is not None:
+                self.required[d, self.shift_index[shift]] = math.ceil(total / 2)
+
+        # Fixed assignments: (trainees, days) worked / worked-a-pernoite masks
+        trainee_index = {tid: i for i, tid in enumerate(ids)}
+        self.fixed_work = np.zeros((self.trainee_count, len(self.days)), dtype=bool)
+        self.fixed_night = np.zeros((self.trainee_count, len(self.days)), dtype=bool)
+        for tid, date_obj, shift in fixed:
+            d = day_index.get(date_obj)
+            if d is None:
+                continue
+            # Inactive trainees still hold their slot, but have no counters here
+            self.required[d, self.shift_index[shift]] -= 1
+            t = trainee_index.get(tid)
+            if t is not None:
+                self.fixed_work[t, d] = True
+                self.fixed_night[t, d] = self.night_shift[shift]
+        np.maximum(self.required, 0, out=self.required)
+
+        # Streaks carried over from the end of the previous month
+        self.carry_in = carry_in or {}
+
+        # Days outside the window keep only their fixed assignments
+        if window is not None:
+            start, end = window
+            outside = np.array([not start <= d <= end for d in self.days], dtype=bool)
+            self.required[outside] = 0
+
+        # Days-off lookahead: per trainee, the last day up to each day with an open slot they are
+        # available for, and prefix counts of the days that end an off streak by themselves
+        # (full leave or a fixed shift)
+        self.lookahead = lookahead
+        if lookahead:
+            open_slot = (~self.unavailable & (self.required > 0)[np.newaxis]).any(axis=2)
+            workable = open_slot & ~self.fully_unavailable
+            day_numbers = np.arange(len(self.days), dtype=np.int64)
+            self.last_workable = np.maximum.accumulate(np.where(workable, day_numbers, -1), axis=1)
+            self.resets_prefix = np.zeros((self.trainee_count, len(self.days) + 1), dtype=np.int64)
+            np.cumsum(self.fully_unavailable | self.fixed_work, axis=1, out=self.resets_prefix[:, 1:])
+
+    @classmethod
+    def from_snapshot(cls, snapshot, seed: int = None):
+        """Engine for a core.ScheduleSnapshot"""
+        return cls(
+            snapshot.trainee_ids,
+            list(snapshot.days),
+            snapshot.availability,
+            snapshot.capacities,
+            snapshot.params.as_dict(),
+            seed=seed,
+            fixed=snapshot.fixed,
+            window=snapshot.window,
+            carry_in=snapshot.carry_in,
+            categories=snapshot.categories
+        )
+
+    @property
+    def trainee_count(self) -> int:
+        return len(self.trainee_ids)
+
+    def initial_state(self) -> EngineState:
+        # Every 2 days with any unavailability counts as 1 worked day; fixed shifts count up front
+        state = EngineState(self.unavailable_days // 2 + self.fixed_work.sum(axis=1))
+        state.night_counts += self.fixed_night.sum(axis=1)
+        for t, tid in enumerate(self.trainee_ids.tolist()):
+            carried = self.carry_in.get(tid)
+            if carried:
+                state.consecutive_work_days[t] = carried.consecutive_work_days
+                state.consecutive_days_off[t] = carried.consecutive_days_off
+                state.worked_night_yesterday[t] = carried.worked_night_last_day
+        state.last_chance = self.last_chance_on(0, state)
+        state.critical = state.last_chance == 0
+        return state
+
+    def last_chance_on(self, d: int, state: EngineState) -> np.ndarray:
+        """
+        Days from d to the last day on which each trainee can still take an open slot before
+        their off streak passes max_consecutive_days_off (0 = day d is the last chance).
+        NO_DEADLINE when that would not happen this month, when leave or a fixed shift ends
+        the streak first, or when no open slot is left for them in time.
+        """
+        if not self.lookahead or d >= len(self.days):
+            return np.full(self.trainee_count, NO_DEADLINE, dtype=np.int64)
+        # Last day the streak may still run before it is one day too long
+        deadline = d + self.params['max_consecutive_days_off'] - state.consecutive_days_off
+        end = np.clip(deadline, d, len(self.days) - 1)
+        rows = np.arange(self.trainee_count)
+        last = self.last_workable[rows, end]
+        resets = self.resets_prefix[rows, end + 1] - self.resets_prefix[:, d]
+        urgent = (deadline < len(self.days)) & (resets == 0) & (last >= d)
+        return np.where(urgent, last - d, NO_DEADLINE)
+
+    def eligible_today(self, d: int, state: EngineState) -> np.ndarray:
+        """
+        Day-level hard constraints: consecutive work limit, total shift limit, post-night rest.
+        Work counts only change for trainees who already worked today, so this stays valid all day.
+        """
+        params = self.params
+        eligible = (state.consecutive_work_days < params['max_consecutive_work_days']) & \
+            (state.work_counts < params['total_shifts'])
+        if params['post_night_shift_off']:
+            eligible &= ~state.worked_night_yesterday
+        # A fixed shift today already takes the trainee's day
+        eligible &= ~self.fixed_work[:, d]
+        return eligible
+
+    def slot_mask(self, d: int, shift, state: EngineState, eligible_today: np.ndarray, worked_today: np.ndarray):
+        """Trainees who may take (day d, shift) right now"""
+        mask = eligible_today & ~worked_today & ~self.unavailable[:, d, self.shift_index[shift]]
+        if self.night_shift[shift]:
+            mask &= state.night_counts < self.params['night_shifts']
+            # No pernoite right before a fixed shift that needs the rest day
+            if self.params['post_night_shift_off'] and d + 1 < len(self.days):
+                mask &= ~self.fixed_work[:, d + 1]
+        return mask
+
+    def start(self, state: EngineState):
+        """Called once before the first day"""
+        self.day_keys = np.zeros(self.trainee_count, dtype=np.int64)
+        self.night_keys = np.zeros(self.trainee_count, dtype=np.int64)
+        self.refresh_keys(state, np.arange(self.trainee_count, dtype=np.int64))
+
+    def refresh_keys(self, state: EngineState, indices: np.ndarray):
+        # Day shifts rank by (last chance, urgency, total, id); pernoite adds night_score after the last chance
+        last_chance = state.last_chance[indices]
+        days_off = state.consecutive_days_off[indices]
+        self.day_keys[indices] = priority_keys(
+            self.tie_break[indices], last_chance, 0, days_off, state.work_counts[indices], self.trainee_count
+        )
+        self.night_keys[indices] = priority_keys(
+            self.tie_break[indices], last_chance, state.night_counts[indices], days_off, state.work_counts[indices],
+            self.trainee_count
+        )
+
+    def fill_day(self, d: int, state: EngineState, eligible_today: np.ndarray):
+        """Yield (shift, selected trainee indices) for day d; state is updated between slots"""
+        worked_today = np.zeros(self.trainee_count, dtype=bool)
+        for shift in self.fill_orders[d]:
+            required_capacity = int(self.required[d, self.shift_index[shift]])
+            if required_capacity <= 0:
+                continue
+            mask = self.slot_mask(d, shift, state, eligible_today, worked_today)
+            keys = self.night_keys if self.night_shift[shift] else self.day_keys
+            selected = take_top(keys, mask, required_capacity)
+            if selected.size:
+                worked_today[selected] = True
+                yield shift, selected
+
+    def end_day(self, d: int, state: EngineState, worked_today: np.ndarray, worked_night_today: np.ndarray):
+        # Working, resting after a pernoite and full-day leave all extend the work streak
+        counts_as_work = worked_today | self.fully_unavailable[:, d]
+        if self.params['post_night_shift_off']:
+            counts_as_work |= state.worked_night_yesterday
+
+        previous_days_off = state.consecutive_days_off
+        state.consecutive_work_days = np.where(counts_as_work, state.consecutive_work_days + 1, 0)
+        state.consecutive_days_off = np.where(counts_as_work, 0, state.consecutive_days_off + 1)
+        state.worked_night_yesterday = worked_night_today
+        previous_last_chance = state.last_chance
+        state.last_chance = self.last_chance_on(d + 1, state)
+        state.critical = state.last_chance == 0
+
+        # Trainees who worked today were out of the running until tomorrow, so their keys
+        # are refreshed here together with everyone whose day-off streak or last chance moved
+        changed = np.flatnonzero(
+            worked_today | (state.consecutive_days_off != previous_days_off)
+            | (state.last_chance != previous_last_chance)
+        )
+        if changed.size:
+            self.refresh_keys(state, changed)
+
+    def solve(self, progress=None) -> list[tuple]:
+        """
+        Run the day-by-day fill and return a list of (trainee_id, date, shift).
+        progress, if given, is called as progress(days_done, total_days) after each day.
+        """
+        state = self.initial_state()
+        self.start(state)
+        assignments = []
+
+        for d, current_date in enumerate(self.days):
+            # Fixed shifts are already counted in the totals; they only mark the day as worked
+            worked_today = self.fixed_work[:, d].copy()
+            worked_night_today = self.fixed_night[:, d].copy()
+            eligible_today = self.eligible_today(d, state)
+
+            for shift, selected in self.fill_day(d, state, eligible_today):
+                state.work_counts[selected] += 1
+                worked_today[selected] = True
+                if self.night_shift[shift]:
+                    state.night_counts[selected] += 1
+                    worked_night_today[selected] = True
+
+                assignments.extend(
+                    (int(tid), current_date, shift) for tid in self.trainee_ids[selected]
+                )
+
+            self.end_day(d, state, worked_today, worked_night_today)
+            if progress:
+                progress(d + 1, len(self.days))
+
+        return assignments
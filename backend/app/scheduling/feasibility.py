@@ -0,0 +1,123 @@
+"""
+Fast feasibility pre-check.
+
+Compares what the month demands (half of the instructors of each slot,
+rounded up) with upper bounds on what the active trainees can supply:
+
+- per slot:  trainees not unavailable for that day and shift
+- per day:   trainees available for at least one shift (one shift per day)
+- pernoite:  per trainee, min(night_shifts, days a night shift is possible)
+- month:     per trainee, min(shifts left after the unavailability credit,
+             available days, days allowed by the consecutive-work limit)
+
+Only the slots the solver fills are counted: days inside the snapshot's
+window, less the positions its fixed (pinned) rows already take. A trainee
+with a fixed row on a day has no other shift to give that day, and fixed
+rows count towards their totals.
+
+All bounds are necessary conditions computed with a few array reductions,
+so the check runs in milliseconds. A shortfall anywhere means the month
+will be under-filled whatever the solver does; no shortfall does not
+prove that every slot can be filled.
+"""
+import math
+
+import numpy as np
+
+from .categories import shift_key
+
+# Bottlenecks listed in a report, worst first
+MAX_BOTTLENECKS = 20
+
+
+def _max_work_days(day_count: int, max_consecutive: int) -> int:
+    """Most days anyone can work in a month without breaking the consecutive-work limit"""
+    block = max_consecutive + 1
+    return (day_count // block) * max_consecutive + min(day_count % block, max_consecutive)
+
+
+def check_feasibility(snapshot) -> dict:
+    """Structured supply/demand report for a ScheduleSnapshot"""
+    params = snapshot.params
+    days = list(snapshot.days)
+    trainee_ids = list(snapshot.trainee_ids)
+    day_index = {d: i for i, d in enumerate(days)}
+    categories = snapshot.categories
+    night = list(categories.night_indices)
+
+    in_window = np.array([snapshot.in_window(d) for d in days], dtype=bool)
+
+    # 1. Open demand per (day, shift): window days only, less the fixed rows
+    demand = np.zeros((len(days), len(categories)), dtype=np.int64)
+    for (date_obj, shift), total in snapshot.capacities.items():
+        d = day_index.get(date_obj)
+        if d is not None and total > 0:
+            demand[d, categories.index[shift]] = math.ceil(total / 2)
+    demand[~in_window] = 0
+
+    trainee_index = {tid: i for i, tid in enumerate(trainee_ids)}
+    fixed_work = np.zeros(len(trainee_ids), dtype=np.int64)
+    fixed_nights = np.zeros(len(trainee_ids), dtype=np.int64)
+    fixed_days = np.zeros((len(trainee_ids), len(days)), dtype=bool)
+    for tid, date_obj, shift in snapshot.fixed:
+        d = day_index.get(date_obj)
+        if d is None:
+            continue
+        s = categories.index[shift]
+        demand[d, s] -= 1
+        t = trainee_index.get(tid)
+        if t is not None:
+            fixed_work[t] += 1
+            fixed_nights[t] += categories.night[s]
+            fixed_days[t, d] = True
+    np.maximum(demand, 0, out=demand)
+
+    # 2. Supply bounds from the (trainees, days, shifts) availability matrix,
+    # restricted to the window days the trainee has no fixed row on
+    available = ~snapshot.availability.to_array(trainee_ids)
+    available &= (in_window[np.newaxis] & ~fixed_days)[:, :, np.newaxis]
+    slot_supply = available.sum(axis=0)
+    available_days = available.any(axis=2)
+    day_supply = available_days.sum(axis=0)
+
+    credit = snapshot.availability.unavailable_day_counts(trainee_ids) // 2
+    shifts_left = np.maximum(params.total_shifts - credit - fixed_work, 0)
+    work_limit = _max_work_days(int(in_window.sum()), params.max_consecutive_work_days)
+    per_trainee = np.minimum(np.minimum(shifts_left, available_days.sum(axis=1)), work_limit)
+    night_per_trainee = np.minimum(
+        np.minimum(np.maximum(params.night_shifts - fixed_nights, 0), available[:, :, night].any(axis=2).sum(axis=1)),
+        per_trainee
+    )
+
+    # 3. Shortfalls
+    slot_short = np.maximum(demand - slot_supply, 0)
+    day_demand = demand.sum(axis=1)
+    day_short = np.maximum(day_demand - day_supply, 0)
+    month_demand = int(demand.sum())
+    month_supply = int(per_trainee.sum())
+    night_demand = int(demand[:, night].sum())
+    night_supply = int(night_per_trainee.sum())
+
+    bottlenecks = []
+    for d, s in zip(*np.nonzero(slot_short)):
+        bottlenecks.append({
+            "date": days[d], "shift": shift_key(categories.keys[s]),
+            "demand": int(demand[d, s]), "supply": int(slot_supply[d, s]), "shortfall": int(slot_short[d, s])
+        })
+    for d in np.flatnonzero(day_short):
+        bottlenecks.append({
+            "date": days[d], "shift": None,
+            "demand": int(day_demand[d]), "supply": int(day_supply[d]), "shortfall": int(day_short[d])
+        })
+    bottlenecks.sort(key=lambda b: (-b["shortfall"], b["date"], b["shift"] or ""))
+
+    month_short = max(month_demand - month_supply, 0)
+    night_short = max(night_demand - night_supply, 0)
+    return {
+        "feasible": not bottlenecks and not month_short and not night_short,
+        "required_slots": month_demand,
+        "month_totals": {"demand": month_demand, "supply": month_supply, "shortfall": month_short},
+        "night": {"demand": night_demand, "supply": night_supply, "shortfall": night_short},
+        "bottleneck_count": len(bottlenecks),
+        "bottlenecks": bottlenecks[:MAX_BOTTLENECKS],
+    }
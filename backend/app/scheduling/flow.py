@@ -0,0 +1,174 @@
+"""
+Min-cost-flow solver mode.
+
+Each day is modelled as a flow network
+
+    source -> trainee (cap 1) -> shift slot (cap 1, cost) -> sink (cap = required)
+
+where a trainee only has an edge to the slots they are eligible for under
+the same hard constraints as the greedy. Successive shortest paths give the
+maximum number of filled slots for the day at minimum total cost; costs
+come from total/night balance, day-off urgency (critical trainees of the
+engine's days-off lookahead first) and how little slack a trainee has
+left to reach `total_shifts` in the rest of the month.
+Pure Python, no external solver.
+"""
+import heapq
+
+import numpy as np
+
+from .engine import ArrayScheduleEngine, EngineState
+
+# Cost weights (integers, all terms >= 0)
+TOTAL_WEIGHT = 10  # per shift already worked
+NIGHT_WEIGHT = 50  # per pernoite already worked, pernoite edges only
+SLACK_WEIGHT = 5  # per spare day left to reach total_shifts
+OFF_WEIGHT = 3  # per day still allowed off before max_consecutive_days_off
+LOOKAHEAD_WEIGHT = 1000  # for every trainee who is not critical today (see engine lookahead)
+
+
+class MinCostFlow:
+    """Successive shortest paths with Dijkstra and Johnson potentials (non-negative costs)"""
+
+    def __init__(self, node_count: int):
+        self.node_count = node_count
+        self.graph = [[] for _ in range(node_count)]
+        # Edge storage: parallel lists, the reverse of edge e is e ^ 1
+        self.to = []
+        self.capacity = []
+        self.cost = []
+
+    def add_edge(self, u: int, v: int, capacity: int, cost: int) -> int:
+        edge = len(self.to)
+        self.graph[u].append(edge)
+        self.to.append(v)
+        self.capacity.append(capacity)
+        self.cost.append(cost)
+        self.graph[v].append(edge + 1)
+        self.to.append(u)
+        self.capacity.append(0)
+        self.cost.append(-cost)
+        return edge
+
+    def flow_on(self, edge: int) -> int:
+        return self.capacity[edge ^ 1]
+
+    def solve(self, source: int, sink: int, max_flow: int = None):
+        """Push up to max_flow units from source to sink; returns (flow, cost)"""
+        n = self.node_count
+        to, capacity, cost, graph = self.to, self.capacity, self.cost, self.graph
+        potential = [0] * n
+        flow = total_cost = 0
+        infinity = float('inf')
+
+        while max_flow is None or flow < max_flow:
+            dist = [infinity] * n
+            previous_edge = [-1] * n
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                pu = potential[u]
+                for e in graph[u]:
+                    if capacity[e] <= 0:
+                        continue
+                    v = to[e]
+                    nd = d + cost[e] + pu - potential[v]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        previous_edge[v] = e
+                        heapq.heappush(heap, (nd, v))
+            if dist[sink] == infinity:
+                break
+
+            for v in range(n):
+                if dist[v] < infinity:
+                    potential[v] += dist[v]
+
+            # Bottleneck along the path
+            push = infinity if max_flow is None else max_flow - flow
+            v = sink
+            while v != source:
+                e = previous_edge[v]
+                push = min(push, capacity[e])
+                v = to[e ^ 1]
+            v = sink
+            while v != source:
+                e = previous_edge[v]
+                capacity[e] -= push
+                capacity[e ^ 1] += push
+                total_cost += push * cost[e]
+                v = to[e ^ 1]
+            flow += push
+
+        return flow, total_cost
+
+
+class FlowScheduleEngine(ArrayScheduleEngine):
+    """Fills each day with a min-cost max-flow over (trainee, shift) instead of slot-by-slot greedy"""
+
+    def start(self, state: EngineState):
+        # Days from d to the end of the month on which the trainee is not on full leave
+        available = ~self.fully_unavailable
+        self.days_ahead = np.cumsum(available[:, ::-1], axis=1)[:, ::-1]
+
+    def refresh_keys(self, state: EngineState, indices: np.ndarray):
+        pass
+
+    def edge_costs(self, d: int, state: EngineState) -> np.ndarray:
+        """(trainees,) base cost of giving anyone a shift today; pernoite adds NIGHT_WEIGHT * nights"""
+        params = self.params
+        needed = np.maximum(params['total_shifts'] - state.work_counts, 0)
+        slack = np.clip(self.days_ahead[:, d] - needed, 0, len(self.days))
+        allowed_off = np.maximum(params['max_consecutive_days_off'] - state.consecutive_days_off, 0)
+        return (
+            TOTAL_WEIGHT * state.work_counts + SLACK_WEIGHT * slack + OFF_WEIGHT * allowed_off
+            + LOOKAHEAD_WEIGHT * ~state.critical
+        )
+
+    def fill_day(self, d: int, state: EngineState, eligible_today: np.ndarray):
+        nobody = np.zeros(self.trainee_count, dtype=bool)
+        slots = []
+        for shift in self.fill_orders[d]:
+            required_capacity = int(self.required[d, self.shift_index[shift]])
+            if required_capacity > 0:
+                mask = self.slot_mask(d, shift, state, eligible_today, nobody)
+                if mask.any():
+                    slots.append((shift, required_capacity, mask))
+        if not slots:
+            return
+
+        candidates = np.flatnonzero(np.logical_or.reduce([mask for _, _, mask in slots]))
+        base_cost = self.edge_costs(d, state)
+
+        # Nodes: 0 source, 1 sink, 2.. slots, then candidates
+        source, sink = 0, 1
+        slot_node = {shift: 2 + i for i, (shift, _, _) in enumerate(slots)}
+        first_trainee = 2 + len(slots)
+        network = MinCostFlow(first_trainee + len(candidates))
+
+        for shift, required_capacity, _ in slots:
+            network.add_edge(slot_node[shift], sink, required_capacity, 0)
+
+        trainee_edges = []  # (edge, trainee index, shift)
+        for offset, t in enumerate(candidates.tolist()):
+            node = first_trainee + offset
+            network.add_edge(source, node, 1, 0)
+            for shift, _, mask in slots:
+                if mask[t]:
+                    cost = int(base_cost[t])
+                    if self.night_shift[shift]:
+                        cost += NIGHT_WEIGHT * int(state.night_counts[t])
+                    trainee_edges.append((network.add_edge(node, slot_node[shift], 1, cost), t, shift))
+
+        network.solve(source, sink)
+
+        chosen = {shift: [] for shift, _, _ in slots}
+        for edge, t, shift in trainee_edges:
+            if network.flow_on(edge):
+                chosen[shift].append(t)
+        for shift, _, _ in slots:
+            if chosen[shift]:
+                yield shift, np.array(sorted(chosen[shift]), dtype=np.int64)
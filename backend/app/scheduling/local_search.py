@@ -0,0 +1,396 @@
+"""
+Anytime local-search improvement pass.
+
+Starts from a feasible plan (normally the greedy fill) and tries random
+neighbourhood moves until a deadline:
+
+- fill:      give an under-filled slot to a trainee who is off that day
+- transfer:  hand one trainee's shift on a day to a trainee who is off
+- swap:      two trainees working the same day exchange shifts
+- relocate:  move a trainee's shift to an under-filled slot on a day they are off
+
+The snapshot's fixed assignments (and every day outside its window) are
+never moved.
+
+Every move keeps the hard constraints of the greedy (availability, one
+shift per day, total and night caps, post-night rest, consecutive work
+limit counting leave and post-night rest as work). Moves are scored on the
+shared objective (scoring.py): the count terms by their O(1) delta, and
+the run terms by re-evaluating only the rows of the touched trainees, once
+the cheap checks have passed. Only non-worsening moves are accepted, so
+the current plan is always the best one found so far.
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from .scoring import (
+    OFF, night_lookup, unfilled_delta, total_delta, night_delta, row_violations, score_grid, score_plan
+)
+
+# How often (in iterations) the deadline is checked
+CLOCK_INTERVAL = 512
+
+
+class LocalSearch:
+
+    def __init__(self, snapshot, assignments, seed: int = 0):
+        params = snapshot.params
+        self.trainee_ids = list(snapshot.trainee_ids)
+        self.days = list(snapshot.days)
+        self.total_cap = params.total_shifts
+        self.night_cap = params.night_shifts
+        self.max_work = params.max_consecutive_work_days
+        self.max_off = params.max_consecutive_days_off
+        self.params = params
+        self.post_night_off = params.post_night_shift_off
+        self.rng = random.Random(seed)
+
+        # Shift categories; is_night[OFF] is False, so any grid cell can be looked up
+        self.categories = snapshot.categories
+        self.shifts = self.categories.keys
+        shift_index = self.categories.index
+        self.is_night = night_lookup(self.categories)
+        self.shift_count = shift_count = len(self.shifts)
+
+        availability = snapshot.availability
+        day_count = len(self.days)
+        self.masks = [availability.mask(tid) for tid in self.trainee_ids]
+        self.full_leave = []
+        for tid in self.trainee_ids:
+            full = availability.full_leave_mask(tid)
+            self.full_leave.append([bool(full >> (d * shift_count) & 1) for d in range(day_count)])
+
+        day_index = {d: i for i, d in enumerate(self.days)}
+        self.required = [[0] * shift_count for _ in self.days]
+        for (date_obj, shift), total in snapshot.capacities.items():
+            d = day_index.get(date_obj)
+            if d is not None:
+                self.required[d][shift_index[shift]] = math.ceil(total / 2)
+
+        # Unavailability credits count towards the total, exactly as in the greedy
+        self.credit = [availability.unavailable_day_count(tid) // 2 for tid in self.trainee_ids]
+        self.work = list(self.credit)
+        self.nights = [0] * len(self.trainee_ids)
+        self.grid = [[OFF] * day_count for _ in self.trainee_ids]
+        self.fill = [[0] * shift_count for _ in self.days]
+
+        trainee_index = {tid: i for i, tid in enumerate(self.trainee_ids)}
+        for tid, date_obj, shift in assignments:
+            # Rows of shift categories that no longer exist are left out, as the snapshot does for fixed rows
+            if shift not in shift_index:
+                continue
+            t, d, s = trainee_index[tid], day_index[date_obj], shift_index[shift]
+            self.grid[t][d] = s
+            self.work[t] += 1
+            self.nights[t] += self.is_night[s]
+            self.fill[d][s] += 1
+
+        # The snapshot's fixed assignments are part of the state but never move,
+        # and days outside its window are left as they are
+        self.frozen = [[False] * day_count for _ in self.trainee_ids]
+        # Fixed rows of trainees outside the snapshot only take capacity
+        self.extra_fill = [[0] * shift_count for _ in self.days]
+        for tid, date_obj, shift in snapshot.fixed:
+            d, s = day_index.get(date_obj), shift_index[shift]
+            if d is None:
+                continue
+            self.fill[d][s] += 1
+            t = trainee_index.get(tid)
+            if t is None:
+                self.extra_fill[d][s] += 1
+            else:
+                self.grid[t][d] = s
+                self.work[t] += 1
+                self.nights[t] += self.is_night[s]
+                self.frozen[t][d] = True
+        self.editable_days = [snapshot.in_window(date_obj) for date_obj in self.days]
+
+        # Streaks carried over from the previous month extend runs that start on day 1
+        carried = [snapshot.carry_in.get(tid) for tid in self.trainee_ids]
+        self.carry_work = [state.consecutive_work_days if state else 0 for state in carried]
+        self.carry_off = [state.consecutive_days_off if state else 0 for state in carried]
+        self.carry_night = [bool(state and state.worked_night_last_day) for state in carried]
+
+        # Under-filled slots, kept as a list + position map for O(1) random pick and removal
+        self.open_slots = []
+        self.open_position = {}
+        for d in range(day_count):
+            if not self.editable_days[d]:
+                continue
+            for s in range(shift_count):
+                if self.fill[d][s] < self.required[d][s]:
+                    self._open(d, s)
+
+        # Run-violation part of the objective per trainee, refreshed for the trainees a move touches
+        self.penalty = [self._violations(t) for t in range(len(self.trainee_ids))]
+        self.score = self.evaluate()
+        self.stats = {"tried": 0, "accepted": 0}
+
+    # --- objective -------------------------------------------------------
+
+    def breakdown(self) -> dict:
+        """Full objective and its components (scoring.score_grid)"""
+        return score_grid(
+            np.array(self.grid, dtype=np.int64).reshape(len(self.trainee_ids), len(self.days)),
+            np.array(self.required, dtype=np.int64).reshape(len(self.days), self.shift_count),
+            np.array(self.credit, dtype=np.int64),
+            np.array(self.full_leave, dtype=bool).reshape(len(self.trainee_ids), len(self.days)),
+            self.params,
+            np.array(self.carry_work, dtype=np.int64),
+            np.array(self.carry_off, dtype=np.int64),
+            np.array(self.carry_night, dtype=bool),
+            np.array(self.extra_fill, dtype=np.int64).reshape(len(self.days), self.shift_count),
+            self.is_night
+        )
+
+    def evaluate(self) -> int:
+        """Full objective; the search itself only ever adds deltas"""
+        return self.breakdown()["score"]
+
+    def _work_delta(self, t: int, change: int) -> int:
+        return total_delta(self.total_cap, self.work[t], change)
+
+    def _night_delta(self, t: int, change: int) -> int:
+        return night_delta(self.nights[t], change)
+
+    def _fill_delta(self, d: int, s: int, change: int) -> int:
+        return unfilled_delta(self.required[d][s], self.fill[d][s], change)
+
+    def _violations(self, t: int) -> int:
+        return row_violations(
+            self.grid[t], self.full_leave[t], self.max_work, self.max_off, self.post_night_off,
+            self.carry_work[t], self.carry_off[t], self.carry_night[t], self.is_night
+        )
+
+    def _accept(self, delta: int, touched: tuple) -> bool:
+        """Add the run-violation change of the touched trainees to an applied move; keep it if not worse"""
+        penalties = [self._violations(t) for t in touched]
+        delta += sum(penalties) - sum(self.penalty[t] for t in touched)
+        if delta > 0:
+            return False
+        for t, penalty in zip(touched, penalties):
+            self.penalty[t] = penalty
+        self.score += delta
+        return True
+
+    # --- state changes ---------------------------------------------------
+
+    def _open(self, d: int, s: int):
+        if (d, s) not in self.open_position:
+            self.open_position[(d, s)] = len(self.open_slots)
+            self.open_slots.append((d, s))
+
+    def _close(self, d: int, s: int):
+        position = self.open_position.pop((d, s), None)
+        if position is not None:
+            last = self.open_slots.pop()
+            if position < len(self.open_slots):
+                self.open_slots[position] = last
+                self.open_position[last] = position
+
+    def _set(self, t: int, d: int, s: int):
+        """Assign t to (d, s); t must be off on d"""
+        self.grid[t][d] = s
+        self.work[t] += 1
+        self.nights[t] += self.is_night[s]
+        self.fill[d][s] += 1
+        if self.fill[d][s] >= self.required[d][s]:
+            self._close(d, s)
+
+    def _clear(self, t: int, d: int):
+        s = self.grid[t][d]
+        self.grid[t][d] = OFF
+        self.work[t] -= 1
+        self.nights[t] -= self.is_night[s]
+        self.fill[d][s] -= 1
+        if self.fill[d][s] < self.required[d][s]:
+            self._open(d, s)
+
+    # --- hard constraints ------------------------------------------------
+
+    def _movable(self, t: int, d: int) -> bool:
+        return self.editable_days[d] and not self.frozen[t][d]
+
+    def _rests_after_night(self, t: int, d: int) -> bool:
+        if not self.post_night_off:
+            return False
+        return self.is_night[self.grid[t][d - 1]] if d > 0 else self.carry_night[t]
+
+    def _work_like(self, t: int, d: int) -> bool:
+        return self.grid[t][d] != OFF or self.full_leave[t][d] or self._rests_after_night(t, d)
+
+    def _run_ok(self, t: int, d: int) -> bool:
+        """Consecutive-work rule on the run of work-like days that contains day d"""
+        if not self._work_like(t, d):
+            return True
+        start = d
+        while start > 0 and self._work_like(t, start - 1):
+            start -= 1
+        row = self.grid[t]
+        carried = self.carry_work[t] if start == 0 else 0
+        x = start
+        while x < len(row) and self._work_like(t, x):
+            if row[x] != OFF and x - start + carried >= self.max_work:
+                return False
+            x += 1
+        return True
+
+    def _can_take(self, t: int, d: int, s: int, adds_work: bool = True) -> bool:
+        """Cheap checks for putting t on (d, s), ignoring whatever t currently does on d"""
+        if self.masks[t] >> (d * self.shift_count + s) & 1:
+            return False
+        if adds_work and self.work[t] >= self.total_cap:
+            return False
+        if self.is_night[s] and not self.is_night[self.grid[t][d]] and self.nights[t] >= self.night_cap:
+            return False
+        row = self.grid[t]
+        if self.post_night_off:
+            if self._rests_after_night(t, d):
+                return False
+            if self.is_night[s] and d + 1 < len(row) and row[d + 1] != OFF:
+                return False
+        return True
+
+    def _try_set(self, t: int, d: int, s: int) -> bool:
+        """Apply t -> (d, s) if the consecutive-work rule still holds, else leave state untouched"""
+        self._set(t, d, s)
+        if self._run_ok(t, d):
+            return True
+        self._clear(t, d)
+        return False
+
+    # --- moves -----------------------------------------------------------
+
+    def _move_fill(self) -> bool:
+        if not self.open_slots:
+            return False
+        d, s = self.rng.choice(self.open_slots)
+        t = self.rng.randrange(len(self.trainee_ids))
+        if self.grid[t][d] != OFF or not self._can_take(t, d, s):
+            return False
+        delta = self._fill_delta(d, s, 1) + self._work_delta(t, 1) + (self._night_delta(t, 1) if self.is_night[s] else 0)
+        if delta > 0 or not self._try_set(t, d, s):
+            return False
+        if self._accept(delta, (t,)):
+            return True
+        self._clear(t, d)
+        return False
+
+    def _move_transfer(self) -> bool:
+        d = self.rng.randrange(len(self.days))
+        a = self.rng.randrange(len(self.trainee_ids))
+        b = self.rng.randrange(len(self.trainee_ids))
+        s = self.grid[a][d]
+        if s == OFF or self.grid[b][d] != OFF or not self._movable(a, d) or not self._can_take(b, d, s):
+            return False
+        delta = self._work_delta(a, -1) + self._work_delta(b, 1)
+        if self.is_night[s]:
+            delta += self._night_delta(a, -1) + self._night_delta(b, 1)
+        if delta > 0:
+            return False
+        self._clear(a, d)
+        if self._try_set(b, d, s):
+            if self._accept(delta, (a, b)):
+                return True
+            self._clear(b, d)
+        self._set(a, d, s)
+        return False
+
+    def _move_swap(self) -> bool:
+        d = self.rng.randrange(len(self.days))
+        a = self.rng.randrange(len(self.trainee_ids))
+        b = self.rng.randrange(len(self.trainee_ids))
+        sa, sb = self.grid[a][d], self.grid[b][d]
+        if sa == OFF or sb == OFF or sa == sb or not self._movable(a, d) or not self._movable(b, d):
+            return False
+        if not self._can_take(a, d, sb, adds_work=False) or not self._can_take(b, d, sa, adds_work=False):
+            return False
+        delta = 0
+        change = self.is_night[sa] - self.is_night[sb]
+        if change:
+            delta = self._night_delta(a, -change) + self._night_delta(b, change)
+        if delta > 0:
+            return False
+        self._clear(a, d)
+        self._clear(b, d)
+        self._set(a, d, sb)
+        self._set(b, d, sa)
+        if self._run_ok(a, d) and self._run_ok(b, d) and self._accept(delta, (a, b)):
+            return True
+        self._clear(a, d)
+        self._clear(b, d)
+        self._set(a, d, sa)
+        self._set(b, d, sb)
+        return False
+
+    def _move_relocate(self) -> bool:
+        if not self.open_slots:
+            return False
+        d2, s2 = self.rng.choice(self.open_slots)
+        t = self.rng.randrange(len(self.trainee_ids))
+        d1 = self.rng.randrange(len(self.days))
+        s1 = self.grid[t][d1]
+        if s1 == OFF or d1 == d2 or self.grid[t][d2] != OFF or not self._movable(t, d1):
+            return False
+        if not self._can_take(t, d2, s2, adds_work=False):
+            return False
+        change = self.is_night[s2] - self.is_night[s1]
+        if change > 0 and self.nights[t] >= self.night_cap:
+            return False
+        delta = self._fill_delta(d1, s1, -1) + self._fill_delta(d2, s2, 1)
+        if change:
+            delta += self._night_delta(t, change)
+        if delta > 0:
+            return False
+        self._clear(t, d1)
+        self._set(t, d2, s2)
+        # Removing a night frees the day after it; re-check both ends
+        if self._run_ok(t, d2) and self._run_ok(t, d1) and not self._rests_after_night(t, d2) \
+                and self._accept(delta, (t,)):
+            return True
+        self._clear(t, d2)
+        self._set(t, d1, s1)
+        return False
+
+    # --- driver ----------------------------------------------------------
+
+    def run(self, budget_ms: float):
+        """Search until the budget is spent; returns the stats"""
+        moves = (self._move_fill, self._move_transfer, self._move_swap, self._move_relocate)
+        choose = self.rng.randrange
+        deadline = time.perf_counter() + budget_ms / 1000
+        tried = accepted = 0
+        while True:
+            for _ in range(CLOCK_INTERVAL):
+                if moves[choose(4)]():
+                    accepted += 1
+            tried += CLOCK_INTERVAL
+            if time.perf_counter() >= deadline:
+                break
+        self.stats = {"tried": tried, "accepted": accepted, "score": self.score}
+        return self.stats
+
+    def assignments(self) -> list[tuple]:
+        """The plan without the snapshot's fixed assignments"""
+        return [
+            (self.trainee_ids[t], self.days[d], self.shifts[s])
+            for d in range(len(self.days))
+            for t, row in enumerate(self.grid)
+            for s in (row[d],) if s != OFF and not self.frozen[t][d]
+        ]
+
+
+def improve(snapshot, assignments, budget_ms: float, seed: int = 0):
+    """Run the local search on a plan; returns (assignments, stats)"""
+    search = LocalSearch(snapshot, assignments, seed)
+    initial_score = search.score
+    stats = search.run(budget_ms)
+    return search.assignments(), {**stats, "initial_score": initial_score}
+
+
+def plan_score(snapshot, assignments) -> int:
+    """Objective value of a plan (lower is better), the same one the search minimizes"""
+    return score_plan(snapshot, assignments)["score"]
@@ -0,0 +1,77 @@
+"""
+Parallel multi-start randomized greedy.
+
+Runs K seeded variants of the greedy (random tie-break, slightly perturbed
+shift order) across a process pool and keeps the plan with the best
+objective score. Seeds are derived from a base seed and returned, so the
+winning plan can be reproduced exactly with `mode=greedy&seed=<winning_seed>`.
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .engine import ArrayScheduleEngine
+from .local_search import plan_score
+
+DEFAULT_STARTS = 16
+MAX_STARTS = 256
+
+
+def run_variant(snapshot, seed):
+    """Solve one variant; seed None is the deterministic greedy. Returns (score, seed, assignments)"""
+    assignments = ArrayScheduleEngine.from_snapshot(snapshot, seed).solve()
+    return plan_score(snapshot, assignments), seed, assignments
+
+
+def _run_chunk(snapshot, seeds):
+    # Only the best of a chunk travels back to the parent process
+    return min((run_variant(snapshot, seed) for seed in seeds), key=_rank)
+
+
+def _rank(result):
+    score, seed, _ = result
+    # Lowest score wins; the deterministic greedy (seed None) wins ties, then the lowest seed
+    return (score, -1 if seed is None else seed)
+
+
+def multistart(snapshot, starts: int = DEFAULT_STARTS, base_seed: int = None, workers: int = None, progress=None):
+    """
+    Returns (assignments, stats) of the best of `starts` randomized variants and the plain greedy.
+    progress(days_done, total_days) is reported as the share of finished chunks, scaled to days.
+    """
+    if base_seed is None:
+        base_seed = random.SystemRandom().randrange(2 ** 31)
+    seeds = [base_seed + i for i in range(starts)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(seeds)))
+
+    chunks = [seeds[i::workers] for i in range(workers)]
+    total_days = len(snapshot.days)
+
+    def report(finished):
+        if progress:
+            # The baseline run counts as one more chunk
+            progress(total_days * finished // (len(chunks) + 1), total_days)
+
+    results = []
+    if workers == 1:
+        for chunk in chunks:
+            results.append(_run_chunk(snapshot, chunk))
+            report(len(results))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_chunk, snapshot, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                results.append(future.result())
+                report(len(results))
+
+    baseline = run_variant(snapshot, None)
+    report(len(chunks) + 1)
+    score, winning_seed, assignments = min(results + [baseline], key=_rank)
+    return assignments, {
+        "base_seed": base_seed,
+        "starts": starts,
+        "workers": workers,
+        "winning_seed": winning_seed,
+        "score": score,
+        "baseline_score": baseline[0],
+    }
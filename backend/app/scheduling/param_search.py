@@ -0,0 +1,131 @@
+"""
+Parameter search.
+
+Finds the tightest limits (total shifts, pernoites, consecutive work days)
+that still fill the month, instead of tuning them by repeated generates.
+Every (night_shifts, max_consecutive_work_days) pair of the grid runs in a
+worker process, where total_shifts is bisected for the smallest value that
+reaches the target coverage with the in-memory greedy. Each trial is scored
+by coverage and fairness (spread of the per-trainee totals) and the Pareto
+set over the two is returned. Nothing is persisted.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from .engine import ArrayScheduleEngine
+
+# Upper bound for the number of (night_shifts, max_consecutive_work_days) pairs per search
+MAX_GRID = 64
+
+
+def evaluate(snapshot, total_shifts: int, night_shifts: int, max_consecutive_work_days: int) -> dict:
+    """Solve the snapshot with the given limits and score the plan"""
+    params = snapshot.params.with_overrides(
+        total_shifts=total_shifts, night_shifts=night_shifts, max_consecutive_work_days=max_consecutive_work_days
+    )
+    trial = snapshot.with_params(params)
+    assignments = ArrayScheduleEngine.from_snapshot(trial).solve()
+
+    # Per-trainee totals as the engine counts them: unavailability credit plus shifts
+    index = {tid: i for i, tid in enumerate(trial.trainee_ids)}
+    totals = trial.availability.unavailable_day_counts(list(trial.trainee_ids)) // 2
+    for tid, _, _ in (*trial.fixed, *assignments):
+        if tid in index:
+            totals[index[tid]] += 1
+    required = trial.required_slots
+    filled = len(assignments) + len(trial.fixed)
+
+    return {
+        "total_shifts": total_shifts,
+        "night_shifts": night_shifts,
+        "max_consecutive_work_days": max_consecutive_work_days,
+        "filled_slots": filled,
+        "coverage": round(filled / required, 4) if required else 1.0,
+        # Standard deviation of the per-trainee totals: lower is fairer
+        "fairness": round(float(np.std(totals)), 3) if len(totals) else 0.0,
+    }
+
+
+def bisect_total(snapshot, total_range: tuple, night_shifts: int, max_consecutive_work_days: int,
+                 target_coverage: float) -> list[dict]:
+    """
+    Trials of one (night_shifts, max_consecutive_work_days) pair: bisect the smallest
+    total_shifts in total_range whose coverage reaches the target (coverage grows with
+    the limit). If even the upper end misses the target, that single trial is returned.
+    """
+    lo, hi = total_range
+    trials = [evaluate(snapshot, hi, night_shifts, max_consecutive_work_days)]
+    if trials[0]["coverage"] < target_coverage:
+        return trials
+    while lo < hi:
+        mid = (lo + hi) // 2
+        trial = evaluate(snapshot, mid, night_shifts, max_consecutive_work_days)
+        trials.append(trial)
+        if trial["coverage"] >= target_coverage:
+            hi = mid
+        else:
+            lo = mid + 1
+    return trials
+
+
+def _run_pair(snapshot, total_range, pair, target_coverage):
+    return bisect_total(snapshot, total_range, *pair, target_coverage)
+
+
+def pareto_front(trials: list[dict]) -> list[dict]:
+    """Trials not dominated on (coverage up, fairness down); equal scores keep the tightest limits"""
+    def tightness(t):
+        return (t["total_shifts"], t["night_shifts"], t["max_consecutive_work_days"])
+
+    best = {}
+    for trial in sorted(trials, key=tightness):
+        best.setdefault((trial["coverage"], trial["fairness"]), trial)
+    candidates = list(best.values())
+    front = [
+        t for t in candidates
+        if not any(
+            o["coverage"] >= t["coverage"] and o["fairness"] <= t["fairness"] and
+            (o["coverage"], o["fairness"]) != (t["coverage"], t["fairness"])
+            for o in candidates
+        )
+    ]
+    return sorted(front, key=lambda t: (-t["coverage"], t["fairness"]))
+
+
+def search_parameters(snapshot, total_range: tuple, night_range: tuple, work_range: tuple,
+                      target_coverage: float = 1.0, workers: int = None) -> dict:
+    """
+    Search the grid night_range x work_range, bisecting total_range for each pair.
+    Ranges are inclusive (lo, hi). Returns the Pareto set, the tightest configuration
+    reaching the target (None if there is none) and the number of trials.
+    """
+    pairs = list(product(range(night_range[0], night_range[1] + 1), range(work_range[0], work_range[1] + 1)))
+    if not pairs or len(pairs) > MAX_GRID:
+        raise ValueError(f"The night_shifts x max_consecutive_work_days grid must have 1 to {MAX_GRID} points")
+    if total_range[0] > total_range[1]:
+        raise ValueError("total_shifts range is empty")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pairs)))
+    if workers == 1:
+        results = [_run_pair(snapshot, total_range, pair, target_coverage) for pair in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                _run_pair, [snapshot] * len(pairs), [total_range] * len(pairs), pairs, [target_coverage] * len(pairs)
+            ))
+    trials = [trial for pair_trials in results for trial in pair_trials]
+
+    reaching = [t for t in trials if t["coverage"] >= target_coverage]
+    tightest = min(
+        reaching, key=lambda t: (t["total_shifts"], t["night_shifts"], t["max_consecutive_work_days"]), default=None
+    )
+    return {
+        "target_coverage": target_coverage,
+        "trials": len(trials),
+        "workers": workers,
+        "tightest": tightest,
+        "pareto": pareto_front(trials),
+    }
@@ -0,0 +1,97 @@
+"""
+Reference implementation of the original per-slot greedy loop.
+
+Kept as a pure function so the array engine can be checked for exact parity
+and benchmarked against it. Not used by the API.
+"""
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+
+from ..models import Shift
+
+
+def solve_reference(trainee_ids, days: list[date], unavailable, capacity_map: dict, params: dict) -> list[tuple]:
+    trainee_ids = sorted(trainee_ids)
+    unavailability_lookup = set(unavailable)
+
+    trainee_date_unavailability = defaultdict(set)
+    for tid, date_obj, shift in unavailability_lookup:
+        if date_obj in days:
+            trainee_date_unavailability[tid].add(date_obj)
+
+    trainee_actual_work_counts = {tid: len(trainee_date_unavailability[tid]) // 2 for tid in trainee_ids}
+    trainee_night_shift_counts = {tid: 0 for tid in trainee_ids}
+    consecutive_work_days = {tid: 0 for tid in trainee_ids}
+    consecutive_days_off = {tid: 0 for tid in trainee_ids}
+
+    assignments = []
+    daily_assignments = defaultdict(set)
+    shifts_order = [Shift.pernoite, Shift.manha, Shift.tarde]
+
+    for current_date in days:
+        yesterday = current_date - timedelta(days=1)
+
+        for shift in shifts_order:
+            required_capacity = math.ceil(capacity_map.get((current_date, shift), 0) / 2)
+            if required_capacity <= 0:
+                continue
+
+            candidates = []
+            for tid in trainee_ids:
+                if (tid, current_date, shift) in unavailability_lookup:
+                    continue
+                if tid in daily_assignments[current_date]:
+                    continue
+                if params['post_night_shift_off']:
+                    worked_yesterday_night = False
+                    for a_tid, a_date, a_shift in assignments:
+                        if a_tid == tid and a_date == yesterday and a_shift == Shift.pernoite:
+                            worked_yesterday_night = True
+                            break
+                    if worked_yesterday_night:
+                        continue
+                if consecutive_work_days[tid] >= params['max_consecutive_work_days']:
+                    continue
+                if shift == Shift.pernoite and trainee_night_shift_counts[tid] >= params['night_shifts']:
+                    continue
+                if trainee_actual_work_counts[tid] >= params['total_shifts']:
+                    continue
+                candidates.append(tid)
+
+            def sort_key(tid):
+                night_score = trainee_night_shift_counts[tid] if shift == Shift.pernoite else 0
+                return (night_score, -consecutive_days_off[tid], trainee_actual_work_counts[tid], tid)
+
+            candidates.sort(key=sort_key)
+
+            for tid in candidates[:required_capacity]:
+                trainee_actual_work_counts[tid] += 1
+                if shift == Shift.pernoite:
+                    trainee_night_shift_counts[tid] += 1
+                daily_assignments[current_date].add(tid)
+                assignments.append((tid, current_date, shift))
+
+        for tid in trainee_ids:
+            worked_today = tid in daily_assignments[current_date]
+
+            is_post_night_rest = False
+            if params['post_night_shift_off']:
+                for a_tid, a_date, a_shift in assignments:
+                    if a_tid == tid and a_date == yesterday and a_shift == Shift.pernoite:
+                        is_post_night_rest = True
+                        break
+
+            is_fully_unavailable = all(
+                (tid, current_date, s) in unavailability_lookup
+                for s in [Shift.manha, Shift.tarde, Shift.pernoite]
+            )
+
+            if worked_today or is_post_night_rest or is_fully_unavailable:
+                consecutive_work_days[tid] += 1
+                consecutive_days_off[tid] = 0
+            else:
+                consecutive_days_off[tid] += 1
+                consecutive_work_days[tid] = 0
+
+    return assignments
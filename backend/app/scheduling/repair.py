@@ -0,0 +1,152 @@
+"""
+Incremental schedule repair.
+
+After a change to availability, capacity or parameters, an existing plan
+may break a hard constraint or leave slots under-filled. Instead of
+regenerating the month, `repair` drops only the assignments that became
+infeasible (or exceed a reduced capacity) and refills only the open slots,
+leaving every other assignment exactly where it was. The snapshot's fixed
+(pinned) assignments are never dropped.
+"""
+import numpy as np
+
+from .engine import NO_DEADLINE, priority_keys
+from .local_search import LocalSearch, OFF
+
+
+class ScheduleRepair(LocalSearch):
+    """Reuses the local-search grid, counters and hard-constraint checks"""
+
+    def drop(self, t: int, d: int):
+        self.removed.append((t, d, self.grid[t][d]))
+        self._clear(t, d)
+
+    def remove_infeasible(self):
+        """Drop assignments that now break a hard constraint or overfill their slot"""
+        self.removed = []
+        day_count = len(self.days)
+        shift_count = self.shift_count
+
+        # 1. Unavailable slots and post-night rest
+        for t, row in enumerate(self.grid):
+            for d in range(day_count):
+                s = row[d]
+                if s == OFF or self.frozen[t][d]:
+                    continue
+                if self.masks[t] >> (d * shift_count + s) & 1:
+                    self.drop(t, d)
+                elif self._rests_after_night(t, d):
+                    self.drop(t, d)
+
+        # 2. Reduced capacity: release the trainees with the most shifts first
+        for d in range(day_count):
+            for s in range(shift_count):
+                excess = self.fill[d][s] - self.required[d][s]
+                if excess > 0:
+                    holders = [t for t, row in enumerate(self.grid) if row[d] == s and not self.frozen[t][d]]
+                    holders.sort(key=lambda t: (-self.work[t], -self.trainee_ids[t]))
+                    for t in holders[:excess]:
+                        self.drop(t, d)
+
+        # 3. Total and night caps (latest shifts go first), then the consecutive-work rule
+        for t, row in enumerate(self.grid):
+            for d in reversed(range(day_count)):
+                if self.frozen[t][d]:
+                    continue
+                if row[d] != OFF and self.work[t] > self.total_cap:
+                    self.drop(t, d)
+                elif self.is_night[row[d]] and self.nights[t] > self.night_cap:
+                    self.drop(t, d)
+            for d in range(day_count):
+                if row[d] != OFF and not self.frozen[t][d] and not self._run_ok(t, d):
+                    self.drop(t, d)
+
+    def _off_run(self, t: int, d: int) -> tuple[int, int]:
+        """Off days right before d (carried-in streak included) and right after it; work-like days end them"""
+        before = 0
+        while before < d and not self._work_like(t, d - before - 1):
+            before += 1
+        if before == d:
+            before += self.carry_off[t]
+        after = 0
+        while d + after + 1 < len(self.days) and not self._work_like(t, d + after + 1):
+            after += 1
+        return before, after
+
+    def priority(self, candidates: list[int], d: int, s: int) -> np.ndarray:
+        """
+        The greedy's ranking keys (engine.priority_keys) for candidates of (d, s).
+        Day d is a candidate's last chance when staying off on it leaves an off
+        run longer than max_consecutive_days_off, the repaired-plan counterpart
+        of the greedy's lookahead; everyone else has no deadline.
+        """
+        runs = [self._off_run(t, d) for t in candidates]
+        days_off = np.array([before for before, _ in runs], dtype=np.int64)
+        critical = np.array([before + 1 + after > self.max_off for before, after in runs], dtype=bool)
+        last_chance = np.where(critical, 0, NO_DEADLINE)
+        nights = np.array([self.nights[t] if self.is_night[s] else 0 for t in candidates], dtype=np.int64)
+        work = np.array([self.work[t] for t in candidates], dtype=np.int64)
+        # Trainees are in id order, so the index is the id tie-break
+        return priority_keys(np.array(candidates, dtype=np.int64), last_chance, nights, days_off, work,
+                             len(self.trainee_ids))
+
+    def refill(self):
+        """Fill the open slots day by day, ranking candidates with the greedy's priority keys"""
+        self.added = []
+        open_slots = set(self.open_slots)
+        for d in range(len(self.days)):
+            for shift in self.categories.fill_order:
+                s = self.categories.index[shift]
+                if (d, s) not in open_slots:
+                    continue
+                candidates = [
+                    t for t, row in enumerate(self.grid)
+                    if row[d] == OFF and self._can_take(t, d, s)
+                ]
+                if not candidates:
+                    continue
+                keys = self.priority(candidates, d, s)
+                for i in np.argsort(keys, kind='stable'):
+                    t = candidates[i]
+                    if self.fill[d][s] >= self.required[d][s]:
+                        break
+                    if self._try_set(t, d, s):
+                        self.added.append((t, d, s))
+
+    def _as_rows(self, cells):
+        return [(self.trainee_ids[t], self.days[d], self.shifts[s]) for t, d, s in cells]
+
+
+def repair(snapshot, assignments):
+    """
+    Repair a plan against a (changed) snapshot.
+
+    `assignments` are the movable rows; the snapshot's fixed rows stay put.
+    Assignments of trainees that are no longer active, or of shift categories
+    that no longer exist, are dropped. Returns
+    (removed, added, stats): the (trainee_id, date, shift) rows to delete
+    and to insert. Everything else in the plan is kept as it is.
+    """
+    active = set(snapshot.trainee_ids)
+    days = set(snapshot.days)
+    shifts = snapshot.categories.index
+    removed = [a for a in assignments if a[0] not in active or a[1] not in days or a[2] not in shifts]
+    kept = [a for a in assignments if a[0] in active and a[1] in days and a[2] in shifts]
+
+    search = ScheduleRepair(snapshot, kept)
+    search.remove_infeasible()
+    search.refill()
+
+    # A row dropped and then given back to the same trainee is left alone
+    dropped = search._as_rows(search.removed)
+    added = search._as_rows(search.added)
+    unchanged = set(dropped) & set(added)
+    removed += [a for a in dropped if a not in unchanged]
+    added = [a for a in added if a not in unchanged]
+
+    return removed, added, {
+        "removed": len(removed),
+        "added": len(added),
+        "open_slots": len(search.open_slots),
+        "score": search.evaluate(),
+    }
@@ -0,0 +1,100 @@
+"""
+What-if scenario comparison.
+
+Solves the month's stored parameters (the baseline) and a list of
+parameter overrides from one snapshot, each scenario in its own worker
+process (a multistart inside a worker runs its variants serially, so the
+pools never nest), and condenses every plan into a few comparable numbers: filled
+slots, the per-trainee range of shifts and pernoites, and optionally the
+rows that differ from the baseline plan. Nothing is persisted.
+"""
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .categories import shift_key
+from .core import solve
+from .multistart import DEFAULT_STARTS
+
+# Upper bound for the number of scenarios in one comparison
+MAX_SCENARIOS = 16
+
+
+def _solve_scenario(snapshot, overrides, mode, budget_ms, seed, starts, solve_workers=None):
+    params = snapshot.params.with_overrides(**overrides)
+    plan = solve(snapshot.with_params(params), mode, budget_ms, seed, starts, workers=solve_workers)
+    return params, plan.assignments
+
+
+def summarize(snapshot, params, assignments) -> dict:
+    """Coverage and per-trainee spread of one plan"""
+    shifts = Counter(tid for tid, _, _ in assignments)
+    nights = Counter(tid for tid, _, shift in assignments if snapshot.categories.is_night(shift))
+    shift_counts = [shifts[tid] for tid in snapshot.trainee_ids] or [0]
+    night_counts = [nights[tid] for tid in snapshot.trainee_ids] or [0]
+    required = snapshot.required_slots
+    return {
+        "params": params.as_dict(),
+        "filled_slots": len(assignments),
+        "coverage": round(len(assignments) / required, 4) if required else 1.0,
+        "min_shifts": min(shift_counts),
+        "max_shifts": max(shift_counts),
+        "min_nights": min(night_counts),
+        "max_nights": max(night_counts),
+        "night_spread": max(night_counts) - min(night_counts),
+    }
+
+
+def diff(baseline, assignments) -> dict:
+    """Rows added and removed relative to the baseline plan"""
+    before, after = set(baseline), set(assignments)
+    return {
+        "added": [_as_dict(row) for row in sorted(after - before, key=_row_key)],
+        "removed": [_as_dict(row) for row in sorted(before - after, key=_row_key)],
+    }
+
+
+def _as_dict(row):
+    tid, date_obj, shift = row
+    return {"trainee_id": tid, "date": date_obj, "shift": shift}
+
+
+def _row_key(row):
+    tid, date_obj, shift = row
+    return date_obj, shift_key(shift), tid
+
+
+def compare_scenarios(snapshot, scenarios: list[dict], mode: str = "greedy", budget_ms: float = 0,
+                      seed: int = None, starts: int = DEFAULT_STARTS, include_diffs: bool = False,
+                      workers: int = None) -> tuple[int, list[dict]]:
+    """
+    Summaries of the baseline followed by one per scenario (solver overrides
+    dicts, None values keep the stored parameter). Every plan uses the same
+    mode and seed, so differences come from the parameters alone.
+    Returns (seed, summaries).
+    """
+    if not 1 <= len(scenarios) <= MAX_SCENARIOS:
+        raise ValueError(f"Between 1 and {MAX_SCENARIOS} scenarios can be compared at once")
+    if mode == "multistart" and seed is None:
+        # One base seed for all scenarios, otherwise each would draw its own
+        seed = random.SystemRandom().randrange(2 ** 31)
+    runs = [{}] + list(scenarios)
+    args = [(snapshot, overrides, mode, budget_ms, seed, starts) for overrides in runs]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(runs)))
+
+    if workers == 1:
+        results = [_solve_scenario(*a) for a in args]
+    else:
+        # Scenario workers already use the CPUs: no multistart pool inside them
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_solve_scenario, *zip(*args), [1] * len(args)))
+
+    baseline = results[0][1]
+    summaries = []
+    for i, (params, assignments) in enumerate(results):
+        summary = {"name": "baseline" if i == 0 else f"scenario {i}", **summarize(snapshot, params, assignments)}
+        if include_diffs and i > 0:
+            summary["diff"] = diff(baseline, assignments)
+        summaries.append(summary)
+    return seed, summaries
@@ -0,0 +1,185 @@
+"""
+Schedule objective.
+
+One objective for every solver mode, the improvement passes and the API,
+so scores are comparable wherever they are reported (lower is better):
+
+- unfilled slots (dominant)
+- distance of each trainee's total (unavailability credit included) to total_shifts
+- night balance (sum of squared pernoite counts)
+- consecutive-work violations: worked days past max_consecutive_work_days in a run
+  of work-like days (work, full-day leave, post-night rest), carried-in streaks included
+- consecutive-off violations: off days past max_consecutive_days_off in a run
+
+Night terms count the shifts of every night (pernoite) category.
+
+`score_grid` evaluates a whole (trainees x days) assignment matrix in one
+vectorized pass. The count-based terms change by O(1) for a single move
+(`unfilled_delta`, `total_delta`, `night_delta`); the run terms only change
+for the touched trainees and are re-evaluated on their row (`row_violations`,
+bounded by the month length).
+"""
+import math
+
+import numpy as np
+
+from .categories import DEFAULT_CATEGORIES
+
+OFF = -1
+
+# Objective weights: unfilled slots and broken work limits dominate, then
+# distance to total_shifts, night balance and long runs of days off
+UNFILLED_WEIGHT = 1000
+WORK_RUN_WEIGHT = 1000
+TOTAL_WEIGHT = 1
+NIGHT_WEIGHT = 1
+OFF_RUN_WEIGHT = 5
+
+
+def night_lookup(categories=DEFAULT_CATEGORIES) -> list[bool]:
+    """Night flag per shift index; the trailing entry makes lookup[OFF] False"""
+    return [bool(night) for night in categories.night] + [False]
+
+
+NIGHT_LOOKUP = night_lookup()
+
+
+# --- O(1) deltas -------------------------------------------------------------
+
+def unfilled_delta(required: int, fill: int, change: int) -> int:
+    """Objective change when a slot's fill changes by `change`"""
+    before = max(0, required - fill)
+    after = max(0, required - fill - change)
+    return UNFILLED_WEIGHT * (after - before)
+
+
+def total_delta(total_cap: int, work: int, change: int) -> int:
+    """Objective change when a trainee's total changes by `change`"""
+    gap = total_cap - work
+    return TOTAL_WEIGHT * ((gap - change) ** 2 - gap * gap)
+
+
+def night_delta(nights: int, change: int) -> int:
+    """Objective change when a trainee's night count changes by `change`"""
+    return NIGHT_WEIGHT * ((nights + change) ** 2 - nights * nights)
+
+
+# --- run terms ---------------------------------------------------------------
+
+def row_violations(row, full_leave, max_work: int, max_off: int, post_night_off: bool,
+                   carry_work: int = 0, carry_off: int = 0, carry_night: bool = False,
+                   night: list = NIGHT_LOOKUP) -> int:
+    """Weighted run violations of one trainee's row (shift index per day, OFF when off)"""
+    work_excess = off_excess = 0
+    work_run, off_run = carry_work, carry_off
+    night_before = carry_night
+    for d, s in enumerate(row):
+        if s != OFF or full_leave[d] or (post_night_off and night_before):
+            if s != OFF and work_run >= max_work:
+                work_excess += 1
+            work_run += 1
+            off_run = 0
+        else:
+            if off_run >= max_off:
+                off_excess += 1
+            off_run += 1
+            work_run = 0
+        night_before = night[s]
+    return WORK_RUN_WEIGHT * work_excess + OFF_RUN_WEIGHT * off_excess
+
+
+def _run_positions(values: np.ndarray, carry: np.ndarray) -> np.ndarray:
+    """(trainees, days) 0-based position of each True cell in its run; runs from day 1 continue `carry`"""
+    idx = np.arange(values.shape[1])
+    last_break = np.maximum.accumulate(np.where(values, -1, idx), axis=1)
+    return idx - last_break - 1 + np.where(last_break < 0, carry[:, None], 0)
+
+
+# --- full evaluation ---------------------------------------------------------
+
+def score_grid(grid: np.ndarray, required: np.ndarray, credit: np.ndarray, full_leave: np.ndarray, params,
+               carry_work: np.ndarray, carry_off: np.ndarray, carry_night: np.ndarray,
+               extra_fill: np.ndarray = None, night_shifts=NIGHT_LOOKUP) -> dict:
+    """
+    Objective of a (trainees, days) matrix of shift indices (OFF when off).
+    required is (days, shifts); extra_fill counts rows that take capacity but
+    belong to no trainee of the grid; night_shifts is a night_lookup().
+    Returns the score and its components.
+    """
+    worked = grid != OFF
+    night = np.array(night_shifts, dtype=bool)[grid]
+    fill = np.stack([(grid == s).sum(axis=0) for s in range(required.shape[1])], axis=1).reshape(required.shape)
+    if extra_fill is not None:
+        fill = fill + extra_fill
+    unfilled = int(np.maximum(required - fill, 0).sum())
+
+    work = credit + worked.sum(axis=1)
+    nights = night.sum(axis=1)
+
+    work_like = worked | full_leave
+    if params.post_night_shift_off and grid.shape[1]:
+        work_like[:, 1:] |= night[:, :-1]
+        work_like[:, 0] |= carry_night
+    work_excess = int((worked & (_run_positions(work_like, carry_work) >= params.max_consecutive_work_days)).sum())
+    off_excess = int((~work_like & (_run_positions(~work_like, carry_off) >= params.max_consecutive_days_off)).sum())
+
+    total_term = int(((params.total_shifts - work) ** 2).sum())
+    night_term = int((nights ** 2).sum())
+    score = (
+        UNFILLED_WEIGHT * unfilled + WORK_RUN_WEIGHT * work_excess + TOTAL_WEIGHT * total_term
+        + NIGHT_WEIGHT * night_term + OFF_RUN_WEIGHT * off_excess
+    )
+    return {
+        "score": score,
+        "unfilled": unfilled,
+        "work_violations": work_excess,
+        "off_violations": off_excess,
+        "total_deviation": total_term,
+        "night_balance": night_term,
+        "total_spread": int(work.max() - work.min()) if len(work) else 0,
+        "night_spread": int(nights.max() - nights.min()) if len(nights) else 0,
+    }
+
+
+def score_plan(snapshot, assignments) -> dict:
+    """
+    Objective of a plan for a core.ScheduleSnapshot. `assignments` are the
+    plan's own rows; the snapshot's fixed rows are added, as the solvers do.
+    """
+    trainee_ids = list(snapshot.trainee_ids)
+    days = list(snapshot.days)
+    trainee_index = {tid: i for i, tid in enumerate(trainee_ids)}
+    day_index = {d: i for i, d in enumerate(days)}
+    shift_index = snapshot.categories.index
+
+    required = np.zeros((len(days), len(shift_index)), dtype=np.int64)
+    for (date_obj, shift), total in snapshot.capacities.items():
+        d = day_index.get(date_obj)
+        if d is not None:
+            required[d, shift_index[shift]] = math.ceil(total / 2)
+
+    grid = np.full((len(trainee_ids), len(days)), OFF, dtype=np.int64)
+    extra_fill = np.zeros_like(required)
+    for tid, date_obj, shift in (*snapshot.fixed, *assignments):
+        d = day_index.get(date_obj)
+        if d is None or shift not in shift_index:
+            continue
+        t = trainee_index.get(tid)
+        if t is None:
+            extra_fill[d, shift_index[shift]] += 1
+        else:
+            grid[t, d] = shift_index[shift]
+
+    availability = snapshot.availability
+    carried = [snapshot.carry_in.get(tid) for tid in trainee_ids]
+    return score_grid(
+        grid, required,
+        availability.unavailable_day_counts(trainee_ids) // 2,
+        availability.full_leave_array(trainee_ids),
+        snapshot.params,
+        np.array([c.consecutive_work_days if c else 0 for c in carried], dtype=np.int64),
+        np.array([c.consecutive_days_off if c else 0 for c in carried], dtype=np.int64),
+        np.array([bool(c and c.worked_night_last_day) for c in carried], dtype=bool),
+        extra_fill,
+        night_lookup(snapshot.categories)
+    )
@@ -0,0 +1,44 @@
+"""
+Incremental top-N candidate selection.
+
+The ranking tuple (last_chance, night_score, urgency, total, id) is packed
+into a single int64 per trainee, so ordering candidates is an integer
+comparison. The key arrays are updated in place as counts and streaks
+change, and a slot picks its N best eligible trainees with a partial
+selection (O(T) + O(N log N)) instead of a full sort of every candidate.
+"""
+import numpy as np
+
+# Each ranking component gets FIELD_BITS bits; values are clamped to the field
+FIELD_BITS = 12
+FIELD_MAX = (1 << FIELD_BITS) - 1
+NO_CANDIDATE = np.iinfo(np.int64).max
+
+
+def pack_priority(tie_break, night_score, days_off, total, trainee_count: int, last_chance=0):
+    """
+    Pack (last_chance, night_score, -days_off, total, tie_break) into int64 keys,
+    lowest first. `tie_break` must be unique per trainee in 0..trainee_count-1
+    (the index, or a permutation of it); the other arguments are aligned with it
+    (or scalars). Four fields leave room for up to 2 ** 15 trainees.
+    """
+    urgency = FIELD_MAX - np.minimum(days_off, FIELD_MAX)  # longest time off first
+    key = np.minimum(last_chance, FIELD_MAX) << FIELD_BITS
+    key = (key + np.minimum(night_score, FIELD_MAX)) << FIELD_BITS
+    key = (key + urgency) << FIELD_BITS
+    key += np.minimum(total, FIELD_MAX)
+    return key * max(trainee_count, 1) + tie_break
+
+
+def take_top(keys: np.ndarray, mask: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n lowest keys among mask-eligible trainees, in key order"""
+    eligible_count = int(np.count_nonzero(mask))
+    n = min(n, eligible_count)
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    masked = np.where(mask, keys, NO_CANDIDATE)
+    if n < masked.size:
+        top = np.argpartition(masked, n - 1)[:n]
+    else:
+        top = np.arange(masked.size)
+    return top[np.argsort(masked[top], kind='stable')]
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-from datetime import date
-from .models import Shift
+from typing import List, Optional, Dict, Tuple
+from datetime import date, datetime
+from .models import JobStatus
 
 class MonthlyScheduleBase(BaseModel):
     month: str  # YYYY-MM
@@ -18,6 +18,8 @@ class MonthlyScheduleCreate(MonthlyScheduleBase):
 class MonthlySchedule(MonthlyScheduleBase):
     id: int
     created_at: date
+    generation_mode: Optional[str] = None
+    generation_seed: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -39,7 +41,7 @@ class Trainee(TraineeBase):
 
 class TraineeAvailabilityBase(BaseModel):
     date: date
-    shift: Shift
+    shift: str  # shift category key (scheduling.categories)
     available: bool
     reason: Optional[str] = None
 
@@ -54,9 +56,20 @@ class TraineeAvailability(TraineeAvailabilityBase):
     class Config:
         from_attributes = True
 
+class TraineeAvailabilityMask(BaseModel):
+    trainee_id: int
+    unavailable_mask: str  # hex bitmask, bit = (day - 1) * len(shifts) + shift position
+    unavailable_days: int
+    full_leave_days: List[date]
+
+class AvailabilityIndex(BaseModel):
+    month: str
+    shifts: List[str]
+    trainees: List[TraineeAvailabilityMask]
+
 class InstructorCapacityBase(BaseModel):
     date: date
-    shift: Shift
+    shift: str
     total_instructors: int
 
 class InstructorCapacityCreate(InstructorCapacityBase):
@@ -71,16 +84,17 @@ class InstructorCapacity(InstructorCapacityBase):
 
 class TraineeAssignmentBase(BaseModel):
     date: date
-    shift: Shift
+    shift: str
 
 class TraineeAssignmentCreate(TraineeAssignmentBase):
     trainee_id: int
 
 class AssignmentCreate(TraineeAssignmentBase):
-    pass
+    pinned: bool = True  # Manual edits survive regeneration unless unpinned
 
 class TraineeAssignment(TraineeAssignmentBase):
     id: int
+    pinned: bool = False
     trainee_id: int
     monthly_schedule_id: int
     trainee: Optional[Trainee] = None
@@ -91,6 +105,29 @@ class TraineeAssignment(TraineeAssignmentBase):
 class ScheduleGenerationRequest(BaseModel):
     month: str # YYYY-MM
 
+class ScheduleParameterOverrides(BaseModel):
+    """Optional overrides of the month's stored parameters (None = keep stored value)"""
+    params_total_shifts: Optional[int] = None
+    params_night_shifts: Optional[int] = None
+    params_max_consecutive_days_off: Optional[int] = None
+    params_max_consecutive_work_days: Optional[int] = None
+    params_unavailability_weight: Optional[int] = None
+    params_post_night_shift_off: Optional[bool] = None
+
+    def as_solver_overrides(self) -> Dict[str, object]:
+        return {key.removeprefix('params_'): value for key, value in self.model_dump().items()}
+
+class SchedulePreview(BaseModel):
+    month: str
+    mode: str
+    seed: Optional[int] = None
+    params: Dict[str, object]
+    required_slots: int
+    filled_slots: int
+    solve_ms: float
+    stats: Dict[str, object] = {}
+    assignments: List[TraineeAssignmentCreate]
+
 class BulkAvailabilityRequest(BaseModel):
     availabilities: List[TraineeAvailabilityBase]
 
@@ -109,6 +146,8 @@ class TurnoDefinition(BaseModel):
     turno_pricipal_id: Optional[int]
     turno_noturno: int
     duracao: int
+    categoria: Optional[str] = None  # scheduler shift category (scheduling.categories)
+    sobreaviso: int = 0
 
 class ShiftDefinitionCreate(TurnoDefinition):
     pass
@@ -117,6 +156,11 @@ class ShiftDefinition(TurnoDefinition):
     class Config:
         from_attributes = True
 
+class ShiftCategory(BaseModel):
+    key: str
+    name: str
+    night: bool
+
 class ShiftTotal(BaseModel):
     turno: int
     total: int
@@ -128,3 +172,108 @@ class DailyAvailability(BaseModel):
 class InstructorCapacityImportRequest(BaseModel):
     # shifts: List[TurnoDefinition] # Removed as we now use persisted definitions
     data: List[DailyAvailability]
+
+class ScheduleJob(BaseModel):
+    id: int
+    month: str
+    kind: str
+    status: JobStatus
+    options: Optional[Dict] = None
+    progress_done: int
+    progress_total: int
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class FeasibilityBottleneck(BaseModel):
+    date: date
+    shift: Optional[str] = None  # None: the whole day (one shift per trainee per day)
+    demand: int
+    supply: int
+    shortfall: int
+
+class SupplyDemand(BaseModel):
+    demand: int
+    supply: int
+    shortfall: int
+
+class FeasibilityReport(BaseModel):
+    month: str
+    feasible: bool
+    required_slots: int
+    month_totals: SupplyDemand
+    night: SupplyDemand
+    bottleneck_count: int
+    bottlenecks: List[FeasibilityBottleneck]
+
+class ParameterSearchRequest(BaseModel):
+    """Inclusive (min, max) ranges to search; None keeps the month's stored value"""
+    params_total_shifts: Optional[Tuple[int, int]] = None
+    params_night_shifts: Optional[Tuple[int, int]] = None
+    params_max_consecutive_work_days: Optional[Tuple[int, int]] = None
+    target_coverage: float = 1.0
+
+class ParameterSearchTrial(BaseModel):
+    total_shifts: int
+    night_shifts: int
+    max_consecutive_work_days: int
+    filled_slots: int
+    coverage: float
+    fairness: float  # std deviation of the per-trainee totals, lower is fairer
+
+class ParameterSearchResult(BaseModel):
+    month: str
+    required_slots: int
+    current: Dict[str, int]
+    target_coverage: float
+    trials: int
+    workers: int
+    search_ms: float
+    tightest: Optional[ParameterSearchTrial] = None
+    pareto: List[ParameterSearchTrial]
+
+class ScenarioRequest(BaseModel):
+    scenarios: List[ScheduleParameterOverrides]
+    include_diffs: bool = False
+
+class ScenarioDiff(BaseModel):
+    added: List[TraineeAssignmentCreate]
+    removed: List[TraineeAssignmentCreate]
+
+class ScenarioSummary(BaseModel):
+    name: str
+    params: Dict[str, object]
+    filled_slots: int
+    coverage: float
+    min_shifts: int
+    max_shifts: int
+    min_nights: int
+    max_nights: int
+    night_spread: int
+    diff: Optional[ScenarioDiff] = None
+
+class ScenarioComparison(BaseModel):
+    month: str
+    mode: str
+    seed: Optional[int] = None
+    required_slots: int
+    solve_ms: float
+    scenarios: List[ScenarioSummary]
+
+class ScheduleScore(BaseModel):
+    """Shared solver objective (lower is better) and its components"""
+    month: str
+    required_slots: int
+    score: int
+    unfilled: int
+    work_violations: int
+    off_violations: int
+    total_deviation: int
+    night_balance: int
+    total_spread: int
+    night_spread: int
@@ -0,0 +1,90 @@
+"""
+Unavailability text import.
+
+Streams the parsed entries once, expanding each date range into the days
+that fall inside the month, then resolves every name against the month's
+trainees in memory, inserts the missing trainees in one statement and
+writes all the unavailability rows with one bulk upsert. The new
+trainees and the rows are committed in a single transaction.
+"""
+import time
+from datetime import timedelta
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from ..parsers.text_parser import parse_unavailability_text
+
+
+def _month_days(entry: dict, first, last):
+    """Days of an entry's [start, end] range that fall inside the month"""
+    day = max(entry["start"].date(), first)
+    end = min(entry["end"].date(), last)
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def import_unavailability_text(db: Session, month: str, text) -> dict:
+    """
+    Import trainees and their unavailability from the text format (a string
+    or an iterable of lines). Every shift category of each day in an entry's
+    range is marked unavailable. Returns row counts and timings in ms.
+    """
+    started = time.perf_counter()
+    first, end = crud.month_bounds(month)
+    last = end - timedelta(days=1)
+
+    # 1. Parse and expand: (name, day, reason), a later entry wins for the same day
+    entries = skipped = 0
+    names = {}
+    days = {}
+    for entry in parse_unavailability_text(text):
+        if not entry.get("name") or not entry.get("start") or not entry.get("end"):
+            skipped += 1
+            continue
+        entries += 1
+        names.setdefault(entry["name"])
+        for day in _month_days(entry, first, last):
+            days[(entry["name"], day)] = entry.get("reason")
+    parsed = time.perf_counter()
+
+    # 2. Resolve names; missing trainees are inserted together
+    schedule = crud.get_or_create_monthly_schedule(db, month)
+    trainee_ids = crud.get_trainee_ids_by_name(db, schedule.id)
+    created = crud.bulk_insert_trainees(db, schedule.id, [name for name in names if name not in trainee_ids])
+    if created:
+        trainee_ids = crud.get_trainee_ids_by_name(db, schedule.id)
+    resolved = time.perf_counter()
+
+    # 3. One bulk upsert for every (trainee, day, shift category)
+    shifts = list(crud.get_shift_categories(db))
+    rows = crud.upsert(db, models.TraineeAvailability, [
+        {
+            'monthly_schedule_id': schedule.id,
+            'trainee_id': trainee_ids[name],
+            'date': day,
+            'shift': shift,
+            'available': False,
+            'reason': reason
+        }
+        for (name, day), reason in days.items()
+        for shift in shifts
+    ], key=('trainee_id', 'date', 'shift'), update=('available', 'reason'))
+    db.commit()
+    written = time.perf_counter()
+
+    return {
+        "status": "ok",
+        "imported_entries": entries,
+        "skipped_entries": skipped,
+        "trainees_affected": list(names),
+        "trainees_created": created,
+        "availability_rows": rows,
+        "timings_ms": {
+            "parse": round((parsed - started) * 1000, 2),
+            "resolve_trainees": round((resolved - parsed) * 1000, 2),
+            "write": round((written - resolved) * 1000, 2),
+            "total": round((written - started) * 1000, 2),
+        },
+    }
@@ -19,11 +19,8 @@ def load_shifts_from_json(db: Session):
             
         print(f"Loading {len(shifts_data)} shifts from {json_path}...")
         
-        for shift_dict in shifts_data:
-            # Ensure turno_pricipal_id is None if it's null in JSON (though json.load handles null as None)
-            # Create schema object
-            shift_create = schemas.ShiftDefinitionCreate(**shift_dict)
-            crud.create_shift_definition(db, shift_create)
+        # json.load already turns a null turno_pricipal_id into None
+        crud.bulk_upsert_shift_definitions(db, [schemas.ShiftDefinitionCreate(**shift_dict) for shift_dict in shifts_data])
             
         print("Shifts loaded successfully.")
         
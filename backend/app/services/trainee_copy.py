@@ -0,0 +1,99 @@
+"""
+Copy trainees from one month to the next.
+
+Trainees are per month, so a new month starts by copying the previous
+one's trainees (matched by name) with a single INSERT ... SELECT.
+Optionally their recurring unavailability is carried over too: a weekday
+and shift the trainee was unavailable on every week of the previous month
+(a weekly class, say) is marked unavailable on the same weekday of every
+week of the new month. A shift the trainee was unavailable for on every
+day of the month is leave, not a weekly pattern, and is not carried.
+Existing records of the new month are never overwritten.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+
+
+def _days(month: str) -> list:
+    first, end = crud.month_bounds(month)
+    return [first + timedelta(days=i) for i in range((end - first).days)]
+
+
+def recurring_unavailability(rows, previous_days, days) -> list[tuple]:
+    """
+    (name, date, shift, reason) rows over `days` for the weekly patterns in
+    `rows`, the previous month's (name, date, shift, reason) unavailability.
+    """
+    weekday_count = Counter(d.weekday() for d in previous_days)
+    by_pattern = defaultdict(dict)
+    by_shift = defaultdict(set)
+    for name, date_obj, shift, reason in rows:
+        by_pattern[(name, date_obj.weekday(), shift)][date_obj] = reason
+        by_shift[(name, shift)].add(date_obj)
+
+    carried = []
+    for (name, weekday, shift), dates in by_pattern.items():
+        if len(dates) < weekday_count[weekday] or len(by_shift[(name, shift)]) == len(previous_days):
+            continue
+        reason = dates[max(dates)]
+        carried.extend((name, d, shift, reason) for d in days if d.weekday() == weekday)
+    return carried
+
+
+def _availability_count(db: Session, schedule_id: int, month: str) -> int:
+    return db.query(models.TraineeAvailability).filter(
+        models.TraineeAvailability.monthly_schedule_id == schedule_id,
+        crud.in_month(models.TraineeAvailability.date, month)
+    ).count()
+
+
+def copy_from_previous_month(db: Session, month: str, previous_month: str, carry_availability: bool = False) -> dict:
+    """
+    Copy the previous month's trainees into `month` (names it already has are
+    skipped) and optionally their recurring unavailability, in a fixed number
+    of statements. Raises ValueError if the previous month has no trainees.
+    """
+    target = crud.get_or_create_monthly_schedule(db, month)
+    previous = crud.get_monthly_schedule(db, previous_month)
+    if not previous or not db.query(
+        db.query(models.Trainee).filter(models.Trainee.monthly_schedule_id == previous.id).exists()
+    ).scalar():
+        raise ValueError(f"No trainees found in previous month {previous_month}")
+
+    copied = crud.copy_trainees(db, previous.id, target.id)
+
+    carried = 0
+    if carry_availability:
+        rows = db.query(
+            models.Trainee.name,
+            models.TraineeAvailability.date,
+            models.TraineeAvailability.shift,
+            models.TraineeAvailability.reason
+        ).join(models.Trainee, models.TraineeAvailability.trainee_id == models.Trainee.id).filter(
+            models.TraineeAvailability.monthly_schedule_id == previous.id,
+            models.TraineeAvailability.available == False,
+            crud.in_month(models.TraineeAvailability.date, previous_month)
+        ).all()
+        trainee_ids = crud.get_trainee_ids_by_name(db, target.id)
+        # The upsert keeps rows the new month already has, so only the row count tells what was added
+        before = _availability_count(db, target.id, month)
+        crud.upsert(db, models.TraineeAvailability, [
+            {
+                'monthly_schedule_id': target.id,
+                'trainee_id': trainee_ids[name],
+                'date': date_obj,
+                'shift': shift,
+                'available': False,
+                'reason': reason
+            }
+            for name, date_obj, shift, reason in recurring_unavailability(rows, _days(previous_month), _days(month))
+            if name in trainee_ids
+        ], key=('trainee_id', 'date', 'shift'), update=())
+        carried = _availability_count(db, target.id, month) - before
+
+    db.commit()
+    return {"copied_count": copied, "carried_availability": carried}
@@ -0,0 +1,90 @@
+"""
+Benchmark: original per-slot greedy vs the array-backed engine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_engine --trainees 500
+    python -m benchmarks.bench_engine --trainees 5000 --per-slot 5 --skip-reference
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.engine import ArrayScheduleEngine
+from app.scheduling.reference import solve_reference
+
+PARAMS = {
+    'total_shifts': 18,
+    'night_shifts': 2,
+    'max_consecutive_days_off': 3,
+    'max_consecutive_work_days': 6,
+    'unavailability_weight': 1,
+    'post_night_shift_off': True
+}
+
+
+def make_instance(trainee_count, seed=0, per_slot=None, year=2025, month=11, last_day=30):
+    rng = random.Random(seed)
+    trainee_ids = list(range(1, trainee_count + 1))
+    days = [date(year, month, d) for d in range(1, last_day + 1)]
+
+    unavailable = []
+    for tid in trainee_ids:
+        for d in days:
+            roll = rng.random()
+            if roll < 0.05:
+                unavailable.extend((tid, d, s) for s in Shift)
+            elif roll < 0.15:
+                unavailable.append((tid, d, rng.choice(list(Shift))))
+
+    # By default, enough instructors to keep roughly 60% of the trainees busy every day
+    per_slot = per_slot or max(1, int(trainee_count * 0.2))
+    # Pernoite needs fewer trainees, as in the real capacity tables
+    capacity_map = {
+        (d, s): 2 * (max(1, per_slot // 3) if s == Shift.pernoite else per_slot)
+        for d in days for s in Shift
+    }
+    return trainee_ids, days, unavailable, capacity_map
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trainees", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-slot", type=int, default=None, help="trainees required per slot")
+    parser.add_argument("--skip-reference", action="store_true")
+    args = parser.parse_args()
+
+    trainee_ids, days, unavailable, capacity_map = make_instance(args.trainees, args.seed, args.per_slot)
+    print(f"{args.trainees} trainees, {len(days)} days, {len(unavailable)} unavailable slots")
+
+    # Without the days-off lookahead the engine reproduces the reference exactly
+    availability = AvailabilityIndex.from_rows(days, unavailable)
+    engine_result, engine_ms = timed(
+        lambda: ArrayScheduleEngine(trainee_ids, days, availability, capacity_map, PARAMS, lookahead=False).solve()
+    )
+    print(f"array engine: {engine_ms:10.1f} ms  ({len(engine_result)} assignments)")
+    lookahead_result, lookahead_ms = timed(
+        lambda: ArrayScheduleEngine(trainee_ids, days, availability, capacity_map, PARAMS).solve()
+    )
+    print(f"+ lookahead:  {lookahead_ms:10.1f} ms  ({len(lookahead_result)} assignments)")
+
+    if not args.skip_reference:
+        reference_result, reference_ms = timed(
+            lambda: solve_reference(trainee_ids, days, unavailable, capacity_map, PARAMS)
+        )
+        print(f"reference:    {reference_ms:10.1f} ms  ({len(reference_result)} assignments)")
+        print(f"speedup:      {reference_ms / engine_ms:10.1f}x")
+        print(f"parity:       {'OK' if reference_result == engine_result else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
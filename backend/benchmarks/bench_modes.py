@@ -0,0 +1,53 @@
+"""
+Benchmark: runtime and coverage of each solver mode on the same instance.
+
+Usage (from backend/):
+    python -m benchmarks.bench_modes --trainees 60 --per-slot 4
+    python -m benchmarks.bench_modes --trainees 60 --per-slot 4 --budget-ms 2000
+"""
+import argparse
+import time
+from collections import Counter
+
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.core import ScheduleParams, ScheduleSnapshot, MODES, solve
+from benchmarks.bench_engine import make_instance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trainees", type=int, default=60)
+    parser.add_argument("--per-slot", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--total-shifts", type=int, default=18)
+    parser.add_argument("--budget-ms", type=int, default=0, help="also run each mode followed by local search")
+    args = parser.parse_args()
+
+    trainee_ids, days, unavailable, capacity_map = make_instance(args.trainees, args.seed, args.per_slot)
+    params = ScheduleParams(total_shifts=args.total_shifts)
+    snapshot = ScheduleSnapshot.build(
+        "2025-11", days, trainee_ids, AvailabilityIndex.from_rows(days, unavailable), capacity_map, params
+    )
+    availability = snapshot.availability
+    credits = {tid: availability.unavailable_day_count(tid) // 2 for tid in trainee_ids}
+
+    print(f"{args.trainees} trainees, {args.per_slot} per slot, {snapshot.required_slots} slots to fill")
+    print(f"{'mode':12} {'ms':>9} {'filled':>8} {'coverage':>9} {'below target':>13} {'min':>4} {'max':>4}")
+    runs = [(mode, 0) for mode in MODES]
+    if args.budget_ms:
+        runs += [(mode, args.budget_ms) for mode in MODES]
+    for mode, budget_ms in runs:
+        label = f"{mode}+ls" if budget_ms else mode
+        start = time.perf_counter()
+        plan = solve(snapshot, mode, budget_ms, seed=args.seed if mode == "multistart" else None)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        worked = Counter(tid for tid, _, _ in plan.assignments)
+        totals = [worked[tid] + credits[tid] for tid in trainee_ids]
+        below = sum(1 for total in totals if total < params.total_shifts)
+        coverage = plan.filled_slots / snapshot.required_slots if snapshot.required_slots else 1.0
+        print(f"{label:12} {elapsed:9.1f} {plan.filled_slots:8} {coverage:9.1%} {below:13} {min(totals):4} {max(totals):4}")
+
+
+if __name__ == "__main__":
+    main()
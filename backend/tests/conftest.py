@@ -0,0 +1,46 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.database import Base
+from app.main import app
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh in-memory database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def client(db):
+    """API client whose requests use the `db` session"""
+    app.dependency_overrides[database.get_db] = lambda: db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def count_statements(db):
+    """Call to start recording the SQL statements run on `db`; returns the list they are appended to"""
+    def start():
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        return statements
+    return start
@@ -0,0 +1,66 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import types
+from datetime import date
+
+from app import crud, models
+from app.parsers.text_parser import parse_unavailability_text
+from app.services.availability_import import import_unavailability_text
+
+LEAVE_TEXT = """
+FÉRIASFER
+1
+Nome: Ana Souza
+Função: Estagiária
+Início: 28/10/2025
+Fim: 02/11/2025
+2
+Nome: Bruno Lima
+Início: 10/11/2025 13:00
+Fim: 11/11/2025 19:00
+Descrição: Curso
+Nome: Sem Datas
+RISAERRIS
+Nome: Ana Souza
+Início: 02/11/2025
+Fim: 02/11/2025
+"""
+
+
+def test_parser_streams_entries():
+    entries = parse_unavailability_text(iter(LEAVE_TEXT.splitlines()))
+
+    assert isinstance(entries, types.GeneratorType)
+    first = next(entries)
+    assert first["name"] == "Ana Souza" and first["reason"] == "FER"
+    assert [e["name"] for e in entries] == ["Bruno Lima", "Sem Datas", "Ana Souza"]
+
+
+def test_import_resolves_names_and_writes_in_bulk(db, count_statements):
+    schedule = crud.get_or_create_monthly_schedule(db, "2025-11")
+    db.add(models.Trainee(monthly_schedule_id=schedule.id, name="Bruno Lima", active=False))
+    db.commit()
+    statements = count_statements()
+
+    result = import_unavailability_text(db, "2025-11", LEAVE_TEXT)
+
+    assert result["imported_entries"] == 3
+    assert result["skipped_entries"] == 1
+    assert result["trainees_created"] == 1
+    assert sorted(result["trainees_affected"]) == ["Ana Souza", "Bruno Lima"]
+    # Ana: Nov 1-2 (the October days are outside the month); Bruno: Nov 10-11; three shifts each
+    assert result["availability_rows"] == 12
+    assert set(result["timings_ms"]) == {"parse", "resolve_trainees", "write", "total"}
+    assert len([s for s in statements if s.startswith("INSERT")]) == 2
+
+    # The existing trainee is reused as it is; the later entry's reason wins for Nov 2
+    trainees = {t.name: t for t in crud.get_trainees_for_month(db, "2025-11")}
+    assert len(trainees) == 2 and not trainees["Bruno Lima"].active
+    reasons = {
+        (a.trainee_id, a.date): a.reason for a in crud.get_all_availability_for_month(db, "2025-11")
+    }
+    assert reasons[(trainees["Ana Souza"].id, date(2025, 11, 1))] == "FER"
+    assert reasons[(trainees["Ana Souza"].id, date(2025, 11, 2))] == "RIS"
+    assert reasons[(trainees["Bruno Lima"].id, date(2025, 11, 10))] == "Curso"
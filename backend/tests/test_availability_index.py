@@ -0,0 +1,36 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date
+
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+
+DAYS = [date(2025, 11, d) for d in range(1, 31)]
+
+
+def test_index_bits_and_full_leave():
+    rows = [
+        (1, date(2025, 11, 3), Shift.manha),
+        (1, date(2025, 11, 3), Shift.tarde),
+        (1, date(2025, 11, 3), Shift.pernoite),
+        (1, date(2025, 11, 30), Shift.tarde),
+        (2, date(2025, 11, 4), Shift.pernoite),
+        (2, date(2025, 12, 1), Shift.manha),  # outside the month, ignored
+    ]
+    index = AvailabilityIndex.from_rows(DAYS, rows)
+
+    assert index.is_unavailable(1, date(2025, 11, 30), Shift.tarde)
+    assert not index.is_unavailable(1, date(2025, 11, 30), Shift.manha)
+    assert index.is_full_leave(1, date(2025, 11, 3))
+    assert not index.is_full_leave(2, date(2025, 11, 4))
+    assert index.full_leave_dates(1) == [date(2025, 11, 3)]
+    assert index.unavailable_day_count(1) == 2
+    assert index.unavailable_day_count(3) == 0
+    assert sorted(index.rows()) == sorted(rows[:5])
+
+    matrix = index.to_array([1, 2, 3])
+    assert matrix.shape == (3, 30, 3)
+    assert matrix.sum() == 5
+    assert index.full_leave_array([1, 2, 3]).sum(axis=1).tolist() == [1, 0, 0]
@@ -0,0 +1,69 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import mysql
+
+from app import crud, models, schemas
+
+
+def test_availability_import_takes_a_few_statements(db, count_statements):
+    schedule = crud.get_or_create_monthly_schedule(db, "2025-11")
+    trainees = [models.Trainee(monthly_schedule_id=schedule.id, name=f"T{i}") for i in range(100)]
+    db.add_all(trainees)
+    db.commit()
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(10)]
+    rows = [
+        schemas.TraineeAvailabilityCreate(trainee_id=t.id, date=d, shift=shift, available=False, reason="leave")
+        for t in trainees for d in days for shift in ("manha", "tarde", "pernoite")
+    ]
+    assert len(rows) == 3000
+
+    statements = count_statements()
+    assert crud.bulk_upsert_availability(db, "2025-11", rows) == 3000
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert len(inserts) == 3000 // crud.UPSERT_BATCH_SIZE
+    assert len(statements) < 10
+
+    # Existing rows are updated in place, not duplicated
+    changed = [rows[0].model_copy(update={"available": True, "reason": None})]
+    crud.bulk_upsert_availability(db, "2025-11", changed)
+    assert db.query(models.TraineeAvailability).count() == 3000
+    record = db.query(models.TraineeAvailability).filter_by(
+        trainee_id=rows[0].trainee_id, date=rows[0].date, shift=rows[0].shift
+    ).one()
+    assert record.available and record.reason is None
+
+
+def test_capacities_and_shift_definitions_upsert(db):
+    capacity = schemas.InstructorCapacityCreate(date=date(2025, 11, 3), shift="tarde", total_instructors=4)
+    crud.bulk_upsert_capacities(db, "2025-11", [capacity, capacity.model_copy(update={"total_instructors": 6})])
+    [stored] = crud.get_capacities(db, "2025-11")
+    assert stored.shift == models.Shift.tarde and stored.total_instructors == 6
+
+    definition = schemas.ShiftDefinitionCreate(
+        id=40, simbolo="i", nome="intermediário", inicio="10:00:00", fim="18:00:00", etapa=0,
+        complementar=0, turno_pricipal_id=None, turno_noturno=0, duracao=480
+    )
+    crud.bulk_upsert_shift_definitions(db, [definition])
+    [updated] = crud.bulk_upsert_shift_definitions(db, [definition.model_copy(update={"fim": "19:00:00"})])
+    assert updated.fim == "19:00:00"
+    assert db.query(models.ShiftDefinition).count() == 1
+
+
+def test_mysql_uses_on_duplicate_key_update():
+    executed = []
+    session = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=mysql.dialect()),
+        execute=executed.append
+    )
+    rows = [{"id": 1, "monthly_schedule_id": 1, "date": date(2025, 11, 1), "shift": "manha", "total_instructors": 2}]
+
+    crud.upsert(session, models.InstructorCapacity, rows, key=("monthly_schedule_id", "date", "shift"),
+                update=("total_instructors",))
+
+    sql = str(executed[0].compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE total_instructors" in sql
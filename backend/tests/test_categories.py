@@ -0,0 +1,144 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import json
+from collections import Counter
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app import crud, parser, schemas
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.categories import DEFAULT_CATEGORIES, ShiftCategories, bundled_definitions
+from app.scheduling.core import ScheduleParams, ScheduleSnapshot, MODES, solve
+from app.scheduling.feasibility import check_feasibility
+
+SHIFTS_JSON = os.path.join(os.path.dirname(__file__), "..", "app", "data", "shifts.json")
+
+
+def definition(id, simbolo, nome, complementar=0, turno_pricipal_id=None, turno_noturno=0, categoria=None,
+               sobreaviso=0):
+    return SimpleNamespace(
+        id=id, simbolo=simbolo, nome=nome, complementar=complementar,
+        turno_pricipal_id=turno_pricipal_id, turno_noturno=turno_noturno, categoria=categoria, sobreaviso=sobreaviso
+    )
+
+
+# An intermediate main shift with one complement
+INTERMEDIATE = [
+    definition(30, "i", "intermediário", categoria="intermediario"),
+    definition(31, "i2", "intermediário 2", complementar=1, turno_pricipal_id=30),
+]
+
+
+def test_bundled_definitions_give_the_built_in_categories():
+    categories = ShiftCategories.from_definitions(bundled_definitions())
+
+    assert categories.keys == (Shift.manha, Shift.tarde, Shift.pernoite)
+    assert categories.fill_order == (Shift.pernoite, Shift.manha, Shift.tarde)
+    # Complements count towards their main shift; OFF hangs off a standby block and belongs to none
+    assert categories.of_definition(4) == Shift.manha
+    assert categories.of_definition(21) is None
+    # Standby blocks are summed into pernoite by symbol but are not pernoite definitions
+    assert [categories.of_definition(i) for i in (14, 15, 16)] == [None] * 3
+    assert categories.of_symbol("SBP") == Shift.pernoite
+    assert ShiftCategories.from_definitions([]) == DEFAULT_CATEGORIES
+
+
+def test_new_main_definition_adds_a_category():
+    definitions = bundled_definitions() + INTERMEDIATE
+
+    categories = ShiftCategories.from_definitions(definitions)
+
+    assert len(categories) == 4
+    assert categories.keys == (Shift.manha, Shift.tarde, Shift.pernoite, "intermediario")
+    assert categories.of_definition(31) == "intermediario"
+    assert not categories.is_night("intermediario")
+    assert categories.fill_order[0] == Shift.pernoite
+
+
+def four_category_snapshot(seed: int):
+    categories = ShiftCategories.from_definitions([
+        definition(1, "m", "manhã", categoria="manha"),
+        definition(2, "t", "tarde", categoria="tarde"),
+        definition(3, "p", "pernoite", turno_noturno=1, categoria="pernoite"),
+        *INTERMEDIATE,
+    ])
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(30)]
+    trainee_ids = list(range(1, 13))
+    unavailable = [(tid, days[(tid * 7 + seed) % 30], shift) for tid in trainee_ids for shift in categories]
+    availability = AvailabilityIndex.from_rows(days, unavailable, categories.keys)
+    capacities = {(d, shift): 2 for d in days for shift in categories}
+    return ScheduleSnapshot.build(
+        "2025-11", days, trainee_ids, availability, capacities, ScheduleParams(total_shifts=12),
+        categories=categories
+    )
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_solvers_fill_every_category(mode):
+    snapshot = four_category_snapshot(0)
+
+    plan = solve(snapshot, mode, budget_ms=20, seed=1)
+
+    filled = Counter(shift for _, _, shift in plan.assignments)
+    assert set(filled) == set(snapshot.categories)
+    # One shift per trainee per day, and the night cap applies to the night category only
+    assert len({(tid, d) for tid, d, _ in plan.assignments}) == len(plan.assignments)
+    nights = Counter(tid for tid, _, shift in plan.assignments if shift == Shift.pernoite)
+    assert max(nights.values()) <= snapshot.params.night_shifts
+    assert plan.stats["score"]["unfilled"] == plan.required_slots - plan.filled_slots
+
+
+def test_snapshot_rejects_availability_of_other_categories():
+    snapshot = four_category_snapshot(0)
+    availability = AvailabilityIndex.from_rows(snapshot.days, [])
+
+    with pytest.raises(ValueError):
+        ScheduleSnapshot.build(
+            snapshot.month, snapshot.days, snapshot.trainee_ids, availability, dict(snapshot.capacities),
+            snapshot.params, categories=snapshot.categories
+        )
+    # The feasibility demand follows the categories too: one trainee per slot, four slots a day
+    assert check_feasibility(snapshot)["required_slots"] == 4 * len(snapshot.days)
+
+
+def import_bundled_definitions(db):
+    with open(SHIFTS_JSON, encoding="utf-8") as f:
+        crud.bulk_upsert_shift_definitions(db, [schemas.ShiftDefinitionCreate(**d) for d in json.load(f)])
+
+
+def test_capacity_imports_keep_their_standby_behaviour(db, client):
+    import_bundled_definitions(db)
+    totals = {1: 2, 4: 1, 3: 1, 14: 5, 15: 5, 16: 5, 21: 5}
+
+    response = client.post(
+        "/months/2025-11/instructor-capacity/import-json",
+        json=[{"data": "2025-11-01", "soma_total": [{"turno": t, "total": n} for t, n in totals.items()]}]
+    )
+
+    assert response.status_code == 200
+    capacities = {c.shift: c.total_instructors for c in crud.get_capacities(db, "2025-11")}
+    # Per-definition totals leave the standby blocks (and OFF) out of pernoite
+    assert capacities == {Shift.manha: 3, Shift.tarde: 0, Shift.pernoite: 1}
+
+    # The capacity tables sum their SBM / SBT / SBP rows into pernoite
+    table = "Turno Quant 01 01\nm 2 0 2\nt 2 0 3\np 1 0 1\nSBM 1 0 1\nSBP 1 0 1\nOFF 1 0 4"
+    rows = parser.parse_text_table(table, "2025-11", crud.get_shift_categories(db))
+    assert {row["shift"]: row["total_instructors"] for row in rows} == {
+        Shift.manha: 2, Shift.tarde: 3, Shift.pernoite: 3
+    }
+
+
+def test_definition_imports_without_categories_keep_the_stored_ones(db):
+    import_bundled_definitions(db)
+    with open(SHIFTS_JSON, encoding="utf-8") as f:
+        exported = [{k: v for k, v in d.items() if k not in ("categoria", "sobreaviso")} for d in json.load(f)]
+
+    # Definitions exported by the rostering system do not carry the scheduling columns
+    crud.bulk_upsert_shift_definitions(db, [schemas.ShiftDefinitionCreate(**d) for d in exported])
+
+    assert crud.get_shift_categories(db) == DEFAULT_CATEGORIES
@@ -0,0 +1,55 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import random
+from datetime import date
+
+import pytest
+
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.engine import ArrayScheduleEngine
+from app.scheduling.reference import solve_reference
+
+
+def make_instance(seed, trainee_count=40, year=2025, month=11, last_day=30):
+    """Random month: sparse partial unavailability, a few full-day leaves and uneven capacity"""
+    rng = random.Random(seed)
+    trainee_ids = rng.sample(range(1, 10 * trainee_count), trainee_count)
+    days = [date(year, month, d) for d in range(1, last_day + 1)]
+
+    unavailable = set()
+    for tid in trainee_ids:
+        for d in days:
+            roll = rng.random()
+            if roll < 0.05:
+                unavailable.update((tid, d, s) for s in Shift)
+            elif roll < 0.15:
+                unavailable.add((tid, d, rng.choice(list(Shift))))
+
+    capacity_map = {
+        (d, s): rng.randint(0, trainee_count // 4)
+        for d in days for s in Shift
+    }
+    return trainee_ids, days, sorted(unavailable), capacity_map
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("post_night_shift_off", [True, False])
+def test_array_engine_matches_reference_greedy(seed, post_night_shift_off):
+    trainee_ids, days, unavailable, capacity_map = make_instance(seed)
+    params = {
+        'total_shifts': 18,
+        'night_shifts': 2,
+        'max_consecutive_days_off': 3,
+        'max_consecutive_work_days': 6,
+        'unavailability_weight': 1,
+        'post_night_shift_off': post_night_shift_off
+    }
+
+    expected = solve_reference(trainee_ids, days, unavailable, capacity_map, params)
+    actual = ArrayScheduleEngine(trainee_ids, days, AvailabilityIndex.from_rows(days, unavailable), capacity_map, params,
+                                 lookahead=False).solve()
+
+    assert actual == expected
@@ -0,0 +1,96 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.core import ScheduleParams, ScheduleSnapshot, MODES, solve
+from app.scheduling.feasibility import check_feasibility
+from tests.test_solver_modes import make_snapshot
+
+
+def test_shortfalls_are_reported_per_slot_day_and_month():
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(3)]
+    capacities = {(d, shift): 4 for d in days for shift in Shift}
+    capacities[(days[1], Shift.pernoite)] = 6
+    # Trainee 2 is on leave on day 0
+    unavailable = [(2, days[0], shift) for shift in Shift]
+    snapshot = ScheduleSnapshot.build(
+        "2025-11", days, [1, 2, 3], AvailabilityIndex.from_rows(days, unavailable), capacities,
+        ScheduleParams(total_shifts=2, night_shifts=1)
+    )
+
+    report = check_feasibility(snapshot)
+
+    assert not report["feasible"]
+    assert report["required_slots"] == 19
+    # Three trainees can work at most 2 shifts each (one leave day gives trainee 2 no credit)
+    assert report["month_totals"] == {"demand": 19, "supply": 6, "shortfall": 13}
+    assert report["night"] == {"demand": 7, "supply": 3, "shortfall": 4}
+    # One shift per trainee per day caps every day, worst (ties by date) first
+    worst = report["bottlenecks"][0]
+    assert (worst["date"], worst["shift"]) == (days[0], None)
+    assert {(b["date"], b["shift"]) for b in report["bottlenecks"]} == {(d, None) for d in days}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_supply_bounds_hold_for_every_solver(seed):
+    snapshot = make_snapshot(seed, total_shifts=8, night_shifts=1)
+    report = check_feasibility(snapshot)
+    for mode in MODES:
+        plan = solve(snapshot, mode, seed=seed, starts=2)
+        assert plan.filled_slots <= report["month_totals"]["supply"]
+        assert sum(a[2] == Shift.pernoite for a in plan.assignments) <= report["night"]["supply"]
+    if report["month_totals"]["shortfall"]:
+        assert solve(snapshot).filled_slots < snapshot.required_slots
+
+
+def test_check_is_fast_on_a_large_month():
+    snapshot = make_snapshot(1, trainee_count=500)
+    start = time.perf_counter()
+    check_feasibility(snapshot)
+    assert time.perf_counter() - start < 0.25
+
+
+def test_only_open_window_slots_count():
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(4)]
+    capacities = {(d, Shift.manha): 2 for d in days}
+    # Day 0 cannot be filled by anyone, but a regeneration of days 2-3 does not re-solve it
+    unavailable = [(tid, days[0], Shift.manha) for tid in (1, 2)]
+    snapshot = ScheduleSnapshot.build(
+        "2025-11", days, [1, 2], AvailabilityIndex.from_rows(days, unavailable), capacities,
+        ScheduleParams(total_shifts=5)
+    )
+    assert not check_feasibility(snapshot)["feasible"]
+
+    window = snapshot.with_fixed([(1, days[1], Shift.manha)], (days[2], days[3]))
+    report = check_feasibility(window)
+
+    assert report["feasible"]
+    assert report["required_slots"] == 2
+    assert report["month_totals"]["demand"] == 2
+
+
+def test_fixed_rows_take_their_slot_not_a_bottleneck():
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(3)]
+    capacities = {(d, Shift.manha): 2 for d in days}
+    # Trainee 1 is pinned on a day they later marked unavailable; trainee 9 is no longer active
+    unavailable = [(1, days[0], shift) for shift in Shift]
+    snapshot = ScheduleSnapshot.build(
+        "2025-11", days, [1, 2], AvailabilityIndex.from_rows(days, unavailable), capacities,
+        ScheduleParams(total_shifts=2),
+        fixed=[(1, days[0], Shift.manha), (9, days[1], Shift.manha)]
+    )
+
+    report = check_feasibility(snapshot)
+
+    assert report["bottlenecks"] == []
+    assert report["month_totals"]["demand"] == 1
+    # Trainee 1's pinned shift leaves them one of their 2; trainee 2 can give both
+    assert report["month_totals"]["supply"] == 1 + 2
+    assert report["feasible"]
@@ -0,0 +1,69 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date
+
+from sqlalchemy import event
+
+from app import crud, models
+
+MONTH_TABLES = ("trainee_availability", "instructor_capacity", "trainee_assignments")
+
+
+def seed(db):
+    schedule = crud.get_or_create_monthly_schedule(db, "2025-12")
+    trainee = models.Trainee(monthly_schedule_id=schedule.id, name="Ana")
+    db.add(trainee)
+    db.flush()
+    for day in (1, 31):
+        d = date(2025, 12, day)
+        db.add(models.TraineeAvailability(
+            monthly_schedule_id=schedule.id, trainee_id=trainee.id, date=d, shift=models.Shift.manha, available=False
+        ))
+        db.add(models.InstructorCapacity(
+            monthly_schedule_id=schedule.id, date=d, shift=models.Shift.manha, total_instructors=2
+        ))
+        db.add(models.TraineeAssignment(
+            monthly_schedule_id=schedule.id, trainee_id=trainee.id, date=d, shift=models.Shift.tarde
+        ))
+    db.commit()
+    return trainee
+
+
+def test_month_bounds_are_half_open():
+    assert crud.month_bounds("2025-02") == (date(2025, 2, 1), date(2025, 3, 1))
+    assert crud.month_bounds("2025-12") == (date(2025, 12, 1), date(2026, 1, 1))
+
+
+def test_month_queries_use_an_index(db):
+    trainee = seed(db)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and any(table in statement for table in MONTH_TABLES):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        # The whole month, including its last day, and nothing from the next one
+        assert len(crud.get_availability(db, trainee.id, "2025-12")) == 2
+        assert len(crud.get_all_availability_for_month(db, "2025-12")) == 2
+        assert len(list(crud.get_availability_index(db, "2025-12").rows())) == 2
+        assert len(crud.get_capacities(db, "2025-12")) == 2
+        assert len(crud.get_assignments(db, "2025-12")) == 2
+        assert crud.count_assignments(db, "2025-12") == 2
+        assert crud.get_assignments(db, "2026-01") == []
+        crud.delete_assignments_for_trainee(db, "2025-12", trainee.id)
+        crud.delete_assignments_for_month(db, "2025-12")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert statements
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            steps = [step for step in plan if step.split(" ")[1] in MONTH_TABLES]
+            # Not "SCAN <table>": an index lookup that narrows by the date range too
+            assert steps and all(step.startswith("SEARCH") and "date>?" in step for step in steps), (statement, plan)
@@ -0,0 +1,51 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import pytest
+
+from app.scheduling.param_search import evaluate, pareto_front, search_parameters
+from tests.test_solver_modes import make_snapshot
+
+
+def test_bisection_finds_the_smallest_total_that_reaches_the_target():
+    snapshot = make_snapshot(0)
+    result = search_parameters(snapshot, (1, 30), (2, 2), (6, 6), target_coverage=0.9, workers=1)
+
+    tightest = result["tightest"]
+    assert tightest["coverage"] >= 0.9
+    below = evaluate(snapshot, tightest["total_shifts"] - 1, 2, 6)
+    assert below["coverage"] < 0.9
+    # Bisection: the upper bound plus about log2(30) probes
+    assert result["trials"] <= 7
+
+
+def test_pareto_set_is_not_dominated_and_parallel_matches_serial():
+    snapshot = make_snapshot(1)
+    serial = search_parameters(snapshot, (4, 20), (1, 3), (4, 6), workers=1)
+    parallel = search_parameters(snapshot, (4, 20), (1, 3), (4, 6), workers=3)
+
+    assert parallel["pareto"] == serial["pareto"]
+    assert parallel["tightest"] == serial["tightest"]
+    front = serial["pareto"]
+    assert front
+    for trial in front:
+        assert not any(
+            o["coverage"] >= trial["coverage"] and o["fairness"] <= trial["fairness"] and o != trial
+            for o in front
+        )
+
+
+def test_pareto_front_keeps_the_tightest_of_equal_scores():
+    trials = [
+        {"total_shifts": 10, "night_shifts": 2, "max_consecutive_work_days": 6, "coverage": 1.0, "fairness": 1.5},
+        {"total_shifts": 8, "night_shifts": 2, "max_consecutive_work_days": 6, "coverage": 1.0, "fairness": 1.5},
+        {"total_shifts": 6, "night_shifts": 2, "max_consecutive_work_days": 6, "coverage": 0.8, "fairness": 0.5},
+        {"total_shifts": 6, "night_shifts": 1, "max_consecutive_work_days": 6, "coverage": 0.7, "fairness": 0.9},
+    ]
+    assert [t["total_shifts"] for t in pareto_front(trials)] == [8, 6]
+
+
+def test_grid_size_is_bounded():
+    with pytest.raises(ValueError):
+        search_parameters(make_snapshot(0), (1, 30), (0, 10), (1, 10))
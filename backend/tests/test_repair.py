@@ -0,0 +1,100 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import math
+from collections import Counter
+from datetime import date, timedelta
+
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.core import ScheduleParams, ScheduleSnapshot, solve
+from app.scheduling.repair import repair
+from app.scheduling.scoring import score_plan
+from tests.test_solver_modes import make_snapshot, assert_hard_constraints
+
+
+def apply(assignments, removed, added):
+    return (set(assignments) - set(removed)) | set(added)
+
+
+def test_repair_of_an_unchanged_plan_is_a_no_op():
+    snapshot = make_snapshot(2, total_shifts=12, night_shifts=3)
+    plan = solve(snapshot)
+    removed, added, stats = repair(snapshot, list(plan.assignments))
+    assert removed == added == []
+
+
+def test_new_unavailability_only_touches_the_affected_slot():
+    snapshot = make_snapshot(3, total_shifts=12, night_shifts=3)
+    assignments = list(solve(snapshot).assignments)
+
+    # The first trainee of the middle day becomes unavailable for that shift
+    tid, day, shift = next(a for a in assignments if a[1] == snapshot.days[15])
+    changed = snapshot.__class__.build(
+        snapshot.month, snapshot.days, snapshot.trainee_ids,
+        AvailabilityIndex.from_rows(snapshot.days, list(snapshot.availability.rows()) + [(tid, day, shift)]),
+        dict(snapshot.capacities), snapshot.params
+    )
+
+    removed, added, stats = repair(changed, assignments)
+
+    assert removed == [(tid, day, shift)]
+    assert all(a not in assignments for a in added)
+    assert len(added) <= 1
+    assert_hard_constraints(changed, apply(assignments, removed, added))
+
+
+def test_reduced_capacity_releases_only_the_excess():
+    snapshot = make_snapshot(4, total_shifts=12, night_shifts=3)
+    assignments = list(solve(snapshot).assignments)
+
+    # The busiest slot loses capacity for two trainees
+    day, shift = max(Counter((a[1], a[2]) for a in assignments).items(), key=lambda item: item[1])[0]
+    holders = [a for a in assignments if a[1] == day and a[2] == shift]
+    capacities = dict(snapshot.capacities)
+    capacities[(day, shift)] = 2 * (len(holders) - 2)
+    changed = snapshot.__class__.build(
+        snapshot.month, snapshot.days, snapshot.trainee_ids, snapshot.availability, capacities, snapshot.params
+    )
+
+    removed, added, stats = repair(changed, assignments)
+
+    assert len(removed) == 2 and set(removed) <= set(holders)
+    repaired = apply(assignments, removed, added)
+    assert sum(1 for a in repaired if a[1] == day and a[2] == shift) == math.ceil(capacities[(day, shift)] / 2)
+    assert_hard_constraints(changed, repaired)
+
+
+def test_refill_ranks_candidates_like_the_greedy():
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(7)]
+    capacities = {(d, Shift.manha): 2 for d in days}
+    # Trainee 3 cannot take day 3; trainee 2's tarde unavailability credits them one more shift than trainee 1
+    unavailable = [(3, days[3], Shift.manha)] + [(2, days[i], Shift.tarde) for i in (2, 4, 5, 6)]
+    snapshot = ScheduleSnapshot.build(
+        "2025-11", days, [1, 2, 3], AvailabilityIndex.from_rows(days, unavailable), capacities,
+        ScheduleParams(total_shifts=10, max_consecutive_days_off=3)
+    )
+    plan = [(1, days[0], Shift.manha), (2, days[1], Shift.manha), (3, days[2], Shift.manha),
+            (1, days[4], Shift.manha), (3, days[5], Shift.manha), (3, days[6], Shift.manha)]
+
+    removed, added, stats = repair(snapshot, plan)
+
+    # Trainee 1 has fewer shifts and more days off so far, but only day 3 keeps trainee 2
+    # within 3 days off in a row: like the greedy's lookahead, the critical trainee goes first
+    assert removed == []
+    assert added == [(2, days[3], Shift.manha)]
+    assert stats["score"] == score_plan(snapshot, plan + added)["score"]
+    assert score_plan(snapshot, plan + added)["off_violations"] == 0
+
+
+def test_rows_of_removed_categories_are_dropped():
+    snapshot = make_snapshot(6, total_shifts=12, night_shifts=3)
+    assignments = list(solve(snapshot).assignments)
+    stale = (assignments[0][0], assignments[0][1], "extinct")
+    rows = [stale] + [a for a in assignments if a[:2] != stale[:2]]
+
+    removed, added, stats = repair(snapshot, rows)
+
+    assert stale in removed
+    assert_hard_constraints(snapshot, apply(rows, removed, added) - {stale})
@@ -0,0 +1,69 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+import pytest
+
+from app.models import Shift
+from app.scheduling.core import solve
+from app.scheduling.scenarios import compare_scenarios
+from tests.test_solver_modes import make_snapshot
+
+
+def test_scenarios_match_individual_solves_and_diff_against_baseline():
+    snapshot = make_snapshot(2)
+    scenarios = [{"post_night_shift_off": False}, {"total_shifts": 6, "night_shifts": None}]
+    seed, summaries = compare_scenarios(snapshot, scenarios, include_diffs=True, workers=3)
+
+    assert [s["name"] for s in summaries] == ["baseline", "scenario 1", "scenario 2"]
+    assert "diff" not in summaries[0]
+    baseline = set(solve(snapshot).assignments)
+    for summary, overrides in zip(summaries[1:], scenarios):
+        plan = solve(snapshot.with_params(snapshot.params.with_overrides(**overrides)))
+        assert summary["filled_slots"] == plan.filled_slots
+        assert summary["params"] == plan.params.as_dict()
+        nights = [sum(1 for a in plan.assignments if a[0] == tid and a[2] == Shift.pernoite)
+                  for tid in snapshot.trainee_ids]
+        assert summary["night_spread"] == max(nights) - min(nights)
+        added = {(r["trainee_id"], r["date"], r["shift"]) for r in summary["diff"]["added"]}
+        removed = {(r["trainee_id"], r["date"], r["shift"]) for r in summary["diff"]["removed"]}
+        assert (baseline - removed) | added == set(plan.assignments)
+
+    assert summaries[2]["max_shifts"] <= 6
+    assert seed is None
+
+
+def test_scenario_count_is_bounded():
+    with pytest.raises(ValueError):
+        compare_scenarios(make_snapshot(0), [])
+
+
+def test_multistart_scenarios_do_not_nest_process_pools(monkeypatch):
+    from app.scheduling import multistart, scenarios
+
+    class InProcessExecutor:
+        def __init__(self, max_workers):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, fn, *iterables):
+            return map(fn, *iterables)
+
+    def nested_pool(*args, **kwargs):
+        raise AssertionError("multistart started a process pool inside a scenario worker")
+
+    monkeypatch.setattr(scenarios, "ProcessPoolExecutor", InProcessExecutor)
+    monkeypatch.setattr(multistart, "ProcessPoolExecutor", nested_pool)
+    monkeypatch.setattr(multistart.os, "cpu_count", lambda: 8)
+    snapshot = make_snapshot(3)
+
+    seed, summaries = compare_scenarios(snapshot, [{"total_shifts": 6}], mode="multistart", starts=4, workers=2)
+
+    # Serial variants pick the same winner as a pool: the plan does not depend on the pool size
+    plan = solve(snapshot, "multistart", seed=seed, starts=4, workers=1)
+    assert summaries[0]["filled_slots"] == plan.filled_slots
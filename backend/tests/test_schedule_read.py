@@ -0,0 +1,49 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date
+
+import pytest
+
+from app import crud, models
+
+
+@pytest.mark.parametrize("size", [2, 40])
+def test_schedule_read_does_not_load_trainees_one_by_one(db, client, size, count_statements):
+    schedule = crud.get_or_create_monthly_schedule(db, "2025-11")
+    trainees = [models.Trainee(monthly_schedule_id=schedule.id, name=f"T{i}") for i in range(size)]
+    db.add_all(trainees)
+    db.flush()
+    db.add_all(
+        models.TraineeAssignment(monthly_schedule_id=schedule.id, trainee_id=t.id, date=date(2025, 11, day), shift=models.Shift.manha)
+        for t in trainees for day in (3, 4, 5, 6)
+    )
+    db.commit()
+    db.expire_all()
+    statements = count_statements()
+
+    response = client.get("/months/2025-11/schedule")
+
+    assignments = response.json()
+    assert len(assignments) == size * 4
+    assert all(a["trainee"]["id"] == a["trainee_id"] for a in assignments)
+    # The schedule, its assignments and their trainees
+    assert len(statements) == 3
+
+
+def test_plain_assignment_reads_leave_trainees_unloaded(db, count_statements):
+    schedule = crud.get_or_create_monthly_schedule(db, "2025-11")
+    trainee = models.Trainee(monthly_schedule_id=schedule.id, name="T0")
+    db.add(trainee)
+    db.flush()
+    db.add(models.TraineeAssignment(monthly_schedule_id=schedule.id, trainee_id=trainee.id, date=date(2025, 11, 3), shift=models.Shift.manha))
+    db.commit()
+    db.expire_all()
+    statements = count_statements()
+
+    assignments = crud.get_assignments(db, "2025-11")
+
+    # The solver paths only need the assignment columns: no trainee query
+    assert len(assignments) == 1
+    assert len(statements) == 2
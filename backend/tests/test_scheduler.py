@@ -0,0 +1,493 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import Base, get_db
+from app import models, scheduler, crud, jobs
+
+MONTH = "2025-11"
+
+engine = create_engine(
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def make_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return TestingSessionLocal()
+
+
+def seed_month(db, trainee_count=12, instructors=4):
+    """Create a month with trainees, full capacity and a few unavailabilities"""
+    schedule = crud.get_or_create_monthly_schedule(db, MONTH)
+    trainees = [
+        models.Trainee(monthly_schedule_id=schedule.id, name=f"Trainee {i:03d}", active=True)
+        for i in range(trainee_count)
+    ]
+    db.add_all(trainees)
+    db.flush()
+    for day in range(1, 31):
+        for shift in models.Shift:
+            db.add(models.InstructorCapacity(
+                monthly_schedule_id=schedule.id,
+                date=date(2025, 11, day),
+                shift=shift,
+                total_instructors=instructors
+            ))
+    for day in range(3, 8):
+        for shift in models.Shift:
+            db.add(models.TraineeAvailability(
+                monthly_schedule_id=schedule.id,
+                trainee_id=trainees[0].id,
+                date=date(2025, 11, day),
+                shift=shift,
+                available=False,
+                reason="FER"
+            ))
+    db.add(models.TraineeAvailability(
+        monthly_schedule_id=schedule.id,
+        trainee_id=trainees[1].id,
+        date=date(2025, 11, 10),
+        shift=models.Shift.manha,
+        available=False
+    ))
+    db.commit()
+    return schedule
+
+
+def seed_december(db, trainee_count=12, instructors=4):
+    """December with the same trainees as seed_month (new rows, matched by name) and full capacity"""
+    december = crud.get_or_create_monthly_schedule(db, "2025-12")
+    trainees = [
+        models.Trainee(monthly_schedule_id=december.id, name=f"Trainee {i:03d}", active=True)
+        for i in range(trainee_count)
+    ]
+    db.add_all(trainees)
+    db.flush()
+    for day in range(1, 32):
+        for shift in models.Shift:
+            db.add(models.InstructorCapacity(monthly_schedule_id=december.id, date=date(2025, 12, day),
+                                             shift=shift, total_instructors=instructors))
+    db.commit()
+    return trainees
+
+def test_generate_schedule_persists_plan_in_one_pass():
+    db = make_db()
+    seed_month(db)
+
+    result = scheduler.generate_schedule(db, MONTH)
+
+    assignments = crud.get_assignments(db, MONTH)
+    assert result["assignments"] == len(assignments) > 0
+    assert set(result["timings"]) == {"load_ms", "check_ms", "solve_ms", "persist_ms"}
+
+    # Regenerating replaces the previous plan instead of appending to it
+    result_again = scheduler.generate_schedule(db, MONTH)
+    assert len(crud.get_assignments(db, MONTH)) == result_again["assignments"]
+
+    # Unavailable slots are never assigned
+    on_leave = {a.date for a in assignments if a.trainee.name == "Trainee 000"}
+    assert not on_leave & {date(2025, 11, d) for d in range(3, 8)}
+
+    # The stored schedule scores exactly as the solver reported it
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        response = TestClient(app).get(f"/months/{MONTH}/schedule/score")
+    finally:
+        app.dependency_overrides.pop(get_db)
+    assert response.status_code == 200
+    assert response.json()["score"] == result["stats"]["score"]["score"]
+    db.close()
+
+
+def test_generate_skips_work_when_inputs_are_unchanged():
+    db = make_db()
+    schedule = seed_month(db)
+
+    first = scheduler.generate_schedule(db, MONTH)
+    first_ids = {a.id for a in crud.get_assignments(db, MONTH)}
+    assert first["cached"] is False
+
+    # Same inputs: the stored rows are kept untouched
+    cached = scheduler.generate_schedule(db, MONTH)
+    assert cached["cached"] is True
+    assert cached["assignments"] == first["assignments"]
+    assert {a.id for a in crud.get_assignments(db, MONTH)} == first_ids
+
+    # force, other solver options and changed inputs all regenerate
+    assert scheduler.generate_schedule(db, MONTH, force=True)["cached"] is False
+    assert scheduler.generate_schedule(db, MONTH, mode="flow")["cached"] is False
+    schedule.params_night_shifts = 1
+    db.commit()
+    assert scheduler.generate_schedule(db, MONTH, mode="flow")["cached"] is False
+
+    # A time-bounded local search is not reproducible, so it is never served from the cache
+    assert scheduler.generate_schedule(db, MONTH, budget_ms=50)["cached"] is False
+    assert scheduler.generate_schedule(db, MONTH, budget_ms=50)["cached"] is False
+    assert scheduler.generate_schedule(db, MONTH, mode="multistart", starts=2)["cached"] is False
+    assert scheduler.generate_schedule(db, MONTH, mode="multistart", starts=2)["cached"] is False
+    assert scheduler.generate_schedule(db, MONTH, mode="multistart", starts=2, seed=7)["cached"] is False
+    assert scheduler.generate_schedule(db, MONTH, mode="multistart", starts=2, seed=7)["cached"] is True
+
+    # Clearing the schedule by hand invalidates the stored hash
+    crud.delete_assignments_for_month(db, MONTH)
+    regenerated = scheduler.generate_schedule(db, MONTH, mode="flow")
+    assert regenerated["cached"] is False
+    assert len(crud.get_assignments(db, MONTH)) == regenerated["assignments"] > 0
+    db.close()
+
+
+def test_preview_endpoint_does_not_write():
+    db = make_db()
+    seed_month(db)
+    scheduler.generate_schedule(db, MONTH)
+    stored = {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)}
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        response = client.post(f"/months/{MONTH}/schedule/preview", json={"params_total_shifts": 5})
+        default_response = client.post(f"/months/{MONTH}/schedule/preview")
+        missing_response = client.post("/months/1999-01/schedule/preview")
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 200
+    preview = response.json()
+    assert preview["params"]["total_shifts"] == 5
+    assert preview["filled_slots"] == len(preview["assignments"]) < len(stored)
+
+    # Without overrides the preview is exactly what generate persisted
+    default_preview = default_response.json()
+    assert {(a["trainee_id"], date.fromisoformat(a["date"]), models.Shift(a["shift"]))
+            for a in default_preview["assignments"]} == stored
+
+    assert missing_response.status_code == 404
+    assert {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)} == stored
+    db.close()
+
+
+def test_parameter_search_endpoint_does_not_write():
+    db = make_db()
+    seed_month(db)
+    scheduler.generate_schedule(db, MONTH)
+    stored = {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)}
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        response = client.post(f"/months/{MONTH}/schedule/parameter-search", json={
+            "params_total_shifts": [1, 18], "params_night_shifts": [1, 2], "target_coverage": 0.75
+        })
+        bad_response = client.post(f"/months/{MONTH}/schedule/parameter-search",
+                                   json={"params_total_shifts": [10, 5]})
+        missing_response = client.post("/months/1999-01/schedule/parameter-search")
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["current"]["total_shifts"] == 18
+    assert result["tightest"]["coverage"] >= 0.75
+    assert result["tightest"]["total_shifts"] <= 18
+    assert result["pareto"]
+    assert bad_response.status_code == 400
+    assert missing_response.status_code == 404
+    assert {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)} == stored
+    assert db.query(models.ScheduleJob).count() == 0
+    db.close()
+
+
+def test_scenarios_endpoint_compares_parameter_sets():
+    db = make_db()
+    seed_month(db)
+    scheduler.generate_schedule(db, MONTH)
+    stored = {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)}
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        response = client.post(f"/months/{MONTH}/schedule/scenarios", json={
+            "scenarios": [{"params_post_night_shift_off": False}, {"params_total_shifts": 5}],
+            "include_diffs": True
+        })
+        bad_response = client.post(f"/months/{MONTH}/schedule/scenarios?mode=nope",
+                                   json={"scenarios": [{}]})
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 200
+    baseline, night_rest_off, short = response.json()["scenarios"]
+    assert baseline["filled_slots"] == len(stored)
+    assert night_rest_off["params"]["post_night_shift_off"] is False
+    assert short["max_shifts"] <= 5
+    assert len(short["diff"]["removed"]) > 0
+    assert bad_response.status_code == 400
+    assert {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)} == stored
+    db.close()
+
+
+def test_generate_endpoint_runs_as_a_coalesced_job(monkeypatch):
+    db = make_db()
+    seed_month(db)
+    monkeypatch.setattr(jobs.worker, "session_factory", TestingSessionLocal)
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        first = client.post(f"/months/{MONTH}/schedule/generate")
+        second = client.post(f"/months/{MONTH}/schedule/generate", params={"mode": "greedy"})
+        other = client.post(f"/months/{MONTH}/schedule/generate", params={"mode": "flow"})
+        missing = client.post("/months/1999-01/schedule/generate")
+
+        # A second request for the same month and options joins the pending job
+        assert first.status_code == 202
+        assert first.json()["status"] == "queued"
+        assert second.json()["id"] == first.json()["id"]
+        # Other options would not get what they asked for from the pending job
+        assert other.status_code == 409
+        assert other.json()["detail"]["job_id"] == first.json()["id"]
+        assert missing.status_code == 404
+
+        job_id = first.json()["id"]
+        jobs.worker.run_job(job_id)
+        job = client.get(f"/jobs/{job_id}").json()
+        next_job = client.post(f"/months/{MONTH}/schedule/generate").json()
+        assert client.get("/jobs/999").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert job["status"] == "succeeded"
+    assert job["progress_done"] == job["progress_total"] == 30
+    assert job["result"]["assignments"] == len(crud.get_assignments(db, MONTH)) > 0
+    assert job["options"]["mode"] == "greedy"
+
+    # Once the job has finished a new request starts a new job
+    assert next_job["id"] != job_id
+    db.close()
+
+
+def test_unfinished_jobs_are_requeued_after_restart():
+    db = make_db()
+    seed_month(db)
+    interrupted = models.ScheduleJob(month=MONTH, status=models.JobStatus.running, progress_done=12,
+                                     progress_total=30, options={"mode": "greedy"})
+    db.add(interrupted)
+    db.commit()
+
+    worker = jobs.JobWorker(TestingSessionLocal)
+    assert worker.requeue_pending() == 1
+    worker.start()
+    worker.queue.join()
+
+    db.refresh(interrupted)
+    assert interrupted.status == models.JobStatus.succeeded
+    assert interrupted.finished_at is not None
+    assert len(crud.get_assignments(db, MONTH)) == interrupted.result["assignments"]
+    db.close()
+
+
+def test_availability_change_with_repair_keeps_untouched_rows():
+    db = make_db()
+    seed_month(db)
+    scheduler.generate_schedule(db, MONTH)
+    before = {(a.trainee_id, a.date, a.shift): a.id for a in crud.get_assignments(db, MONTH)}
+    target = next(key for key in before if key[1] == date(2025, 11, 20))
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        unknown = client.post(
+            f"/months/{MONTH}/trainees/{target[0]}/availability/bulk",
+            json={"availabilities": [
+                {"date": target[1].isoformat(), "shift": "extinct", "available": False, "reason": "FER"}
+            ]}
+        )
+        response = client.post(
+            f"/months/{MONTH}/trainees/{target[0]}/availability/bulk",
+            params={"repair": True},
+            json={"availabilities": [
+                {"date": target[1].isoformat(), "shift": target[2].value, "available": False, "reason": "FER"}
+            ]}
+        )
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    # A shift outside the categories is refused before anything is stored
+    assert unknown.status_code == 400
+    assert response.status_code == 200
+    assert response.json()["repair"]["removed"] == 1
+
+    db.expire_all()
+    after = {(a.trainee_id, a.date, a.shift): a.id for a in crud.get_assignments(db, MONTH)}
+    assert target not in after
+    # Every other row is the very same database row
+    assert all(after[key] == row_id for key, row_id in before.items() if key != target)
+    db.close()
+
+
+def test_pinned_edits_survive_generation_and_ranges_keep_other_days():
+    db = make_db()
+    seed_month(db)
+    scheduler.generate_schedule(db, MONTH)
+    trainee = db.query(models.Trainee).filter(models.Trainee.name == "Trainee 005").one()
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        edit = client.post(
+            f"/months/{MONTH}/trainees/{trainee.id}/assignments",
+            json={"date": "2025-11-15", "shift": "tarde"}
+        )
+        bad_range = client.post(f"/months/{MONTH}/schedule/generate", params={"start_date": "2025-12-01"})
+    finally:
+        app.dependency_overrides.pop(get_db)
+    assert edit.json()["pinned"] is True
+    assert bad_range.status_code == 400
+
+    scheduler.generate_schedule(db, MONTH, mode="flow")
+    rows = crud.get_assignments(db, MONTH)
+    assert (trainee.id, date(2025, 11, 15), models.Shift.tarde, True) in {
+        (a.trainee_id, a.date, a.shift, a.pinned) for a in rows
+    }
+
+    # Only the last week is re-solved; earlier rows are the very same rows
+    before = {a.id: (a.trainee_id, a.date, a.shift) for a in rows if a.date < date(2025, 11, 24)}
+    result = scheduler.generate_schedule(db, MONTH, start_date="2025-11-24", end_date="2025-11-30")
+    after = {a.id: (a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, MONTH)}
+    assert result["fixed"] >= len(before)
+    assert {k: v for k, v in after.items() if v[1] < date(2025, 11, 24)} == before
+    assert any(v[1] >= date(2025, 11, 24) for v in after.values())
+    db.close()
+
+
+def test_next_month_starts_from_the_stored_boundary_state():
+    db = make_db()
+    schedule = seed_month(db)
+    # Enough pernoites to go around until the last day of the month
+    schedule.params_night_shifts = 6
+    db.commit()
+    scheduler.generate_schedule(db, MONTH)
+    states = crud.get_boundary_states(db, MONTH)
+    assert len(states) == 12
+
+    trainees = seed_december(db)
+
+    snapshot = scheduler.load_snapshot(db, "2025-12")
+    by_name = {t.id: t.name for t in trainees}
+    assert {by_name[tid]: tuple(state) for tid, state in snapshot.carry_in.items()} == {
+        name: (s.consecutive_work_days, s.consecutive_days_off, s.worked_night_last_day) for name, s in states.items()
+    }
+
+    scheduler.generate_schedule(db, "2025-12")
+    first_day = {by_name[a.trainee_id] for a in crud.get_assignments(db, "2025-12") if a.date == date(2025, 12, 1)}
+    rested = {name for name, s in states.items() if s.worked_night_last_day}
+    assert rested and not first_day & rested
+    db.close()
+
+
+def test_generate_range_pipelines_months_in_one_job(monkeypatch):
+    db = make_db()
+    schedule = seed_month(db)
+    schedule.params_night_shifts = 6
+    db.commit()
+    seed_december(db)
+    monkeypatch.setattr(jobs.worker, "session_factory", TestingSessionLocal)
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        response = client.post("/schedule/generate-range", params={"from": MONTH, "to": "2025-12"})
+        missing = client.post("/schedule/generate-range", params={"from": MONTH, "to": "2026-01"})
+        backwards = client.post("/schedule/generate-range", params={"from": "2025-12", "to": MONTH})
+        job_id = response.json()["id"]
+        jobs.worker.run_job(job_id)
+        job = client.get(f"/jobs/{job_id}").json()
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 202
+    assert missing.status_code == 404
+    assert backwards.status_code == 400
+    assert job["status"] == "succeeded", job["error"]
+    assert job["progress_done"] == job["progress_total"] == 30 + 31
+    months = {m["month"]: m for m in job["result"]["months"]}
+    assert list(months) == [MONTH, "2025-12"]
+    for month_str, stats in months.items():
+        assert stats["assignments"] == len(crud.get_assignments(db, month_str)) > 0
+        assert 0 < stats["coverage"] <= 100
+
+    # December was solved from November's in-memory boundary: the same plan a
+    # single-month generation (reading the stored boundary) produces
+    db.expire_all()
+    batch = {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, "2025-12")}
+    assert scheduler.generate_schedule(db, "2025-12")["cached"] is True
+    scheduler.generate_schedule(db, "2025-12", force=True)
+    assert {(a.trainee_id, a.date, a.shift) for a in crud.get_assignments(db, "2025-12")} == batch
+    db.close()
+
+
+def test_strict_feasibility_refuses_an_impossible_month():
+    db = make_db()
+    seed_month(db, trainee_count=3, instructors=8)
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        report = client.get(f"/months/{MONTH}/schedule/feasibility").json()
+        strict = client.post(f"/months/{MONTH}/schedule/generate", params={"feasibility": "strict"})
+        unknown = client.post(f"/months/{MONTH}/schedule/generate", params={"feasibility": "maybe"})
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert report["feasible"] is False
+    # Every slot (4 needed, 3 trainees) and every day is a bottleneck; the report lists the worst
+    assert report["month_totals"]["shortfall"] > 0 and report["bottleneck_count"] == 30 * 4
+    assert len(report["bottlenecks"]) == 20
+    assert strict.status_code == 422
+    assert strict.json()["detail"]["month_totals"] == report["month_totals"]
+    assert unknown.status_code == 400
+
+    with pytest.raises(scheduler.InfeasibleScheduleError):
+        scheduler.generate_schedule(db, MONTH, feasibility="strict")
+    assert crud.get_assignments(db, MONTH) == []
+
+    # warn generates anyway and reports the shortfall
+    result = scheduler.generate_schedule(db, MONTH)
+    assert result["feasibility"]["feasible"] is False
+    assert result["assignments"] < result["required_slots"]
+    db.close()
+
+
+def test_strict_window_regeneration_ignores_days_outside_the_window():
+    db = make_db()
+    schedule = seed_month(db)
+    # Day 1 asks for far more trainees than the month has
+    db.query(models.InstructorCapacity).filter_by(
+        monthly_schedule_id=schedule.id, date=date(2025, 11, 1), shift=models.Shift.manha
+    ).update({"total_instructors": 100})
+    db.commit()
+
+    app.dependency_overrides[get_db] = lambda: (yield TestingSessionLocal())
+    try:
+        client = TestClient(app)
+        whole = client.post(f"/months/{MONTH}/schedule/generate", params={"feasibility": "strict"})
+        window = client.post(f"/months/{MONTH}/schedule/generate", params={
+            "feasibility": "strict", "start_date": "2025-11-10", "end_date": "2025-11-15"
+        })
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert whole.status_code == 422
+    assert window.status_code == 202
+    db.close()
@@ -0,0 +1,60 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import Shift
+from app.scheduling.availability import AvailabilityIndex
+from app.scheduling.boundary import BoundaryState
+from app.scheduling.core import ScheduleParams, ScheduleSnapshot, MODES, solve
+from app.scheduling.local_search import LocalSearch
+from app.scheduling.scoring import score_plan, OFF_RUN_WEIGHT, WORK_RUN_WEIGHT
+from tests.test_solver_modes import make_snapshot
+
+
+def test_run_violations_follow_the_streak_rules():
+    days = [date(2025, 11, 1) + timedelta(days=i) for i in range(6)]
+    capacities = {(d, Shift.manha): 2 for d in days}
+    snapshot = ScheduleSnapshot.build(
+        "2025-11", days, [1, 2], AvailabilityIndex.from_rows(days, []), capacities,
+        ScheduleParams(total_shifts=6, max_consecutive_work_days=2, max_consecutive_days_off=2),
+        carry_in={2: BoundaryState(consecutive_days_off=1)}
+    )
+    # Trainee 1 works 4 days in a row (2 past the limit); trainee 2 is off all month (5 past the limit)
+    plan = [(1, d, Shift.manha) for d in days[:4]]
+
+    result = score_plan(snapshot, plan)
+
+    assert result["work_violations"] == 2
+    # Trainee 1: days 5-6 are 2 days off (at the limit); trainee 2: 1 carried + 6 days off
+    assert result["off_violations"] == 5
+    assert result["unfilled"] == 2
+    assert result["total_spread"] == 4
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_search_keeps_the_vectorized_score_in_step(seed):
+    snapshot = make_snapshot(seed, total_shifts=10)
+    greedy = solve(snapshot)
+    search = LocalSearch(snapshot, greedy.assignments, seed)
+    assert search.score == greedy.stats["score"]["score"]
+    # Per-row penalties add up to the vectorized run terms
+    breakdown = search.breakdown()
+    assert sum(search.penalty) == (
+        WORK_RUN_WEIGHT * breakdown["work_violations"] + OFF_RUN_WEIGHT * breakdown["off_violations"]
+    )
+
+    search.run(50)
+
+    assert search.score == search.evaluate() == score_plan(snapshot, search.assignments())["score"]
+    assert search.score <= greedy.stats["score"]["score"]
+
+
+def test_every_mode_reports_the_same_objective():
+    snapshot = make_snapshot(1)
+    for mode in MODES:
+        plan = solve(snapshot, mode, budget_ms=20, seed=1, starts=2)
+        assert plan.stats["score"] == score_plan(snapshot, plan.assignments)
@@ -0,0 +1,85 @@
+import os
+# Set env var BEFORE importing app modules to avoid connecting to real DB
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+from datetime import date, timedelta
+
+import pytest
+
+from app import crud, models
+from app.services.trainee_copy import copy_from_previous_month
+
+
+def add_trainees(db, month, names):
+    schedule = crud.get_or_create_monthly_schedule(db, month)
+    db.add_all(models.Trainee(monthly_schedule_id=schedule.id, name=name) for name in names)
+    db.commit()
+    return schedule
+
+
+@pytest.mark.parametrize("size", [3, 300])
+def test_import_list_statement_count_does_not_grow(db, client, size, count_statements):
+    add_trainees(db, "2025-11", ["T0"])
+    statements = count_statements()
+
+    response = client.post("/months/2025-11/trainees/import-list", json=[f"T{i}" for i in range(size)] + ["T1"])
+
+    assert response.json()["imported"] == size - 1
+    assert set(response.json()) == {"status", "imported", "imported_names"}
+    assert len(crud.get_trainees_for_month(db, "2025-11")) == size
+    assert len([s for s in statements if s.startswith("INSERT")]) == 1
+    assert len(statements) <= 5
+
+
+@pytest.mark.parametrize("size", [3, 300])
+def test_copy_statement_count_does_not_grow(db, client, size, count_statements):
+    add_trainees(db, "2025-10", [f"T{i}" for i in range(size)])
+    add_trainees(db, "2025-11", ["T0"])
+    statements = count_statements()
+
+    response = client.post("/months/2025-11/trainees/copy-from-previous")
+
+    assert response.json()["copied_count"] == size - 1
+    assert len(crud.get_trainees_for_month(db, "2025-11")) == size
+    assert len(statements) <= 6
+
+    assert client.post("/months/2025-11/trainees/copy-from-previous").json()["copied_count"] == 0
+    assert client.post("/months/2025-10/trainees/copy-from-previous").status_code == 404
+
+
+def test_copy_carries_weekly_unavailability_only(db):
+    previous = add_trainees(db, "2025-10", ["Ana", "Bruno"])
+    ana, bruno = crud.get_trainees_for_month(db, "2025-10")
+    october = [date(2025, 10, 1) + timedelta(days=i) for i in range(31)]
+    for d in october:
+        # Ana has a class every Tuesday morning and missed one Thursday; Bruno was on leave all month
+        if d.weekday() == 1 or d == date(2025, 10, 16):
+            db.add(models.TraineeAvailability(
+                monthly_schedule_id=previous.id, trainee_id=ana.id, date=d, shift=models.Shift.manha,
+                available=False, reason="Aula"
+            ))
+        db.add(models.TraineeAvailability(
+            monthly_schedule_id=previous.id, trainee_id=bruno.id, date=d, shift=models.Shift.tarde,
+            available=False, reason="FER"
+        ))
+    target = crud.get_or_create_monthly_schedule(db, "2025-11")
+    existing = models.Trainee(monthly_schedule_id=target.id, name="Ana")
+    db.add(existing)
+    db.flush()
+    db.add(models.TraineeAvailability(
+        monthly_schedule_id=target.id, trainee_id=existing.id, date=date(2025, 11, 4), shift=models.Shift.manha,
+        available=True
+    ))
+    db.commit()
+
+    result = copy_from_previous_month(db, "2025-11", "2025-10", carry_availability=True)
+
+    assert result["copied_count"] == 1
+    # Tuesday the 4th was already in the new month: only the other three are carried
+    assert result["carried_availability"] == 3
+    november = crud.get_all_availability_for_month(db, "2025-11")
+    assert {(a.trainee_id, a.shift) for a in november} == {(existing.id, models.Shift.manha)}
+    assert sorted(a.date.day for a in november) == [4, 11, 18, 25]
+    # The record already in the new month is kept as it is
+    assert [a.available for a in november if a.date.day == 4] == [True]
+    assert all(a.reason == "Aula" for a in november if not a.available)
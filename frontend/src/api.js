@@ -6,4 +6,15 @@ const api = axios.create({
     timeout: 120000, // 120 seconds for large imports
 });
 
+// Poll a background job until it finishes; onProgress receives the job on every poll
+export const waitForJob = async (jobId, onProgress, intervalMs = 1000) => {
+    while (true) {
+        const { data: job } = await api.get(`/jobs/${jobId}`);
+        if (onProgress) onProgress(job);
+        if (job.status === 'succeeded') return job;
+        if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+};
+
 export default api;